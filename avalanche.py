@@ -53,6 +53,71 @@
 #            required by the Avalanche API. Also, moving to subprocess should
 #            allow 64-bit Python to use 32-bit Tcl.
 #
+# 2.1.0    10/16/2026
+#           -Added av.pipeline() and av.batch(). Queued commands are sent to
+#            the Tcl interpreter in a single write.
+#           -Exec now uses a length-prefixed protocol to talk to the Tcl
+#            interpreter, instead of scanning each line for a sentinel.
+#           -Added the AsyncAVA class (avalanche_async.py), an asyncio version
+#            of AVA. Split the init into SetupLogging() and Initialize() so
+#            that AsyncAVA can share them.
+#           -Added the AVAPool class. It runs read-only queries in parallel on
+#            several Tcl interpreters that are attached to the same session.
+#           -Exec is now thread-safe. Each command is tagged with a request id,
+#            and a reader thread hands the responses to the waiting callers.
+#           -av.get without attributes no longer makes a second round trip to
+#            convert the Tcl list. Tcl lists are now split in Python (see
+#            SplitTclList).
+#           -av.getEvents now fetches and decodes all of the events with a
+#            single Tcl command, instead of 2 + 2N commands.
+#           -Added an optional av.get cache (the cachesize and cachettl init
+#            arguments). See AttributeCache.
+#           -Added av.getMany (av.get_many), which gets the same attributes
+#            from many objects with a single Tcl command.
+#           -Added av.configMany and av.createMany (av.config_many and
+#            av.create_many), which config or create many objects with a
+#            single Tcl command.
+#           -av.reserveAll now connects each chassis once (all of them at the
+#            same time), looks the ports up in an index that is built with a
+#            single query, and reserves them with a single Tcl command. It
+#            returns a report of the reservation.
+#           -av.releaseAll now finds the reserved ports with a single query and
+#            releases them with a single Tcl command. It returns a report
+#            of the released and failed ports.
+#           -Replaced LogCommand, which walked the stack on every call, with the
+#            LoggedCommand decorator. Nothing is formatted unless the message
+#            is logged.
+#           -Each AVA object now has its own logger ("avalanche.AVA<n>") and log
+#            file, and the records are written by a separate thread. Added the
+#            logformat ("json" lines) and logresultsize init arguments.
+#           -Added av.stats(), with the latency of each Tcl command verb, the
+#            bytes written and read and the parse time. av.writeMetrics and
+#            av.serveMetrics export them in the Prometheus text format.
+#           -Added av.addHook and av.removeHook, to call ExecHooks around each
+#            command, and SpanRecorder, which writes a timeline of the commands
+#            in the Chrome trace event format.
+#           -Added the benchmarks directory, with a stand-in av Tcl package.
+#           -Added avalanche_replay.py, to record the Tcl commands with their
+#            results and durations, and to replay them.
+#           -Added av.stream, which yields the runtime statistics of a
+#            subscription at a fixed interval, with one command per sample.
+#           -av.subscribe accepts a single attribute string, as documented.
+#           -Added avalanche_stats.py, a fixed-size columnar store for the
+#            av.stream samples, which can spill older samples to a file.
+#           -Added av.startEvents, a background event reader that dispatches
+#            the events to callbacks, with EventPump.waitFor.
+#           -Added av.applyAsync, av.connectAsync and av.performAsync, which
+#            return futures that are resolved by the async_method_completed
+#            events, and the WaitAll and AsCompleted helpers.
+#           -Added avalanche_daemon.py, which keeps interpreters that have
+#            already loaded the API, and the connect init argument to use them.
+#           -The interpreter is initialized with a single command. The helper
+#            procedures are sourced from avalanche_helpers.tcl, the version
+#            probes only run if they are logged, and the lazyload init argument
+#            defers loading the API until the first command.
+#           -If there is no lib directory, the Tcl libraries are extracted from
+#            lib.zip to a cache directory, once for each version of lib.zip.
+#
 ###############################################################################
 
 ###############################################################################
@@ -102,13 +167,50 @@ import ast              # Used to convert strings to dict.
 import os
 import atexit
 import re
+import socket
+import threading
+import time
+
+import collections
+
+from collections import OrderedDict
+
+try:
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+import concurrent.futures
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 
 from shutil import copyfile     # Used for copying files.
 
 # The following are required for logging.
 import logging
 import datetime
+import functools
 import inspect
+import itertools
+import json
+import copy
+import array
+import hashlib
+import shutil
+import tempfile
+import zipfile
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+try:
+    from logging.handlers import QueueHandler, QueueListener
+except ImportError:
+    # Python 2 does not have these. The log file is then written synchronously.
+    QueueHandler = None
 
 #from inspect import getargvalues, stack
 
@@ -119,12 +221,188 @@ import inspect
 
 from subprocess import Popen, PIPE
 
-class AVA:
+# Python literals can only start with one of these characters (or be True, False or None).
+LITERAL_START = set("0123456789+-.([{'\"")
+
+# Every response from the Tcl interpreter starts with this marker. Output that a
+# command writes to stdout by itself can never be mistaken for a response.
+FRAME_MARKER = b"\x01AVA "
+
+# The Tcl procedures that are used by this wrapper. See Initialize.
+HELPERS_TCL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "avalanche_helpers.tcl")
+
+# The bundled Tcl libraries. See ExtractLibraries.
+LIB_ZIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lib.zip")
+
+# Changes whenever the layout of the extracted libraries changes.
+LIB_CACHE_VERSION = 1
+
+# This is sent to tclsh at startup. It replaces the interactive command loop with
+# one that reads length-prefixed commands from stdin, and writes back the request
+# id, status and byte length of the result ahead of the result itself. This avoids
+# having to scan the output for a sentinel, which could also appear in the result,
+# and the request id lets several threads share the interpreter.
+SERVER_TCL = r"""
+namespace eval ::avapy {}
+
+proc ::avapy::serve {} {
+    fconfigure stdin -translation binary
+    fconfigure stdout -translation binary -buffering full
+
+    while {[gets stdin header] >= 0} {
+        if {[llength $header] != 2} {
+            continue
+        }
+        foreach {requestid length} $header break
+
+        set script [encoding convertfrom utf-8 [read stdin $length]]
+
+        set status [expr {[catch {uplevel #0 $script} result] == 1}]
+        set result [encoding convertto utf-8 $result]
+
+        puts -nonewline stdout "\x01AVA $requestid $status [string length $result]\n"
+        puts -nonewline stdout $result
+        flush stdout
+    }
+}
+
+::avapy::serve
+"""
+
+#==============================================================================
+def LoggedCommand(function):
+    """
+    Decorates the public AVA methods, to log each call (including its arguments)
+    in a format that looks like normal Python syntax.
+
+    The arguments are only formatted if the message is actually logged, so the
+    overhead is negligible when debug logging is disabled.
+
+    For a generator (eg: av.stream), the call that the hooks see lasts from the 
+    first sample until the generator is exhausted or closed.
+    """
+    if hasattr(inspect, "getfullargspec"):
+        spec = inspect.getfullargspec(function)
+        varkw = spec.varkw
+    else:
+        spec = inspect.getargspec(function)
+        varkw = spec.keywords
+
+    # The named parameters (without "self"), and the default values of the last ones.
+    names = spec.args[1:]
+    defaults = dict(zip(reversed(spec.args), reversed(spec.defaults or ())))
+
+    name = function.__name__
+
+    @functools.wraps(function)
+    def Method(self, *args, **kwargs):
+        if self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug(" - Python command - %s", CommandMessage(name, names, defaults, varkw, args, kwargs))
+
+        if not self.hooks or not self.TRACE_CALLS:
+            return function(self, *args, **kwargs)
+
+        for hook in self.hooks:
+            hook.before_call(name, args, kwargs)
+
+        started = time.time()
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            duration = time.time() - started
+            for hook in self.hooks:
+                hook.after_call(name, duration)
+
+    if inspect.isgeneratorfunction(function):
+        @functools.wraps(function)
+        def Generator(self, *args, **kwargs):
+            if self.log.isEnabledFor(logging.DEBUG):
+                self.log.debug(" - Python command - %s", CommandMessage(name, names, defaults, varkw, args, kwargs))
+
+            if not self.hooks or not self.TRACE_CALLS:
+                return function(self, *args, **kwargs)
+
+            return TracedGenerator(self, name, args, kwargs, function(self, *args, **kwargs))
+
+        return Generator
+
+    return Method
+
+#==============================================================================
+def TracedGenerator(av, name, args, kwargs, generator):
+    # Runs the generator of a LoggedCommand between the before_call and after_call
+    # hooks.
+    hooks = list(av.hooks)
+    for hook in hooks:
+        hook.before_call(name, args, kwargs)
+
+    started = time.time()
+    try:
+        for item in generator:
+            yield item
+    finally:
+        # Closing this generator (eg: a "break" out of a loop) also closes the
+        # wrapped one, which runs its cleanup.
+        generator.close()
+
+        duration = time.time() - started
+        for hook in hooks:
+            hook.after_call(name, duration)
+
+#==============================================================================
+class CommandMessage(object):
+    """
+    The log message of a LoggedCommand. It is formatted when it is written.
+    """
+    __slots__ = ("name", "names", "defaults", "varkw", "args", "kwargs")
+
+    def __init__(self, name, names, defaults, varkw, args, kwargs):
+        self.name = name
+        self.names = names
+        self.defaults = defaults
+        self.varkw = varkw
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        arguments = []
+
+        for index, key in enumerate(self.names):
+            if index < len(self.args):
+                value = self.args[index]
+            elif key in self.kwargs:
+                value = self.kwargs[key]
+            else:
+                value = self.defaults.get(key, "")
+
+            arguments.append(key + "=" + self.Format(value))
+
+        # The extra positional arguments (eg: the attributes of av.get).
+        for value in self.args[len(self.names):]:
+            arguments.append(self.Format(value))
+
+        # The keyword arguments that are not named parameters (eg: the attributes of av.config).
+        if self.varkw:
+            for key in self.kwargs:
+                if key not in self.names:
+                    arguments.append(key + "=" + self.Format(self.kwargs[key]))
+
+        return self.name + "(" + ", ".join(arguments) + ")"
+
+    def Format(self, value):
+        return "\"" + str(value) + "\""
+
+
+class AVA(object):
+    # Whether the public methods call the before_call and after_call hooks. See ExecHooks.
+    TRACE_CALLS = True
+
     ###############################################################################
     ####
     ####    Public Methods
     ####
     ###############################################################################
+    @LoggedCommand
     def login(self, userName="", password="", mode="", workspace="", tempworkspace=False):   
         """
         Description:
@@ -134,7 +412,6 @@ class AVA:
             option - value pair to log in to an existing custom workspace, or to create a new 
             custom workspace, and log in to it.         
         """
-        self.LogCommand()
 
         tclcode = "av::login"
 
@@ -160,17 +437,19 @@ class AVA:
             if workspace != "":
                 tclcode += " -workspace " + workspace
         
+        self.InvalidateCache()
         result = self.Exec(tclcode)
 
-        logging.info("ABL Log Location: " + self.Exec("av::get system1 -ablLogLocation"))
-        logging.info("Username: " + self.Exec("av::get system1 -user"))
-        logging.info("Workspace: " + self.Exec("av::get system1 -workspace"))
-        logging.info("Project Path: " + self.Exec("av::get system1.metainfo -defaultDirectoryPath"))
+        self.Then(self.Exec("av::get system1 -ablLogLocation"), lambda value: self.log.info("ABL Log Location: " + str(value)))
+        self.Then(self.Exec("av::get system1 -user"), lambda value: self.log.info("Username: " + str(value)))
+        self.Then(self.Exec("av::get system1 -workspace"), lambda value: self.log.info("Workspace: " + str(value)))
+        self.Then(self.Exec("av::get system1.metainfo -defaultDirectoryPath"), lambda value: self.log.info("Project Path: " + str(value)))
 
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def logout(self):
         """
         Description:
@@ -186,12 +465,13 @@ class AVA:
             the av.logout command deletes all the tests and test results that were
             created during the session.
         """
-        self.LogCommand()
+        self.InvalidateCache()
         result = self.Exec("av::logout")
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def config(self, objecthandle, **kwargs):
         """ 
         Description
@@ -231,23 +511,56 @@ class AVA:
             av.config("userprofile1", cifsng.cifsngDataRandomization=true)
             av.config(project + ".test.userprofile", sipng.firstRTPPort=1026)
         """
-        self.LogCommand()
-        tclcode = 'av::config ' + objecthandle + ' '
+        tclcode = self.ConfigCommand(objecthandle, kwargs)
 
-        for key in kwargs:
-            #tclcode = tclcode + ' ' + '-' + key + ' "' + str(kwargs[key]) + '"'
-            reg = re.compile("\[")
-            if reg.match(str(kwargs[key])):
-                # This is a Tcl command (eg: [NULL]).
-                tclcode = tclcode + ' ' + '-' + key + " " + str(kwargs[key])
-            else:
-                tclcode = tclcode + ' ' + '-' + key + ' {' + str(kwargs[key]) + '}'
+        self.InvalidateConfig(objecthandle, kwargs)
 
         result = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(result))                    
+        self.log.debug(" - Python result  - %s", result)                    
         return result
 
     #==============================================================================
+    @LoggedCommand
+    def configMany(self, items):
+        """
+        Description
+            Updates the attributes of many objects, with a single Tcl command.
+
+        Syntax
+            av.configMany [(objectHandle, {attrName: value, ...}), ...]
+
+        Comments
+            Each item is an object handle (or DDN path) and a dictionary of the
+            attributes (or DAN paths) to update, as they would be passed to av.config. 
+            The values are quoted in the same way as av.config: a value that starts 
+            with "[" is passed to Tcl as a command (eg: [NULL]).
+            The items are configured in order. An error in one item does not stop the
+            others.
+            av.config_many is an alias of this function.
+
+        Return Value
+            A BulkResult, which is a list of the av.config results, in the order of the
+            items. The exception is returned in place of the result of an item that
+            failed. The failed items are also listed in BulkResult.errors.
+
+        Example
+            result = av.configMany([(userprofile, {"name": "UP" + str(index)}) for index, userprofile in enumerate(userprofiles)])
+            if result.errors:
+                ...
+        """
+        items = list(items)
+
+        commands = []
+        for objecthandle, attributes in items:
+            commands.append(self.ConfigCommand(objecthandle, attributes))
+            self.InvalidateConfig(objecthandle, attributes)
+
+        return self.ExecMany(commands)
+
+    config_many = configMany
+
+    #==============================================================================
+    @LoggedCommand
     def get(self, objecthandle, *args):
         """
         Description:
@@ -316,7 +629,17 @@ class AVA:
             av.get(test, "netrworkprofile.tcpoptions.tcptimeout")
             av.get(project + "userprofile(2)", "nfs.dataRandomization")
         """
-        self.LogCommand()
+
+        if self.cache is not None:
+            key = (objecthandle,) + args
+            found, result = self.cache.Get(key)
+            if found:
+                self.log.debug(" - Python result (cached) - %s", result)
+                return self.Resolved(result)
+
+            # Results that were fetched before an invalidation are not cached.
+            generation = self.cache.generation
+
         tclcode = "av::get " + objecthandle
 
         for key in args:
@@ -326,12 +649,102 @@ class AVA:
 
         # Determine if we need to return a dictionary or just the result of the command.
         if len(args) == 0:
-            result = self.List2Dict(result)
+            result = self.Then(result, self.List2Dict)
+
+        if self.cache is not None:
+            result = self.Then(result, lambda value: self.cache.Put((objecthandle,) + args, value, generation))
 
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
+    def getMany(self, handles, attributes=()):
+        """
+        Description
+            Retrieves the same attributes from a list of objects, with a single Tcl command.
+
+        Syntax
+            av.getMany handles [attributes]
+
+        Comments
+            This is equivalent to calling av.get(handle, attribute) for each handle and
+            attribute, without the overhead of a round trip to the Tcl interpreter for
+            each call. The handles may be DDN paths, and the attributes may be DAN paths
+            or relation names, as with av.get.
+            If no attributes are specified, all of the attributes of each object are
+            returned, as with av.get(handle).
+            An error in one av.get does not stop the others. The exception is returned
+            in place of the value.
+            av.get_many is an alias of this function.
+
+        Return Value
+            An ordered dictionary of {handle: {attribute: value}}, in the order of the
+            handles. If no attributes are specified, each object maps to all of its
+            attributes (or to the exception, if the object can not be retrieved).
+
+        Example
+            av.getMany(av.get(test, "userprofiles").split(), ["name", "loadprofile"])
+        """
+        handles = [str(handle) for handle in handles]
+        attributes = [str(attribute) for attribute in attributes]
+
+        # Only the objects that are not entirely in the cache are sent to Tcl.
+        cached = {}
+        if self.cache is not None:
+            generation = self.cache.generation
+
+            for handle in handles:
+                if attributes:
+                    values = {}
+                    for attribute in attributes:
+                        found, value = self.cache.Get((handle, attribute))
+                        if not found:
+                            break
+                        values[attribute] = value
+                    else:
+                        cached[handle] = values
+                else:
+                    found, value = self.cache.Get((handle,))
+                    if found:
+                        cached[handle] = value
+
+        fetch = [handle for handle in handles if handle not in cached]
+        if not fetch:
+            result = OrderedDict((handle, cached[handle]) for handle in handles)
+            self.log.debug(" - Python result (cached) - %s", result)
+            return self.Resolved(result)
+
+        tclcode = "::avapy::getMany " + TclQuote(TclList(fetch)) + " " + TclQuote(TclList(attributes))
+
+        def Decode(tclresult):
+            fetched = {}
+
+            for handle, element in zip(fetch, SplitTclList(str(tclresult))):
+                if attributes:
+                    values = {}
+                    for attribute, item in zip(attributes, SplitTclList(element)):
+                        values[attribute] = self.ConvertItem(item)
+                        if self.cache is not None and not isinstance(values[attribute], Exception):
+                            self.cache.Put((handle, attribute), values[attribute], generation)
+                    fetched[handle] = values
+                else:
+                    values = self.ConvertItem(element, self.List2Dict)
+                    if self.cache is not None and not isinstance(values, Exception):
+                        self.cache.Put((handle,), values, generation)
+                    fetched[handle] = values
+
+            # Keep the order of the handles.
+            result = OrderedDict((handle, cached.get(handle, fetched.get(handle))) for handle in handles)
+            self.log.debug(" - Python result  - %s", result)
+            return result
+
+        return self.Then(self.Exec(tclcode), Decode)
+
+    get_many = getMany
+
+    #==============================================================================
+    @LoggedCommand
     def perform(self, command, objecthandle, **kwargs):
         """        
         Description
@@ -353,43 +766,18 @@ class AVA:
             av.perform("save", "system1")
             av.perform("export", "system1", projectsTestsHandles="test1")
         """
-        self.LogCommand()
-
-        tclcode = "av::perform " + command + " " + objecthandle
-
-        if command == "SetInterfaceAttributes":
-            # WARNING: This AVA API command IGNORES the argument names, and instead makes the arguments position dependent.
-            # av::perform SetInterfaceAttributes $tests_handle.topology.interface(1) -port 10.140.99.40/1/1 -physIf 0 -interfaceDisplayString 0,0 -interfaceLocationString 0,0
-
-            port           = kwargs["port"] 
-            physIf         = kwargs["physIf"]
-            display        = kwargs["interfaceDisplayString"]
-            locationstring = kwargs["interfaceLocationString"]
 
-            tclcode += " -ignored1 " + str(port) + " -ignored2 " + str(physIf) + " -ignored3 " + str(display) + " -ignored4 " + str(locationstring)
-
-        elif command == "Export":
-            # For this command, the arguments MUST be in a specific order (don't ask me why).
-            test = kwargs["projectstestshandles"] 
-
-            tclcode += " -projectstestshandles " + str(test)
-
-            if "options" in kwargs:
-                tclcode += ' -options "' + str(kwargs["options"]) + '"'
-
-            if "newpath" in kwargs:
-                newpath = kwargs["newpath"]
-                tclcode += ' -newpath "' + str(kwargs["newpath"]) + '"'            
+        tclcode = self.PerformCommand(command, objecthandle, kwargs)
 
-        else:
-            for key in kwargs:
-                tclcode = tclcode + " " + "-" + str(key) + ' "' + str(kwargs[key]) + '"'
+        # A command may modify any part of the data model.
+        self.InvalidateCache()
 
         result = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def apply(self, testHandle, trial=0, continueIfAlreadyRunning=0, removeOldTest=0, rerun=0):
         """
         Description
@@ -414,14 +802,15 @@ class AVA:
             av.apply(testHandle)
             av.apply(testHandle, 1)
         """         
-        self.LogCommand()
         tclcode = "av::apply " + testHandle + " " + str(trial) + " " + str(continueIfAlreadyRunning) + " " + str(removeOldTest) + " " + str(rerun)
 
+        self.InvalidateCache()
         result = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def connect(self, ipAddress, type="", executesynchronous=""):
         """
         Description
@@ -447,20 +836,15 @@ class AVA:
         Example        
             av.connect("10.72.55.80")
         """
-        self.LogCommand()
-        tclcode = "av::connect " + ipAddress
-
-        if type != "":
-            tclcode += " -type " + type
-
-        if executesynchronous != "":
-            tclcode += " -executesynchronous " + executesynchronous
+        tclcode = self.ConnectCommand(ipAddress, type, executesynchronous)
 
+        self.InvalidateCache()
         requestid = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(requestid))
+        self.log.debug(" - Python result  - %s", requestid)
         return requestid
 
     #==============================================================================
+    @LoggedCommand
     def create(self, objecttype, under, **kwargs):
         """
         Description
@@ -502,17 +886,52 @@ class AVA:
             test = av.create("tests", under=project, name="Test1", testType="deviceComplex")
             sp = av.create("ServerProfiles", under=project, name="ServerProfile", applicationProtocol="HTTP", http.keepAlive="on")        
         """
-        self.LogCommand()
-        tclcode = "av::create " + objecttype + " -under " + under
+        tclcode = self.CreateCommand(objecttype, under, kwargs)
 
-        for key in kwargs:
-            tclcode = tclcode + " " + "-" + key + " " + str(kwargs[key])
+        # The relations of the parent change.
+        self.InvalidateCache(under)
 
         objecthandle = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(objecthandle))
+        self.log.debug(" - Python result  - %s", objecthandle)
         return objecthandle        
 
     #==============================================================================
+    @LoggedCommand
+    def createMany(self, objecttype, under, items):
+        """
+        Description
+            Creates many objects of the specified type, under the specified parent,
+            with a single Tcl command.
+
+        Syntax
+            av.createMany(<objecttype>, <under>, [{attr: <value>, ...}, ...])
+
+        Comments
+            Each item is a dictionary of the attributes of one object, as they would be
+            passed to av.create. One object is created for each item, in order. An error
+            in one item does not stop the others.
+            av.create_many is an alias of this function.
+
+        Return Value
+            A BulkResult, which is a list of the handles of the new objects, in the order
+            of the items. The exception is returned in place of the handle of an object
+            that could not be created. The failed items are also listed in 
+            BulkResult.errors.
+
+        Example
+            userprofiles = av.createMany("userprofiles", project, [{"name": "UP" + str(index)} for index in range(1000)])
+        """
+        commands = [self.CreateCommand(objecttype, under, attributes) for attributes in items]
+
+        # The relations of the parent change.
+        self.InvalidateCache(under)
+
+        return self.ExecMany(commands)
+
+    create_many = createMany
+
+    #==============================================================================
+    @LoggedCommand
     def delete(self, handle):
         """
         Description
@@ -536,14 +955,16 @@ class AVA:
             av.delete(projectHandle)
             av.delete(projectHandle + ".userp")
         """
-        self.LogCommand()
         tclcode = "av::delete " + handle
 
+        # The relations of the (unknown) parent change as well.
+        self.InvalidateCache()
         result = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def disconnect(self, ipAddress):
         """
         Description
@@ -563,13 +984,14 @@ class AVA:
         Example
             av.disconnect("10.50.20.77")
         """
-        self.LogCommand()
         tclcode = "av::disconnect " + ipAddress
+        self.InvalidateCache()
         result = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def getEvents(self):
         """
         Description
@@ -589,63 +1011,19 @@ class AVA:
         Example
             av.getEvents        
         """
-        self.LogCommand()
         tclcode = "av::getEvents"        
 
         tclresult = self.Exec(tclcode)
 
         # Convert any backslashes to forward slashes. This may happen on Windows, which uses the backslash
         # for file path delimiters.
-        tclresult = re.sub(r"\\", r"/", tclresult)
-
-        # The goal is to create a Python list of dictionaries, where element of the list
-        # is a Avalanche Event dictionary with the keys "message", "additional" and "name".
-        # The "additional" key is also a dictionary.
-        eventlist = []
-        
-        # First step is to break the Tcl list into a Python list (using Tcl).
-        tclcode =  "set pythonlist {};"
-        tclcode += "foreach event [list " + tclresult + "] {"
-        tclcode += "    regsub -all {\\n} $event {} event;"
-        tclcode += "    append pythonlist \\\"$event\\\" , "
-        tclcode += "};"        
-        tclcode += "puts $pythonlist"
-        #tclresult = self.Exec(tclcode)
-        # This step is what converts the Tcl string to a list.
-        #listofstrings = ast.literal_eval(tclresult)
-        listofstrings = self.Exec(tclcode)
-
-        # Now convert each list element to a dictionary.
-        for event in listofstrings:   
-            # Construct a Python dictionary using Tcl.
-            # This is done because it is MUCH easier for Tcl to deal with Tcl lists.
-            tclcode =  "set pythondict \{;"
-            tclcode += "foreach element [list " + event + "] {"
-            tclcode += "    append pythondict \"\\\"[lindex $element 0]\\\": \\\"[lindex $element 1]\\\", \""
-            tclcode += "}; append pythondict \}; puts $pythondict"
-
-            #tclresult = self.tcl.eval(tclcode)
-            #eventdict = ast.literal_eval(tclresult)
-            eventdict = self.Exec(tclcode)            
-
-            # The "addtional" field may contain an additional list of information.
-            # This is also converted into a dictionary.
-            if eventdict["additional"] != "":
-                tclcode  = "set pythondict \{;"
-                tclcode += "foreach element [list " + eventdict["additional"] + "] {"
-                tclcode += "    append pythondict \"\\\"[lindex $element 0]\\\": \\\"[lindex $element 1]\\\", \""
-                tclcode += "}; append pythondict \}; puts $pythondict"
-
-                #tclresult = self.tcl.eval(tclcode)
-                #eventdict["additional"] = ast.literal_eval(tclresult)
-                eventdict["additional"] = self.Exec(tclcode)
-
-            eventlist.append(eventdict)
+        eventlist = self.Then(tclresult, lambda tclresult: self.convertEventString(re.sub(r"\\", r"/", str(tclresult))))
 
-        logging.debug(" - Python result  - " + str(eventlist))
+        self.log.debug(" - Python result  - %s", eventlist)
         return eventlist
 
     #==============================================================================
+    @LoggedCommand
     def getSessions(self):
         """
         Description
@@ -663,14 +1041,14 @@ class AVA:
         Example
             av.getSessions        
         """
-        self.LogCommand()
         tclcode = "av::getSessions"
 
         tclresult = self.Exec(tclcode)     
-        logging.debug(" - Python result  - " + str(tclresult))
+        self.log.debug(" - Python result  - %s", tclresult)
         return tclresult
 
     #==============================================================================
+    @LoggedCommand
     def release(self, portAddress):
         """
         Description
@@ -691,14 +1069,15 @@ class AVA:
         Example
             av.release("10.50.70.82/1/1")
         """       
-        self.LogCommand()     
         tclcode = "av::release " + portAddress
 
+        self.InvalidateCache()
         result = self.Exec(tclcode)         
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def reserve(self, portAddress):
         """
         Description
@@ -722,70 +1101,135 @@ class AVA:
         Example
             av.reserve("10.50.70.82/2/1")
         """
-        self.LogCommand()
         tclcode = "av::reserve " + portAddress
 
+        self.InvalidateCache()
         porthandle = self.Exec(tclcode)         
-        logging.debug(" - Python result  - " + str(porthandle))
+        self.log.debug(" - Python result  - %s", porthandle)
         return porthandle
 
     #==============================================================================
+    @LoggedCommand
     def reserveAll(self, test, force=False, chassistype=""):
-        # Reserve all of the interfaces defined in the test.
-        # Do this by determining the existing interfaces, and then reserving them.
-        # The user only need set the "port" attribute for each interface object
-        # before calling this method.
-        #
-        # This method replaces the following native calls:
-        #   perform("SetInterfaceAttributes")
-        #   connect(<chassisip>)
-        #   perform("ReservePort") or reserve()
-        
-        
+        """
+        Description
+            Reserves all of the interfaces defined in the test.
+
+        Syntax
+            av.reserveAll(<test>, [force=False], [chassistype=""])
+
+        Comments
+            The user only need set the "port" attribute for each interface object
+            before calling this method. This method replaces the following native calls:
+                perform("SetInterfaceAttributes")
+                connect(<chassisip>)
+                perform("ReservePort") or reserve()
+            Each chassis is connected once, and all of the chassis are connected at the 
+            same time. The physical port information, which is needed for the 
+            "SetInterfaceAttributes" command, is read with a single query once all of
+            the chassis are connected, and the interfaces are then mapped and reserved
+            with a single Tcl command.
+            An interface that can not be mapped or reserved does not stop the others.
+            'force' reserves the ports even if they are reserved by another user.
+            'chassistype' is the type passed to av.connect.
+
+        Return Value
+            A report dictionary:
+                "interfaces": a list of dictionaries, one for each interface, with the keys
+                              "interface", "location" (the "port" attribute), "chassis", 
+                              "port" (the physical port handle) and "error" (None, or the 
+                              error that prevented the reservation).
+                "chassis":    a dictionary of {chassis address: error}. The error is None 
+                              if the chassis was connected.
+                "errors":     the number of interfaces that were not reserved.
+                "timings":    a dictionary of the time (in seconds) taken by each step:
+                              "discover", "connect", "index", "reserve" and "total".
+            Errors that prevent the whole reservation are raised as exceptions.
+
+        Example
+            report = av.reserveAll(test)
+            if report["errors"]:
+                ...
+        """
+        self.NotInPipeline("reserveAll")
+
+        report = self.ReservationReport()
+        timer = ReportTimer(report["timings"])
+
         # We need to find the information for the "SetInterfaceAttributes" command.
         # It is found in the physical port information when you connect to the hardware/virtual.
-        
-        for config in self.get(test, "configuration").split():
-            for topology in self.get(config, "topology").split():
-                for interface in self.get(topology, "interface").split():
-                    location = self.get(interface, "port")
-
-                    # We need to connect to the chassis to pull the physical port information.
-                    # We could do this more efficiently (only connect once per unquie chassis).                
-                    chassisip = self.get(interface, "adminIPAddress")
-                    self.connect(chassisip, type=chassistype)
-
-                    # Locate the physical port referenced by the "location".
-                    for chassis in self.get("system1.physicalchassismanager", "physicalchassis").split():
-                         for module in self.get(chassis, "physicaltestmodules").split():
-                            for port in self.get(module, "ports").split():
-                                if self.get(port, "location") == location:
-                                    # We found the port. Now map and reserve it.
-                                    physif = self.get(port, "physIf")
-                                    ids    = self.get(port, "locationDisplayString")
-                                    ils    = self.get(port, "locationString")
-
-                                    self.perform("SetInterfaceAttributes", interface, port=location, physIf=physif, interfaceDisplayString=ids, interfaceLocationString=ils)
-
-                                    if force:
-                                        self.perform("ReservePort", "system1", portaddress=location, force="force")
-                                    else:
-                                        self.perform("ReservePort", "system1", portaddress=location)
-        return
+        interfaces = self.ReservationInterfaces(self.Exec("::avapy::testInterfaces " + TclQuote(test)))
+        report["interfaces"] = interfaces
+        timer.Lap("discover")
+
+        # We need to connect to the chassis to pull the physical port information.
+        # Connect once per unique chassis, asynchronously, then wait for all of them.
+        chassislist = self.ReservationChassis(interfaces)
+        requestids = self.ExecMany([self.ConnectCommand(chassisip, chassistype, "false") for chassisip in chassislist])
+        waits = [(chassisip, requestid) for chassisip, requestid in zip(chassislist, requestids) if not isinstance(requestid, Exception)]
+        results = self.ExecMany(["av::waitUntilCommandIsDone " + str(requestid) for chassisip, requestid in waits])
+        self.InvalidateCache()
+
+        self.RecordConnections(report, chassislist, requestids, waits, results)
+        timer.Lap("connect")
+
+        # Locate the physical port referenced by the "location" of each interface.
+        index = self.PortIndex(self.Exec("::avapy::physicalPorts location physIf locationDisplayString locationString"))
+        timer.Lap("index")
+
+        # Map and reserve all of the ports.
+        commands, owners = self.ReservationCommands(report, index, force)
+        results = self.ExecMany(commands)
+
+        # This modifies the interfaces and ports.
+        self.InvalidateCache()
+
+        self.RecordReservations(report, owners, results)
+        timer.Lap("reserve")
+
+        timer.Total()
+        self.log.debug(" - Python result  - %s", report)
+        return report
 
     #==============================================================================
+    @LoggedCommand
     def releaseAll(self):
-        # Release all ports that are currently reserved by this process.
+        """
+        Description
+            Releases all of the ports that are currently reserved by this user.
 
-        for chassis in self.get("system1.physicalchassismanager", "physicalchassis").split():
-             for module in self.get(chassis, "physicaltestmodules").split():
-                for port in self.get(module, "ports").split():
-                    if self.get(port, "reservationState") == "Reserved by User":
+        Syntax
+            av.releaseAll()
 
-                        self.release(self.get(port, "location"))
-        return        
+        Comments
+            The reserved ports are found with a single query, and released with a 
+            single Tcl command.
+            A port that can not be released does not stop the others.
+
+        Return Value
+            A report dictionary:
+                "released": the list of the locations of the ports that were released.
+                "failed":   a dictionary of {location: error} for the ports that could 
+                            not be released. The failures are also logged.
+                "errors":   the number of ports that were not released.
+
+        Example
+            report = av.releaseAll()
+            if report["errors"]:
+                ...
+        """
+        self.NotInPipeline("releaseAll")
+
+        index = self.PortIndex(self.Exec("::avapy::physicalPorts location reservationState"))
+        locations = [location for location in index if index[location][1] == "Reserved by User"]
+
+        results = self.ExecMany(["av::release " + location for location in locations])
+        self.InvalidateCache()
+
+        return self.ReleasedPorts(locations, results)
 
     #==============================================================================
+    @LoggedCommand
     def setABLLogAutoCleanup(self, bEnabled):
         """
         Description
@@ -803,14 +1247,14 @@ class AVA:
         Example
             av.setABLLogAutoCleanup(1)
         """
-        self.LogCommand()
         tclcode = "av::setABLLogAutoCleanup " + str(bEnabled)
 
         result = self.Exec(tclcode)        
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def downloadABLlogs(self, path=""):
         """
         Description
@@ -828,17 +1272,17 @@ class AVA:
         Example
             av.downloadABLlogs()
         """
-        self.LogCommand()
         if path == "":
             path = os.path.abspath(os.getcwd())
 
         tclcode = "av::downloadABLlogs " + path
 
         result = self.Exec(tclcode)        
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def subscribe(self, side, viewAttributesList):
         """
         Description
@@ -866,14 +1310,17 @@ class AVA:
             av.subscribe("client", ["http,successfulConns", "http,attemptedConns"])
             av.subscribe("server", "http*")
         """      
-        self.LogCommand()
+        if isinstance(viewAttributesList, str):
+            viewAttributesList = [viewAttributesList]
+
         tclcode = "av::subscribe " + side + " [list " + " ".join(viewAttributesList) + "]"
 
         resultdataset = self.Exec(tclcode)         
-        logging.debug(" - Python result  - " + str(resultdataset))
+        self.log.debug(" - Python result  - %s", resultdataset)
         return resultdataset
 
     #==============================================================================
+    @LoggedCommand
     def unsubscribe(self, handle):
         """
         Description
@@ -893,14 +1340,100 @@ class AVA:
        Example
             av.unsubscribe(rdsHandle)
         """
-        self.LogCommand()
         tclcode = "av::unsubscribe " + handle
 
         result = self.Exec(tclcode)         
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
+
+    #==============================================================================
+    @LoggedCommand
+    def stream(self, side, viewAttributesList, interval=1.0, count=None):
+        """
+        Description
+            Subscribes to runtime statistics, and yields their values at a fixed interval.
+
+        Syntax
+            av.stream(<side>, <viewAttributesList>, [interval=<seconds>], [count=<samples>])
+
+        Comments
+            This is a generator. It calls av.subscribe, then reads all of the 
+            ResultDataObjects of the ResultDataSet with a single Tcl command every 
+            'interval' seconds. The first sample is read immediately.
+            The generator stops after 'count' samples (forever by default). 
+            av.unsubscribe is called when the generator is exhausted or closed 
+            (eg: when leaving a "for" loop with break, or with generator.close()).
+            If reading the statistics takes longer than the interval, the next sample 
+            is read immediately, and the interval restarts from there.
+            This function can not be used in an AVAPipeline.
+
+        Return Value
+            Yields a StatsRecord for each sample: a named tuple of (time, dataset, objects),
+            where 'time' is the time at which the sample was read (in seconds since
+            the epoch, from the Tcl interpreter), 'dataset' is the ResultDataSet handle,
+            and 'objects' is an ordered dictionary of {ResultDataObject: {attribute: value}}.
+            Numeric values are converted to numbers.
+
+        Example
+            for record in av.stream("client", ["http,successfulConns", "http,attemptedConns"], interval=1):
+                for rdo, values in record.objects.items():
+                    print(record.time, values["http,successfulConns"])
+        """
+        self.NotInPipeline("stream")
+
+        # The subscription is made when the first sample is requested, so that an
+        # unused generator does not leave a subscription behind.
+        dataset = self.subscribe(side, viewAttributesList)
+        try:
+            samples = 0
+            deadline = time.time()
+            while count is None or samples < count:
+                delay = deadline - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    deadline = time.time()
+
+                record = self.DataSetRecord(dataset, self.Exec(self.PollCommand(dataset)))
+                self.log.debug(" - Python result  - %s", record)
+
+                samples += 1
+                deadline += interval
+                yield record
+        finally:
+            self.CloseStream(dataset)
+
+    #==============================================================================
+    def PollCommand(self, dataset):
+        # Reads the attributes of all of the ResultDataObjects of the ResultDataSet
+        # in one command. See ::avapy::pollDataSet in Initialize.
+        return "::avapy::pollDataSet " + TclQuote(dataset)
+
+    #==============================================================================
+    def DataSetRecord(self, dataset, tclresult):
+        # Converts the {clock {rdo attributes ...}} result of ::avapy::pollDataSet
+        # into a StatsRecord.
+        clock, objects = (SplitTclList(str(tclresult)) + ["0", ""])[:2]
+
+        elements = SplitTclList(objects)
+
+        values = OrderedDict()
+        for index in range(0, len(elements) - 1, 2):
+            values[elements[index]] = self.List2Dict(elements[index + 1])
+
+        return StatsRecord(int(clock) / 1000.0, dataset, values)
+
+    #==============================================================================
+    def CloseStream(self, dataset):
+        # Removes the subscription of av.stream. This runs when the generator is
+        # closed, possibly by the garbage collector, so an error is only logged.
+        try:
+            self.unsubscribe(dataset)
+        except Exception as errmsg:
+            self.log.error("Unable to unsubscribe " + dataset + ": " + str(errmsg))
     
     #==============================================================================
+    @LoggedCommand
     def waitUntilCommandIsDone(self, requestId=""):
         """
         Description
@@ -925,21 +1458,18 @@ class AVA:
             CAUTION: "av.waitUntilCommandIsDone" will time out if the command it waits for does
             not complete in a certain time.        
         """
-        self.LogCommand()
         tclcode = "av::waitUntilCommandIsDone"
 
-
-        # NOTE: Not yet tested!
-
-
+        # The request id may be the number returned by an asynchronous command.
         if requestId != "":
-             tclcode += " " + requestId
+            tclcode += " " + str(requestId)
 
         tclresult = self.Exec(tclcode)         
-        logging.debug(" - Python result  - " + str(tclresult))
+        self.log.debug(" - Python result  - %s", tclresult)
         return tclresult
 
     #==============================================================================
+    @LoggedCommand
     def handleOf(self, parentHandle, relationName, objectName):
         """
         Description
@@ -963,13 +1493,13 @@ class AVA:
             av.handleOf("project1", "serverprofiles", "IPv6")
             av.handleOf("system1", "projects", "Project1")
         """
-        self.LogCommand()
         tclcode = "av::handleOf " + parentHandle + " " + relationName + " " + objectName
         objecthandle = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(objecthandle))
+        self.log.debug(" - Python result  - %s", objecthandle)
         return objecthandle
 
     #==============================================================================
+    @LoggedCommand
     def nodeExists(self, handle):
         """
         Description
@@ -989,15 +1519,15 @@ class AVA:
             av.nodeExists("project1")
             av.nodeExists(testHandle)
         """
-        self.LogCommand()
         tclcode = "av::nodeExists " + handle
         #tclresult = self.Exec(tclcode)
         #result = ast.literal_eval(tclresult)
         result = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def createProject(self, **kwargs):
         """
         Description
@@ -1016,17 +1546,18 @@ class AVA:
         Example
             av.createProject(project="Project1")
         """
-        self.LogCommand()
         tclcode = "av::createProject"
 
         for key in kwargs:
             tclcode = tclcode + " " + "-" + key + " " + str(kwargs[key])
 
+        self.InvalidateCache()
         objecthandle = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(objecthandle))
+        self.log.debug(" - Python result  - %s", objecthandle)
         return objecthandle
 
     #==============================================================================
+    @LoggedCommand
     def createTest(self, **kwargs):
         """
         Description
@@ -1046,18 +1577,19 @@ class AVA:
         Example
            av.createTest(project="project1", test="Test1", type="deviceComplex")
         """
-        self.LogCommand()
         tclcode = "av::createTest"
 
         for key in kwargs:
             tclcode = tclcode + " " + "-" + key + " " + str(kwargs[key])
 
+        self.InvalidateCache()
         objecthandle = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(objecthandle))
+        self.log.debug(" - Python result  - %s", objecthandle)
         return objecthandle
 
     
     #==============================================================================
+    @LoggedCommand
     def getOrCreateNode(self, parenthandle, relationname, arguments):
         """
         Description
@@ -1075,28 +1607,29 @@ class AVA:
             httpbody_handle=av.getOrCreateNode(projectHandle, "httpbodies", "Default")
             tests_handle=av.getOrCreateNode(testHandle, "configuration", "Test_0001")
         """
-        self.LogCommand()
         tclcode = "getOrCreateNode " + parenthandle + " " + relationname + " " + arguments
 
+        self.InvalidateCache(parenthandle)
         objecthandle = self.Exec(tclcode)
-        logging.debug(" - Python result  - " + str(objecthandle))
+        self.log.debug(" - Python result  - %s", objecthandle)
         return objecthandle
 
     #==============================================================================
+    @LoggedCommand
     def normalizePath(self, path):
-        self.LogCommand()
         result = os.path.abspath(path)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def waitEvent(self, command):   
-        self.LogCommand() 
         result = self.Exec("av::waitEvent " + command)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def DebugLogFile(self, status):
         """
         Description
@@ -1108,361 +1641,2896 @@ class AVA:
         Return Value
             None.
         """        
-        self.LogCommand()
         result = self.Exec("av::DebugLogFile " + status)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def StopStatusMsg(self, status):
-        self.LogCommand()
         result = self.Exec("av::StopStatusMsg " + status)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
     #==============================================================================
+    @LoggedCommand
     def AnalyzeABLEvents(self, event):       
-        self.LogCommand() 
         result = self.Exec("av::AnalyzeABLEvents " + event)
-        logging.debug(" - Python result  - " + str(result))
+        self.log.debug(" - Python result  - %s", result)
         return result
 
-    ###############################################################################
-    ####
-    ####    Private Methods
-    ####
-    ###############################################################################
-
-    # def Exec(self, command):
-    #     logging.debug(" - Tcl command - " + command)
-        
-    #     try:
-    #         result = self.tcl.eval(command)
+    #==============================================================================
+    def startEvents(self, interval=0.5, maxsize=10000):
+        """
+        Description
+            Starts a background thread that reads the Avalanche events, and calls the
+            registered callbacks.
 
-    #     except Exception as errmsg:
-    #         logging.error(errmsg)            
-    #         raise
-        
-    #     logging.debug(" - Tcl result  - " + result)
-    #     return result
+        Syntax
+            av.startEvents([interval=<seconds>], [maxsize=<events>])
 
-    def Exec(self, command):
-        logging.debug(" - Tcl command - " + command)
-
-        # This is a little odd.
-        # We are wrapping the Tcl code in a catch. This will allow us to detect exceptions.
-        # All output must be sent to STDOUT, which is why we are using the "puts" command.
-        # Lastly, the final newline "\n" is ESSENTIAL. Without it, the while loop will hang.
-        tcl_code = "if { [catch {puts [" + command + "]} errmsg] } { puts $errmsg; puts tcl_cmd_exception } else { puts tcl_cmd_success }\n"    
-        self.tcl.stdin.write(tcl_code)
-        
-        # NOTE: tcl.stdin.flush() does not seem to be needed. Consider if needed.
-        result = ""
-
-        stop = False
-        cmd_exception = False
-        while not stop:                
-            line = self.tcl.stdout.readline()            
-
-            if re.search("tcl_cmd_success", line):
-                stop = True
-            elif re.search("tcl_cmd_exception", line):
-                stop = True
-                cmd_exception = True
-            else:
-                result += line
+        Comments
+            The thread calls av.getEvents every 'interval' seconds (immediately again,
+            if events were returned), and queues the events. A second thread calls the
+            callbacks of each event, in order, so that a slow callback does not delay
+            the reading of the events.
+            At most 'maxsize' events are queued. If the callbacks fall behind, the
+            oldest events are dropped. The dropped events and the delays are counted
+            in pump.stats().
+            While the event pump is running, av.getEvents should not be called 
+            directly, as each call returns the events since the previous call.
+            Calling this function again returns the running EventPump.
 
-        result = result.strip()
+        Return Value
+            The EventPump object. See EventPump.on and EventPump.waitFor.
 
-        if cmd_exception:        
-            # An exception occurred during the execution of the Tcl command.
-            logging.error(result)           
-            raise Exception(result)
+        Example
+            pump = av.startEvents()
+            pump.on("test_state_changed", lambda event: print(event["message"]))
+            started = time.time()
+            av.apply(test)
+            pump.waitFor("test_completed", timeout=3600, since=started)
+        """
+        with self._eventlock:
+            if self.eventpump is None:
+                self.eventpump = EventPump(self, interval, maxsize)
 
-        logging.debug(" - Tcl result  - " + result)            
+            return self.eventpump
 
-        # Attempt to convert to a Python type, otherwise, leave it as a string.
-        try:
-            result = ast.literal_eval(result)
-        except:
-            pass
+    #==============================================================================
+    def stopEvents(self):
+        """
+        Description
+            Stops the event pump that was started by av.startEvents.
 
-        return result
+        Syntax
+            av.stopEvents()
 
+        Comments
+            The events that are already queued are still dispatched to the callbacks.
+            The futures of the asynchronous commands (see av.applyAsync) that are
+            still waiting for their events then fail.
 
-    #==============================================================================
-    def List2Dict(self, result):
-        # Converts a Tcl list (which is a string) into a Python dictionary.       
+        Return Value
+            None.
 
-        # This eval executes the Tcl procedure and returns the result.
-        #tclresult = self.tcl.eval("tclList2Dict " + result)
+        Example
+            av.stopEvents()
+        """
+        self.StopEventPump(wait=True)
 
-        # This command converts the Tcl string into a dict object.
-        #return ast.literal_eval(tclresult)
-        return self.Exec("tclList2Dict " + result)
+    #==============================================================================
+    def StopEventPump(self, wait):
+        # Stops the event pump. The operations that are tracked with its events are
+        # dropped, so that the next asynchronous command starts a new pump, and the
+        # futures that are still waiting for their events fail.
+        with self._eventlock:
+            eventpump = self.eventpump
+            operations = self.operations
+            self.eventpump = None
+            self.operations = None
+
+        # NOTE: The lock is not held while the callbacks finish, as they may
+        #       start asynchronous commands themselves.
+        if eventpump is not None:
+            eventpump.stop(wait)
+
+        if operations is not None:
+            operations.Stop("The event pump was stopped before the operation completed.")
 
     #==============================================================================
-    def convertEventString(self, tclstring):
-        # The goal is to create a Python list of dictionaries, where element of the list
-        # is a Avalanche Event dictionary with the keys "message", "additional" and "name".
-        # The "additional" key is also a dictionary.
-        eventlist = []
+    def applyAsync(self, testHandle, trial=0, continueIfAlreadyRunning=0, removeOldTest=0, rerun=0):
+        """
+        Description
+            Starts a specified test on the devices, and returns a future that is resolved 
+            once the test has started.
 
-        # First step is to break the Tcl list into a Python list (using Tcl).
-        tclcode = "set pythonlist {} \n \
-                   foreach event [list " + tclstring + "] {\n \
-                       append pythonlist \\\"$event\\\" , \n \
-                   } \n\
-                   puts $pythonlist"
-        #tclresult = self.tcl.eval(tclcode)
-        # This step is what converts the Tcl string to a list.
-        #listofstrings = ast.literal_eval(tclresult)
-        listofstrings = self.Exec(tclcode)
-
-        # Now convert each list element to a dictionary.
-        for event in listofstrings:   
-            # Construct a Python dictionary using Tcl.
-            # This is done because it is MUCH easier for Tcl to deal with Tcl lists.
-            tclcode =  "set pythondict \{;"
-            tclcode += "foreach element [list " + event + "] {"
-            tclcode += "    append pythondict \"\\\"[lindex $element 0]\\\": \\\"[lindex $element 1]\\\", \""
-            tclcode += "}; append pythondict \}; puts $pythondict"
-
-            #tclresult = self.tcl.eval(tclcode)
-            #eventdict = ast.literal_eval(tclresult)
-            eventdict = self.Exec(tclcode)
+        Syntax
+            av.applyAsync(<testHandle>, [trial], [continueIfAlreadyRunning], [removeOldTest], [rerun])
 
-            # The "addtional" field may contain an additional list of information.
-            # This is also converted into a dictionary.
-            if eventdict["additional"] != "":
-                tclcode  = "set pythondict \{;"
-                tclcode += "foreach element [list " + eventdict["additional"] + "] {"
-                tclcode += "    append pythondict \"\\\"[lindex $element 0]\\\": \\\"[lindex $element 1]\\\", \""
-                tclcode += "}; append pythondict \}; puts $pythondict"
+        Comments
+            This calls av.apply, and waits for its async_method_completed event with 
+            the event pump (see av.startEvents), which is started if needed.
+            av.apply_async is an alias of this function.
 
-                #tclresult = self.tcl.eval(tclcode)
-                #eventdict["additional"] = ast.literal_eval(tclresult)
-                eventdict["additional"] = self.Exec(tclcode)
+        Return Value
+            An OperationFuture. Its result is the async_method_completed event. Use
+            future.result(timeout) to wait for it, or WaitAll/AsCompleted for several
+            futures. Errors are raised as exceptions.
+            In an AVAPipeline, the pipeline future is itself resolved with the event.
 
-            eventlist.append(eventdict)
+        Example
+            futures = [av.applyAsync(test, trial=1) for test in tests]
+            WaitAll(futures, timeout=600)
+        """
+        return self.TrackOperation(lambda: self.apply(testHandle, trial, continueIfAlreadyRunning, removeOldTest, rerun),
+                                   "av::apply " + str(testHandle))
 
-        return eventlist  
+    apply_async = applyAsync
 
     #==============================================================================
-    def LogCommand(self):
+    def connectAsync(self, ipAddress, type=""):
         """
-        Log the calling function to the log, including its arguments.
+        Description
+            Connects to the specified device, and returns a future that is resolved once
+            the device is connected.
+
+        Syntax
+            av.connectAsync(<ipAddress>, [<type>="STC|Appliance"])
+
+        Comments
+            This calls av.connect in asynchronous mode (executesynchronous=false), and 
+            waits for its async_method_completed event with the event pump (see 
+            av.startEvents), which is started if needed. Several devices can be 
+            connected at the same time.
+            av.connect_async is an alias of this function.
+
+        Return Value
+            An OperationFuture. Its result is the async_method_completed event. Errors are
+            raised as exceptions.
+
+        Example
+            WaitAll([av.connectAsync(address) for address in addresses], timeout=300)
+        """
+        return self.TrackOperation(lambda: self.connect(ipAddress, type, "false"),
+                                   "av::connect " + str(ipAddress))
+
+    connect_async = connectAsync
+
+    #==============================================================================
+    def performAsync(self, command, objecthandle, **kwargs):
+        """
+        Description
+            Executes an asynchronous sub-command, and returns a future that is resolved 
+            once it completes.
+
+        Syntax
+            av.performAsync(<sub-command>, <handle>, [[<argument>], [...])
+
+        Comments
+            For the sub-commands of av.perform that return a request id, and send an
+            async_method_completed event when they complete. The event is waited for
+            with the event pump (see av.startEvents), which is started if needed.
+            av.perform_async is an alias of this function.
+
+        Return Value
+            An OperationFuture. Its result is the async_method_completed event. Errors are
+            raised as exceptions.
+
+        Example
+            future = av.performAsync("export", "system1", projectsTestsHandles="test1")
+            future.result(timeout=120)
+        """
+        return self.TrackOperation(lambda: self.perform(command, objecthandle, **kwargs),
+                                   "av::perform " + str(command))
+
+    perform_async = performAsync
+
+    #==============================================================================
+    def stats(self):
+        """
+        Description
+            Returns the performance counters of this AVA object.
+
+        Syntax
+            av.stats()
+
+        Comments
+            The latencies are measured from the time that a command is written to the
+            Tcl interpreter, until its response has been read, so they include the time
+            that the command is queued behind other commands. The percentiles are
+            computed over the latest 1000 commands of each verb.
+            The parse time is the time taken to decode and convert the responses.
+
+        Return Value
+            A dictionary with the keys:
+                "commands":      a dictionary of {verb: {"count", "total", "mean", "max", 
+                                 "p50", "p95", "p99"}}, in seconds. The verb is the Tcl 
+                                 command (eg: av::get), or the av::perform command 
+                                 (eg: "av::perform ReservePort").
+                "bytes_written": the number of bytes written to the Tcl interpreter.
+                "bytes_read":    the number of bytes of the responses.
+                "parse_time":    the total time (in seconds) taken to parse the responses.
+                "parse_count":   the number of responses parsed.
+                "cache":         the av.get cache counters (see AttributeCache), if the 
+                                 cache is enabled.
+
+        Example
+            for verb, latency in av.stats()["commands"].items():
+                print(verb, latency["count"], latency["p95"])
+        """
+        result = self.metrics.stats()
+        if self.cache is not None:
+            result["cache"] = self.cache.stats()
+
+        return result
+
+    #==============================================================================
+    def writeMetrics(self, path):
+        """
+        Description
+            Writes the performance counters (see av.stats) to a file, in the Prometheus
+            text exposition format.
+
+        Syntax
+            av.writeMetrics(<path>)
+
+        Comments
+            The file is replaced atomically, so that it can be scraped at any time (eg: 
+            by the textfile collector of the Prometheus node exporter).
+
+        Return Value
+            None.
+
+        Example
+            av.writeMetrics("/var/lib/node_exporter/avalanche.prom")
+        """
+        # The temporary file has a unique name, so that several processes (or AVA
+        # objects) can write to the same path.
+        descriptor, temppath = tempfile.mkstemp(prefix=".metrics-", dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(descriptor, "w") as metricsfile:
+                metricsfile.write(self.metrics.Prometheus())
+            os.chmod(temppath, 0o644)
+            ReplaceFile(temppath, path)
+        except:
+            os.remove(temppath)
+            raise
+
+        return
+
+    #==============================================================================
+    def serveMetrics(self, port=0, host="127.0.0.1"):
+        """
+        Description
+            Serves the performance counters (see av.stats) over HTTP, in the Prometheus 
+            text exposition format.
+
+        Syntax
+            av.serveMetrics([port=0], [host="127.0.0.1"])
+
+        Comments
+            The server runs in a background thread. A port of 0 picks a free port.
+            Call shutdown() on the returned server to stop it.
+
+        Return Value
+            The HTTP server. Its port is server.server_address[1].
+
+        Example
+            server = av.serveMetrics(9101)
+            ...
+            server.shutdown()
+        """
+        return ServeMetrics(self.metrics, port, host)
+
+    #==============================================================================
+    def addHook(self, hook):
+        """
+        Description
+            Adds an object that is called around each command.
+
+        Syntax
+            av.addHook(<hook>)
+
+        Comments
+            The hook is an ExecHooks object (or any object with the same methods):
+                before_exec(command)                  Before a Tcl command is sent.
+                after_exec(command, result, duration) After a Tcl command succeeded.
+                on_error(command, error, duration)    After a Tcl command failed.
+                on_response(command, status, result, duration)
+                                                      Before the response is converted. The
+                                                      status is 1 for a Tcl error, and the
+                                                      result is the Tcl result (a string).
+                before_call(method, args, kwargs)     Before a public AVA method is run.
+                after_call(method, duration)          After a public AVA method returned.
+            The durations are in seconds. The hooks are called in the thread that 
+            issues the command.
+            SpanRecorder is a hook that records a timeline of the commands, which can 
+            be viewed in a trace viewer.
+
+        Return Value
+            The hook.
+
+        Example
+            recorder = av.addHook(SpanRecorder())
+            ...
+            recorder.write("setup.trace.json")
+        """
+        self.hooks = self.hooks + [hook]
+        return hook
+
+    #==============================================================================
+    def removeHook(self, hook):
+        """
+        Description
+            Removes a hook that was added with av.addHook.
+
+        Syntax
+            av.removeHook(<hook>)
+
+        Return Value
+            None.
+        """
+        self.hooks = [item for item in self.hooks if item is not hook]
+        return
+
+    #==============================================================================
+    def pipeline(self, raise_on_error=True):
+        """
+        Description
+            Returns a new command pipeline for this session.
+
+        Syntax
+            av.pipeline([raise_on_error=True|False])
+
+        Comments
+            Any public method called through the pipeline object is queued instead
+            of being sent to the Tcl interpreter, and returns a future for its result.
+            The queued commands are written to the interpreter in a single write
+            when execute() is called (or when the result of one of the futures is
+            requested). The responses are read back in order.
+            Methods whose results drive further commands (reserveAll, releaseAll
+            and stream) cannot be queued, and raise an exception if they are
+            called through the pipeline.
+
+        Return Value
+            An AVAPipeline object. Its execute() method returns the list of Tcl
+            results, one per queued command. If raise_on_error is set, the first
+            Tcl error is raised after all of the commands have been read back,
+            otherwise the exception is placed in the list.
+
+        Example
+            pipe = av.pipeline()
+            for index in range(2000):
+                pipe.create("userprofile", under=project, name="UP" + str(index))
+            handles = pipe.execute()
+        """
+        return AVAPipeline(self, raise_on_error=raise_on_error)
+
+    #==============================================================================
+    @contextmanager
+    def batch(self, raise_on_error=True):
+        """
+        Description
+            Queues every command executed inside the "with" block and sends them
+            to the Tcl interpreter in a single write when the block exits.
+
+        Syntax
+            with av.batch([raise_on_error=True|False]) as pipe:
+
+        Comments
+            While the block is active, the public methods return futures instead
+            of their results. The futures are resolved when the block exits. If
+            the block raises an exception, the queued commands are discarded and
+            their futures are cancelled.
+
+        Return Value
+            The AVAPipeline object. See av.pipeline().
+
+        Example
+            with av.batch() as pipe:
+                up = av.create("userprofile", under=project, name="UP1")
+                av.config(project + ".userprofile(1)", dnsRetries=10)
+            print(up.result())
+        """
+        pipeline = self.pipeline(raise_on_error=raise_on_error)
+
+        previous = self._pipeline
+        self._pipeline = pipeline
+        try:
+            yield pipeline
+        except:
+            self._pipeline = previous
+            pipeline.Discard()
+            raise
+
+        self._pipeline = previous
+        pipeline.execute()
+
+    ###############################################################################
+    ####
+    ####    Private Methods
+    ####
+    ###############################################################################
+
+    # def Exec(self, command):
+    #     logging.debug(" - Tcl command - " + command)
+        
+    #     try:
+    #         result = self.tcl.eval(command)
+
+    #     except Exception as errmsg:
+    #         logging.error(errmsg)            
+    #         raise
+        
+    #     logging.debug(" - Tcl result  - " + result)
+    #     return result
+
+    def Exec(self, command):
+        if self._pipeline is not None:
+            # We are batching. The command is sent when the pipeline is executed.
+            return self._pipeline.Queue(command)
+
+        response = self.Submit([command])[0]
+        return self.DecodeResult(*response.result())
+
+    #==============================================================================
+    def ExecMany(self, commands):
+        # Executes a list of Tcl commands with a single round trip, and returns a 
+        # BulkResult with the result (or the exception) of each command.
+        if not commands:
+            return self.Resolved(BulkResult())
+
+        tclcode = "::avapy::evalMany " + TclQuote(TclList(commands))
+
+        def Decode(tclresult):
+            result = BulkResult(self.ConvertItem(item) for item in SplitTclList(str(tclresult)))
+            self.log.debug(" - Python result  - %s", result)
+            return result
+
+        return self.Then(self.Exec(tclcode), Decode)
+
+    #==============================================================================
+    def Submit(self, commands):
+        # Sends the commands to the Tcl interpreter in a single write, and returns a
+        # list of futures for the raw (status, result, requestid, duration) responses.
+        # The futures are resolved by the reader thread, so any number of threads may
+        # have commands in flight at the same time.
+
+        # The commands are not announced to the hooks if the interpreter is gone.
+        if self._error is not None:
+            raise Exception(self._error)
+
+        # The hooks run before the commands are registered, and without the lock,
+        # so a slow hook does not hold up the reader thread or the other callers.
+        for command in commands:
+            for hook in self.hooks:
+                hook.before_exec(command)
+
+        try:
+            return self.SendCommands(commands)
+        except Exception as errmsg:
+            # Each before_exec is matched by an on_error, if the commands could not be sent.
+            for command in commands:
+                for hook in self.hooks:
+                    hook.on_error(command, errmsg, 0.0)
+            raise
+
+    #==============================================================================
+    def SendCommands(self, commands):
+        # Registers the commands and writes them to the Tcl interpreter. See Submit.
+        futures = []
+        tclcode = []
+        requestids = []
+
+        with self._pendinglock:
+            if self._error is not None:
+                raise Exception(self._error)
+
+            started = time.time()
+            for command in commands:
+                self._requestid += 1
+
+                future = Future()
+                self._pending[self._requestid] = (future, started, command)
+                futures.append(future)
+                requestids.append(self._requestid)
+
+                self.log.debug(" - Tcl command - %s", command, extra={"commandid": self._requestid})
+                tclcode.append(self.EncodeCommand(self._requestid, command))
+
+        tclcode = b"".join(tclcode)
+        self.metrics.Written(len(tclcode))
+
+        # NOTE: The reader thread also needs the pending lock, so the write must
+        #       not hold it. The Tcl interpreter could otherwise block on a full
+        #       stdout pipe, while we are blocked on a full stdin pipe.
+        try:
+            with self._writelock:
+                self.tcl.stdin.write(tclcode)
+                self.tcl.stdin.flush()
+        except:
+            # The pipe is broken, so no response will come. Submit fails the commands.
+            with self._pendinglock:
+                for requestid in requestids:
+                    self._pending.pop(requestid, None)
+            raise
+
+        return futures
+
+    #==============================================================================
+    def EncodeCommand(self, requestid, command):
+        # Each command is sent to the Tcl server loop (see SERVER_TCL) as a header
+        # line "<requestid> <length>", followed by the UTF-8 encoded command.
+        command = command.encode("utf-8")
+        return (str(requestid) + " " + str(len(command)) + "\n").encode("ascii") + command
+
+    #==============================================================================
+    def ReadLoop(self):
+        # The body of the reader thread. Hands each response to the future that
+        # is waiting for it.
+        try:
+            while True:
+                requestid, status, result = self.ReadResponse()
+
+                with self._pendinglock:
+                    future, started, command = self._pending.pop(requestid)
+
+                duration = time.time() - started
+                self.metrics.Command(CommandVerb(command), duration, len(result))
+
+                future.set_result((status, result, requestid, duration, command))
+
+                if requestid == self._detachid:
+                    return
+
+        except Exception as errmsg:
+            if self._closing:
+                errmsg = "The Tcl interpreter has been closed."
+            else:
+                self.log.error(errmsg)
+
+            # Fail everything that is still waiting for a response.
+            with self._pendinglock:
+                self._error = str(errmsg)
+                pending = self._pending
+                self._pending = {}
+
+            for future, started, command in pending.values():
+                error = Exception(self._error)
+                for hook in self.hooks:
+                    hook.on_error(command, error, time.time() - started)
+                future.set_exception(error)
+
+        return
+
+    #==============================================================================
+    def ReadResponse(self):
+        # Reads the next response from the Tcl interpreter.
+        # The response is a header line "<FRAME_MARKER><requestid> <status> <length>",
+        # followed by exactly <length> bytes of UTF-8 encoded result.
+        while True:
+            line = self.tcl.stdout.readline()
+
+            if not line:
+                raise Exception("The Tcl interpreter exited unexpectedly. " + self.tcl.stderr.read().decode("utf-8", "replace"))
+
+            index = line.find(FRAME_MARKER)
+            if index != -1:
+                break
+
+            # Anything that the command wrote to stdout itself is not part of the result.
+            self.log.debug(" - Tcl output - %s", line.decode("utf-8", "replace").rstrip())
+
+        requestid, status, length = line[index + len(FRAME_MARKER):].split()
+        length = int(length)
+
+        result = self.tcl.stdout.read(length)
+        if len(result) != length:
+            raise Exception("The Tcl interpreter exited unexpectedly. " + self.tcl.stderr.read().decode("utf-8", "replace"))
+
+        return int(requestid), status, result
+
+    #==============================================================================
+    def DecodeResult(self, status, result, requestid=None, duration=None, command=None):
+        # Converts the status and the raw bytes of a response into a Python result.
+        started = time.time()
+        try:
+            result = self.ConvertResponse(status, result, requestid, duration, command)
+        except Exception as errmsg:
+            self.metrics.Parsed(time.time() - started)
+            for hook in self.hooks:
+                hook.on_error(command, errmsg, duration)
+            raise
+
+        self.metrics.Parsed(time.time() - started)
+        for hook in self.hooks:
+            hook.after_exec(command, result, duration)
+
+        return result
+
+    #==============================================================================
+    def ConvertResponse(self, status, result, requestid, duration, command):
+        result = result.decode("utf-8").strip()
+
+        for hook in self.hooks:
+            hook.on_response(command, int(status), result, duration)
+        extra = {"commandid": requestid, "duration": duration}
+
+        if status == b"1":
+            # An exception occurred during the execution of the Tcl command.
+            self.log.error(result, extra=extra)
+            raise Exception(result)
+
+        self.log.debug(" - Tcl result  - %s", result, extra=extra)
+
+        return self.ConvertResult(result)
+
+    #==============================================================================
+    def ConvertResult(self, result):
+        # Attempt to convert to a Python type, otherwise, leave it as a string.
+        # Most results (handles, names, lists of handles) can not be a Python 
+        # literal, and are not worth handing to the parser.
+        if result.lstrip(" \t")[:1] in LITERAL_START or result in ("True", "False", "None"):
+            try:
+                result = ast.literal_eval(result)
+            except:
+                pass
+
+        return result
+
+    #==============================================================================
+    @property
+    def _pipeline(self):
+        return getattr(self._local, "pipeline", None)
+
+    @_pipeline.setter
+    def _pipeline(self, pipeline):
+        self._local.pipeline = pipeline
+
+    #==============================================================================
+    def PerformCommand(self, command, objecthandle, arguments):
+        # Returns the av::perform command for av.perform.
+        tclcode = "av::perform " + command + " " + objecthandle
+
+        if command == "SetInterfaceAttributes":
+            # WARNING: This AVA API command IGNORES the argument names, and instead makes the arguments position dependent.
+            # av::perform SetInterfaceAttributes $tests_handle.topology.interface(1) -port 10.140.99.40/1/1 -physIf 0 -interfaceDisplayString 0,0 -interfaceLocationString 0,0
+
+            port           = arguments["port"] 
+            physIf         = arguments["physIf"]
+            display        = arguments["interfaceDisplayString"]
+            locationstring = arguments["interfaceLocationString"]
+
+            tclcode += " -ignored1 " + str(port) + " -ignored2 " + str(physIf) + " -ignored3 " + str(display) + " -ignored4 " + str(locationstring)
+
+        elif command == "Export":
+            # For this command, the arguments MUST be in a specific order (don't ask me why).
+            test = arguments["projectstestshandles"] 
+
+            tclcode += " -projectstestshandles " + str(test)
+
+            if "options" in arguments:
+                tclcode += ' -options "' + str(arguments["options"]) + '"'
+
+            if "newpath" in arguments:
+                newpath = arguments["newpath"]
+                tclcode += ' -newpath "' + str(arguments["newpath"]) + '"'            
+
+        else:
+            for key in arguments:
+                tclcode = tclcode + " " + "-" + str(key) + ' "' + str(arguments[key]) + '"'
+
+        return tclcode
+
+    #==============================================================================
+    def ConnectCommand(self, ipAddress, type="", executesynchronous=""):
+        # Returns the av::connect command for av.connect.
+        tclcode = "av::connect " + ipAddress
+
+        if type != "":
+            tclcode += " -type " + type
+
+        if executesynchronous != "":
+            tclcode += " -executesynchronous " + executesynchronous
+
+        return tclcode
+
+    #==============================================================================
+    def NotInPipeline(self, method):
+        # Raises an exception if a method that needs the results of its own commands
+        # is called through an AVAPipeline, where those results are only futures.
+        if self._pipeline is not None:
+            raise Exception("av." + method + " can not be used in an AVAPipeline.")
+
+    #==============================================================================
+    def ReservationReport(self):
+        # Returns an empty report for av.reserveAll.
+        return {"interfaces": [], "chassis": OrderedDict(), "errors": 0, "timings": OrderedDict()}
+
+    #==============================================================================
+    def ReservationInterfaces(self, tclresult):
+        # Converts the result of ::avapy::testInterfaces into the "interfaces" of a
+        # reservation report.
+        interfaces = []
+        for element in SplitTclList(str(tclresult)):
+            interface, location, chassisip = (SplitTclList(element) + ["", "", ""])[:3]
+            interfaces.append({"interface": interface, "location": location, "chassis": chassisip,
+                               "port": None, "error": None})
+
+        return interfaces
+
+    #==============================================================================
+    def ReservationChassis(self, interfaces):
+        # Returns the unique chassis addresses of the interfaces, in order.
+        chassislist = []
+        for interface in interfaces:
+            if interface["chassis"] and interface["chassis"] not in chassislist:
+                chassislist.append(interface["chassis"])
+
+        return chassislist
+
+    #==============================================================================
+    def RecordConnections(self, report, chassislist, requestids, waits, results):
+        # Records the result of connecting to each chassis in a reservation report.
+        for chassisip, requestid in zip(chassislist, requestids):
+            report["chassis"][chassisip] = requestid if isinstance(requestid, Exception) else None
+
+        for (chassisip, requestid), result in zip(waits, results):
+            if isinstance(result, Exception):
+                report["chassis"][chassisip] = result
+
+    #==============================================================================
+    def PortIndex(self, tclresult):
+        # Converts the result of ::avapy::physicalPorts (with the location as the first
+        # attribute) into a dictionary of {location: [port, attribute, ...]}.
+        index = {}
+        for element in SplitTclList(str(tclresult)):
+            values = SplitTclList(element)
+            index[values[1]] = [values[0]] + values[2:]
+
+        return index
+
+    #==============================================================================
+    def ReservationCommands(self, report, index, force):
+        # Returns the SetInterfaceAttributes and ReservePort commands for the interfaces 
+        # of a reservation report (one script for each interface), and the interface
+        # that each command belongs to.
+        # The interfaces that can not be mapped are marked in the report.
+        commands = []
+        owners = []
+
+        for interface in report["interfaces"]:
+            if report["chassis"].get(interface["chassis"]) is not None:
+                interface["error"] = report["chassis"][interface["chassis"]]
+                continue
+
+            if interface["location"] not in index:
+                interface["error"] = Exception("No physical port found at location " + interface["location"] + ".")
+                continue
+
+            # We found the port. Now map and reserve it.
+            location = interface["location"]
+            port, physif, ids, ils = index[location]
+            interface["port"] = port
+
+            mapping = self.PerformCommand("SetInterfaceAttributes", interface["interface"], {"port": location, "physIf": physif, "interfaceDisplayString": ids, "interfaceLocationString": ils})
+
+            if force:
+                reservation = self.PerformCommand("ReservePort", "system1", {"portaddress": location, "force": "force"})
+            else:
+                reservation = self.PerformCommand("ReservePort", "system1", {"portaddress": location})
+
+            # Both commands run as one script, so the port is not reserved if the
+            # interface could not be mapped.
+            commands.append(mapping + "\n" + reservation)
+            owners.append(interface)
+
+        return commands, owners
+
+    #==============================================================================
+    def RecordReservations(self, report, owners, results):
+        # Records the results of the reservation commands in a reservation report.
+        for interface, result in zip(owners, results):
+            if isinstance(result, Exception) and interface["error"] is None:
+                interface["error"] = result
+
+        report["errors"] = len([interface for interface in report["interfaces"] if interface["error"] is not None])
+
+    #==============================================================================
+    def ReleasedPorts(self, locations, results):
+        # Returns the report of av.releaseAll. The ports that could not be released
+        # are logged.
+        report = {"released": [], "failed": OrderedDict(), "errors": 0}
+
+        for location, result in zip(locations, results):
+            if isinstance(result, Exception):
+                self.log.error("Unable to release " + location + ": " + str(result))
+                report["failed"][location] = result
+            else:
+                report["released"].append(location)
+
+        report["errors"] = len(report["failed"])
+        self.log.debug(" - Python result  - %s", report)
+        return report
+
+    #==============================================================================
+    def ConfigCommand(self, objecthandle, attributes):
+        # Returns the av::config command for av.config and av.configMany.
+        tclcode = 'av::config ' + objecthandle + ' '
+
+        for key in attributes:
+            #tclcode = tclcode + ' ' + '-' + key + ' "' + str(attributes[key]) + '"'
+            reg = re.compile("\[")
+            if reg.match(str(attributes[key])):
+                # This is a Tcl command (eg: [NULL]).
+                tclcode = tclcode + ' ' + '-' + key + " " + str(attributes[key])
+            else:
+                tclcode = tclcode + ' ' + '-' + key + ' {' + str(attributes[key]) + '}'
+
+        return tclcode
+
+    #==============================================================================
+    def CreateCommand(self, objecttype, under, attributes):
+        # Returns the av::create command for av.create and av.createMany.
+        tclcode = "av::create " + objecttype + " -under " + under
+
+        for key in attributes:
+            tclcode = tclcode + " " + "-" + key + " " + str(attributes[key])
+
+        return tclcode
+
+    #==============================================================================
+    def InvalidateConfig(self, objecthandle, attributes):
+        # Drops the cached attributes that an av::config command modifies.
+        if "." in objecthandle or [key for key in attributes if "." in key]:
+            # A DDN or DAN path modifies a descendant, whose handle we do not know.
+            self.InvalidateCache()
+        else:
+            self.InvalidateCache(objecthandle)
+
+    #==============================================================================
+    def TrackOperation(self, command, description):
+        # Runs an asynchronous command, and returns the OperationFuture that is 
+        # resolved by its async_method_completed event. 'command' is called to 
+        # send the command, and returns its request id (or a pipeline future).
+        # NOTE: The tracker must be listening to the events before the command is
+        #       sent, or a quick completion event could be dispatched before it.
+        with self._eventlock:
+            if self.operations is None:
+                self.operations = OperationTracker(self.log)
+                self.startEvents().on("async_method_completed", self.operations.Completed)
+
+            operations = self.operations
+            eventpump = self.eventpump
+
+        future = self.Then(command(), lambda requestid: operations.Track(str(requestid).strip(), description))
+
+        # Commands that complete quickly need not wait for the next poll.
+        eventpump.poll()
+        return future
+
+    #==============================================================================
+    def Resolved(self, result):
+        # Returns the result as it would be returned by Exec: as a future that is
+        # already resolved, if a pipeline is active.
+        if self._pipeline is None:
+            return result
+
+        future = PipelineFuture(self._pipeline)
+        future.set_result(result)
+        return future
+
+    #==============================================================================
+    def InvalidateCache(self, handle=None):
+        # Drops the cached attributes that a command on the handle may modify.
+        # Without a handle, the whole cache is dropped.
+        if self.cache is None:
+            return
+
+        if handle is None:
+            self.cache.clear()
+        else:
+            self.cache.Invalidate(handle)
+
+    #==============================================================================
+    def Then(self, result, function):
+        # Applies the function to the result of an Exec. If the command has been
+        # queued in a pipeline, the function is applied once the result is read.
+        if isinstance(result, PipelineFuture):
+            return result.Then(function)
+
+        return function(result)
+
+    #==============================================================================
+    def ConvertItem(self, item, convert=None):
+        # Converts one {status result} item of a bulk command (see the ::avapy 
+        # helpers in Initialize) into a Python result. Errors are returned as an
+        # Exception, instead of being raised, so that one error does not hide the
+        # other results.
+        status, result = (SplitTclList(item) + ["", ""])[:2]
+
+        if status != "0":
+            self.log.error(result)
+            return Exception(result)
+
+        if convert is None:
+            convert = self.ConvertResult
+
+        return convert(result)
+
+    #==============================================================================
+    def List2Dict(self, result):
+        # Converts a Tcl list (which is a string) of "-attribute value" pairs into a 
+        # Python dictionary. Numeric values are converted to numbers.
+        elements = SplitTclList(str(result))
+
+        result = {}
+        for index in range(0, len(elements) - 1, 2):
+            key = elements[index]
+            if key.startswith("-"):
+                key = key[1:]
+
+            result[key] = ConvertTclValue(elements[index + 1])
+
+        return result
+
+    #==============================================================================
+    def convertEventString(self, tclstring):
+        # The goal is to create a Python list of dictionaries, where element of the list
+        # is a Avalanche Event dictionary with the keys "message", "additional" and "name".
+        # The "additional" key is also a dictionary.
+        # Each event is a Tcl list of {key value} pairs, and so is the "additional" field.
+        eventlist = []
+
+        for event in SplitTclList(tclstring):
+            eventdict = self.Pairs2Dict(event)
+
+            # The "addtional" field may contain an additional list of information.
+            # This is also converted into a dictionary.
+            if eventdict.get("additional", "") != "":
+                eventdict["additional"] = self.Pairs2Dict(eventdict["additional"])
+
+            eventlist.append(eventdict)
+
+        return eventlist  
+
+    #==============================================================================
+    def Pairs2Dict(self, tclstring):
+        # Converts a Tcl list of {key value} pairs into a Python dictionary.
+        result = {}
+        for element in SplitTclList(tclstring):
+            pair = SplitTclList(element) + ["", ""]
+            result[pair[0]] = pair[1]
+
+        return result
+
+    #==============================================================================
+    def CleanupTcl(self):
+        """Attempt to clean up the Tcl subprocess.        
         """        
-        # Retrieve the args for the command.
-        posname, kwname, args = inspect.getargvalues(inspect.stack()[1][0])[-3:]
-        posargs = args.pop(posname, [])
-        args.update(args.pop(kwname, []))
+        self._closing = True
+
+        self.StopEventPump(wait=False)
+
+        self.tcl.stdin.close()
+        self.tcl.terminate()
+        self.tcl.wait(timeout=0.5)                
+
+        self.StopLogging()
+        return        
+
+    #==============================================================================
+    def Detach(self):
+        # Stops the reader thread, so that the Tcl interpreter can be handed over to
+        # another process (see avalanche_daemon.py). The object must be idle. It can
+        # not be used afterwards.
+        with self._pendinglock:
+            self._detachid = self._requestid + 1
+
+        self.DecodeResult(*self.Submit(["list"])[0].result())
+        self._reader.join()
+
+        with self._pendinglock:
+            self._error = "The Tcl interpreter has been handed over to another process."
+
+        return self.tcl
+
+    #==============================================================================
+    def StopLogging(self):
+        # Writes out the queued log records and closes the log file.
+        if self._loglistener is not None:
+            self._loglistener.stop()
+            self._loglistener = None
+
+        for handler in list(self.log.handlers):
+            self.log.removeHandler(handler)
+
+        self._loghandler.close()
+        ReleaseLogFile(self.logfile)
+        return
+
+    #==============================================================================
+    def __init__(self, apipath=None, tclinterpreter=None, tcllibpath=None, logpath=None, loglevel="DEBUG",
+                 cachesize=0, cachettl=None, logformat="text", logresultsize=None, connect=None, lazyload=False):
+        """
+        Load the Avalanche API and initialize the Python environment.
+
+        'apipath' optionally specifies the location of the Avalanche API installation.
+        'tclinterpreter' optionally specifies the Tclsh interpreter to use.
+        'tcllibpath' optionally specifies the path to additional Tcl libraries. The default Tcl libraries 
+                     and the __file__/lib directory are also used, but are overridden by the packages found 
+                     on this path.
+        'logpath' optionally specifies the location where the logs are to be stored.
+        'logformat' optionally specifies the format of the log file: "text" (the default), or "json"
+                    for one JSON object per line, with the timestamp, the level, the message and, for
+                    the Tcl commands, the command id and the duration in seconds.
+        'logresultsize' optionally limits each log message to this many characters. Large results
+                    are truncated in the log.
+        'cachesize' optionally enables a cache of up to this many av.get results. See AttributeCache.
+        'cachettl' optionally specifies how many seconds a cached av.get result remains valid.
+        'connect' optionally specifies the address of an interpreter daemon (see avalanche_daemon.py),
+                  eg: "unix:///tmp/avalanche.sock". An interpreter that has already loaded the API
+                  is then taken from the daemon, instead of starting one. The 'apipath', 
+                  'tclinterpreter' and 'tcllibpath' of the daemon are used.
+        'lazyload' optionally defers loading the Avalanche API (package require av) until the
+                   first command that needs it, so that the object is ready sooner.
+
+        Returns None.
+        """
+
+        atexit.register(self.CleanupTcl)
+
+        self.SetupState(cachesize, cachettl, lazyload)
+
+        if connect:
+            self.tcl = AttachedInterpreter(connect)
+            self.tcl_path = self.tcl.info["tclinterpreter"]
+            apipath = self.tcl.info["apipath"]
+
+        self.SetupLogging(apipath, logpath, loglevel, logformat, logresultsize)
+
+        if connect:
+
+            self.log.info("-------------------------------------------------------------")
+            self.log.info("Tcl interpreter  = " + self.tcl_path + " (PID " + str(self.tcl.pid) + ", from " + connect + ")")
+
+            self._reader = threading.Thread(target=self.ReadLoop, name="AVA reader")
+            self._reader.daemon = True
+            self._reader.start()
+
+            return
+
+        # # Instantiate the Tcl interpreter.
+        # #self.tcl = Tcl()
+        # shell_path = r"tclsh"
+        # self.tcl = Popen(shell_path, stdin=PIPE, stdout=PIPE, stderr=PIPE, universal_newlines = True, bufsize = 0)
+
+        # Instantiate the Tcl interpreter.
+        if tclinterpreter:
+            self.tcl_path = tclinterpreter.encode('unicode-escape').decode()            
+        else:
+            self.tcl_path = "tclsh"
+
+        self.log.info("-------------------------------------------------------------")
+        self.log.info("Tcl interpreter  = " + self.tcl_path)          
+
+        self.tcl = Popen(self.tcl_path, stdin=PIPE, stdout=PIPE, stderr=PIPE)
+
+        # Start the server loop. Every Exec after this point uses the framed protocol.
+        self.tcl.stdin.write(SERVER_TCL.encode("utf-8"))
+        self.tcl.stdin.flush()
+
+        self._reader = threading.Thread(target=self.ReadLoop, name="AVA reader")
+        self._reader.daemon = True
+        self._reader.start()
+
+        self.Initialize(apipath, tcllibpath)
+
+        return
+
+    #==============================================================================
+    def SetupState(self, cachesize=0, cachettl=None, lazyload=False):
+        """
+        Initialize the state of the object that does not depend on the Tcl interpreter.
+        The classes that answer the commands without an interpreter (eg: ReplayAVA) 
+        call this instead of AVA.__init__.
+        """
+        # The latency and throughput counters. See av.stats().
+        self.metrics = CommandMetrics()
+
+        # The ExecHooks that are called around each command. See av.addHook().
+        self.hooks = []
+
+        # The background reader of the events. See av.startEvents().
+        self.eventpump = None
+
+        # The futures of the asynchronous commands. See av.applyAsync().
+        self.operations = None
+
+        # Guards the creation of the event pump and of the operation tracker.
+        self._eventlock = threading.RLock()
+
+        # The av.get results cache. The hit/miss counters are in av.cache.stats().
+        self.cache = None
+        if cachesize:
+            self.cache = AttributeCache(cachesize, cachettl)
+
+        # The active AVAPipeline, if commands are currently being batched.
+        # Each thread has its own.
+        self._local = threading.local()
+        self._pipeline = None
+
+        # The commands that have been sent, but not answered yet, by request id.
+        self._pending = {}
+        self._pendinglock = threading.Lock()
+        self._writelock = threading.Lock()
+        self._requestid = 0
+
+        # Set by the reader thread if the Tcl interpreter goes away.
+        self._error = None
+        self._closing = False
+
+        # The request id of the last response to read. See Detach().
+        self._detachid = None
+
+        self.lazyload = lazyload
+
+        return
+
+    #==============================================================================
+    def SetupLogging(self, apipath, logpath, loglevel, logformat="text", logresultsize=None):
+        """
+        Configure the log file and write the startup information to it.
+        """
+        self.apipath = apipath
+
+        # Construct the log path.            
+        if logpath:
+            self.logpath = logpath
+        else:
+            defaultlogpath = "~/Spirent/Avalanche/Logs/"
+
+            now = datetime.datetime.now()
+            defaultlogpath += now.strftime("%Y-%m-%d-%H-%M-%S")
+            defaultlogpath += "_PID"
+            defaultlogpath += str(os.getpid())
+            defaultlogpath = os.path.expanduser(defaultlogpath)
+            
+            # The environment variable overwrites the default path.    
+            self.logpath = os.getenv("AVA_LOG_OUTPUT_DIRECTORY", defaultlogpath)        
+
+        self.logpath = os.path.abspath(self.logpath)
+        self.logfile = os.path.join(self.logpath, "avalanche_python.log")        
+
+        if not os.path.exists(self.logpath):
+            os.makedirs(self.logpath)
+
+        # NOTE: Consider limiting the number of log directories that are created.
+        #       It would mean deleting older directories.
+
+        #16/05/18 11:03:53.717 INFO  3078268608 - user.scripting       - stc::get automationoptions -suppressTclErrors
+        #16/05/18 11:03:53.717 INFO  3078268608 - user.scripting       - return  false
+        #2016-05-19 14:05:56,382 UserID   =mjefferson
+        #2016-05-19 14:05:56,382 Log Level=INFO
+
+        if loglevel == "CRITICAL":
+            loglevel = logging.CRITICAL
+        elif loglevel == "ERROR":
+            loglevel = logging.ERROR
+        elif loglevel == "WARNING":
+            loglevel = logging.WARNING
+        elif loglevel == "INFO":            
+            loglevel = logging.INFO
+        else:
+            # DEBUG is the default log level.
+            loglevel = logging.DEBUG        
+
+        # Each AVA object has its own logger and log file, so that several objects 
+        # (eg: an AVAPool) don't write over each other's logs.
+        self.log = logging.getLogger("avalanche.AVA" + str(next(LOGGER_IDS)))
+        self.log.setLevel(loglevel)
+        self.log.propagate = False
+
+        self.logfile = UniqueLogFile(self.logfile)
+
+        handler = logging.FileHandler(self.logfile, mode="w")
+        handler.setFormatter(LogFormatter(logformat, logresultsize))
+
+        if QueueHandler is not None:
+            # The records are written to the file by a separate thread, so that the 
+            # commands are not held up by the disk.
+            logqueue = queue.Queue()
+            self._loglistener = QueueListener(logqueue, handler)
+            self._loglistener.start()
+
+            self.log.addHandler(LogQueueHandler(logqueue, logresultsize))
+        else:
+            self._loglistener = None
+            self.log.addHandler(handler)
+
+        self._loghandler = handler
+
+        #logging.Formatter(fmt='%(asctime)s.%(msecs)03d',datefmt='%Y/%m/%d %H:%M:%S')
+        # The logger is now ready.        
+
+        self.log.info("Spirent Avalanche Python API is starting up...")
+        self.log.info("OS Type      = " + os.name)
+        self.log.info("API Path     = " + apipath)
+        self.log.info("UserID       = " + getpass.getuser())
+        self.log.info("Log Level    = " + logging.getLevelName(loglevel))     
+        self.log.info("Current Path = " + os.path.abspath(os.getcwd()))   
+        self.log.info("Log Path     = " + self.logpath)
+
+        return
+
+    #==============================================================================
+    def Initialize(self, apipath, tcllibpath):
+        """
+        Prepare the Tcl interpreter for the Avalanche API: set up the ::auto_path,
+        load the API and define the helper procedures used by this wrapper.
+        """
+        #if logpath != None:
+        #    self.tclinterp.tk.call('eval', 'set ::env(STC_LOG_OUTPUT_DIRECTORY) [pwd]')
+
+        # There are a number of Tcl packages required by Avalanche API.
+        #   TclX
+        #   Tcllib
+        #   Tbcload
+        #   msgcat
+        #   ...there may be others        
+        # Most are NOT included with the Avalanche API, so I have included them with
+        # this wrapper in the ./lib subdirectory.          
+  
+        if tcllibpath:
+            tcllibpath = os.path.abspath(tcllibpath)
+
+        # Include the "lib" directory that may, or may not, exist in the same path as this file.
+        # Otherwise, the libraries are extracted from lib.zip.
+        generallibpath = os.path.dirname(os.path.abspath(__file__))
+        generallibpath = os.path.join(generallibpath, "lib")
+
+        if not os.path.isdir(generallibpath) and os.path.isfile(LIB_ZIP):
+            try:
+                generallibpath = ExtractLibraries(LIB_ZIP)
+            except Exception as errmsg:
+                self.log.warning("Unable to extract the Tcl libraries from " + LIB_ZIP + ": " + str(errmsg))
+
+        self.log.info("Tcl libraries = " + generallibpath)
+
+        oslibpath = None
+        if os.name == "nt":
+            oslibpath = os.path.join(generallibpath, "windows")
+        elif os.name == "posix":
+            oslibpath = os.path.join(generallibpath, "linux")
+
+        apipath = apipath.encode('unicode-escape').decode()        
+        generallibpath = generallibpath.encode('unicode-escape').decode()
+        if oslibpath:
+            oslibpath = oslibpath.encode('unicode-escape').decode()                   
+
+        # The whole bootstrap is sent as a single command, instead of one round trip
+        # for each step.
+        tclcode = []
+        if tcllibpath:
+            # Add the user-defined path to the front of the list. This will ensure that it is used over all other libraries.
+            tclcode.append('set ::auto_path [linsert $::auto_path 0 [file normalize {' + tcllibpath.encode('unicode-escape').decode() + '}]]')
+
+        tclcode.append('lappend ::auto_path [file normalize {' + generallibpath + '}]')
+        tclcode.append('lappend ::auto_path [file normalize {' + oslibpath + '}]')
+        tclcode.append('lappend ::auto_path [file normalize {' + apipath + '}]')
+
+        # Some commonly used Tcl functions, and the helpers of the bulk commands.
+        tclcode.append('source {' + HELPERS_TCL.encode('unicode-escape').decode() + '}')
+
+        tclcode.append("package require tbcload")
+
+        if self.lazyload:
+            tclcode.append("::avapy::loadApiOnFirstUse")
+        else:
+            tclcode.append("::avapy::loadApi")
+
+        # The versions are only retrieved if they are logged.
+        probes = self.log.isEnabledFor(logging.INFO)
+        if probes:
+            tclcode.append("list [info patchlevel] [package present tbcload] $::auto_path")
+        else:
+            tclcode.append("list")
+
+        if self.lazyload:
+            self.log.info("The Avalanche API will be loaded by the first command.")
+        else:
+            self.log.info("Loading the Avalanche API in the Tcl interpreter...")
+
+        def Log(result):
+            if probes:
+                tclversion, tbcloadversion, autopath = SplitTclList(str(result))
+                self.log.info("Tcl Version  = " + tclversion)
+                self.log.info("Tbcload Version  = " + tbcloadversion)
+                self.log.info("Tcl ::auto_path = " + autopath)
+                self.log.info("-------------------------------------------------------------")
+
+        self.Then(self.Bootstrap(tclcode), Log)
+
+        return
+
+    #==============================================================================
+    def Bootstrap(self, tclcode):
+        # Sends the bootstrap commands of Initialize to the Tcl interpreter, as a 
+        # single command. Returns the result of the last one.
+        return self.Exec("\n".join(tclcode))
+
+###############################################################################
+####
+####    Tcl Libraries
+####
+###############################################################################
+
+# The SHA-256 of each zip file that has been extracted by this process.
+LIB_CHECKSUMS = {}
+
+#==============================================================================
+def ExtractLibraries(zippath=LIB_ZIP, cachedir=None):
+    """
+    Extracts the Tcl libraries of lib.zip once, and returns the path of the "lib"
+    directory.
+
+    The libraries are extracted to <cachedir>/lib-<version>-<checksum>, where the
+    checksum is that of the zip file, so that an updated lib.zip is extracted again.
+    The checksum is kept in <cachedir>/lib-<version>.stamp with the size and the 
+    modification time of the zip file, and the file is only read again if they change.
+    'cachedir' defaults to $AVA_LIB_CACHE, or ~/.cache/avalanche-python 
+    (%LOCALAPPDATA%/avalanche-python on Windows).
+
+    Only the libraries for this OS are extracted (the other OS directory is 
+    skipped), without the .DS_Store and __MACOSX files.
+
+    Several processes may call this at the same time. Each one extracts to a 
+    temporary directory, which is then renamed. The first rename wins, and the 
+    other processes use its directory.
+    """
+    if cachedir is None:
+        cachedir = os.getenv("AVA_LIB_CACHE")
+
+    if cachedir is None:
+        if os.name == "nt":
+            cachedir = os.path.join(os.getenv("LOCALAPPDATA", os.path.expanduser("~")), "avalanche-python")
+        else:
+            cachedir = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "avalanche-python")
+
+    try:
+        os.makedirs(cachedir)
+    except OSError:
+        if not os.path.isdir(cachedir):
+            raise
+
+    zippath = os.path.abspath(zippath)
+    if zippath not in LIB_CHECKSUMS:
+        LIB_CHECKSUMS[zippath] = LibraryChecksum(zippath, cachedir)
+
+    target = os.path.join(cachedir, "lib-" + str(LIB_CACHE_VERSION) + "-" + LIB_CHECKSUMS[zippath][:16])
+    libpath = os.path.join(target, "lib")
+
+    if os.path.isdir(libpath):
+        return libpath
+
+    # The other OS directory is skipped.
+    if os.name == "nt":
+        skipped = "lib/linux/"
+    else:
+        skipped = "lib/windows/"
+
+    temporary = tempfile.mkdtemp(prefix=".extracting-", dir=cachedir)
+    try:
+        with zipfile.ZipFile(zippath) as archive:
+            for member in archive.infolist():
+                name = member.filename
+
+                if not name.startswith("lib/") or name.startswith(skipped):
+                    continue
+                if os.path.basename(name.rstrip("/")) == ".DS_Store" or "__MACOSX" in name:
+                    continue
+                if ".." in name.split("/"):
+                    continue
+
+                path = archive.extract(member, temporary)
+
+                # The zip file keeps the Unix permissions (eg: of the shared libraries).
+                mode = (member.external_attr >> 16) & 0o777
+                if mode and not name.endswith("/"):
+                    os.chmod(path, mode)
+
+        # mkdtemp only gives access to this user, but the cache may be shared.
+        os.chmod(temporary, 0o755)
+
+        try:
+            os.rename(temporary, target)
+        except OSError:
+            # Another process has extracted the libraries first.
+            if not os.path.isdir(libpath):
+                raise
+    finally:
+        if os.path.isdir(temporary):
+            shutil.rmtree(temporary, ignore_errors=True)
+
+    return libpath
+
+#==============================================================================
+def LibraryChecksum(zippath, cachedir):
+    # Returns the SHA-256 of the zip file. It is only computed if the size or the
+    # modification time of the file differ from those in the stamp file.
+    stamppath = os.path.join(cachedir, "lib-" + str(LIB_CACHE_VERSION) + ".stamp")
+    info = os.stat(zippath)
+    key = [info.st_size, info.st_mtime]
+
+    try:
+        with open(stamppath) as stampfile:
+            stamps = json.load(stampfile)
+    except (IOError, OSError, ValueError):
+        stamps = {}
+
+    stamp = stamps.get(zippath)
+    if isinstance(stamp, dict) and stamp.get("key") == key and stamp.get("checksum"):
+        return stamp["checksum"]
+
+    checksum = hashlib.sha256()
+    with open(zippath, "rb") as zipfileobject:
+        for block in iter(lambda: zipfileobject.read(1024 * 1024), b""):
+            checksum.update(block)
+    checksum = checksum.hexdigest()
+
+    # The stamp file is replaced atomically, as other processes may read it. If two
+    # processes write it at the same time, one of the checksums is computed again.
+    stamps[zippath] = {"key": key, "checksum": checksum}
+    try:
+        descriptor, temppath = tempfile.mkstemp(prefix=".stamp-", dir=cachedir)
+        with os.fdopen(descriptor, "w") as stampfile:
+            json.dump(stamps, stampfile)
+        os.chmod(temppath, 0o644)
+        ReplaceFile(temppath, stamppath)
+    except (IOError, OSError):
+        pass
+
+    return checksum
+
+
+###############################################################################
+####
+####    Logging
+####
+###############################################################################
+
+# Numbers the loggers of the AVA objects ("avalanche.AVA1", "avalanche.AVA2", ...).
+LOGGER_IDS = itertools.count(1)
+
+# The log files that are in use by this process.
+LOG_FILES = set()
+LOG_FILES_LOCK = threading.Lock()
+
+#==============================================================================
+def UniqueLogFile(logfile):
+    """
+    Returns the log file name, or, if another AVA object in this process already
+    uses it, the same name with a number added (avalanche_python_2.log, ...).
+    """
+    base, extension = os.path.splitext(logfile)
+
+    with LOG_FILES_LOCK:
+        number = 1
+        while logfile in LOG_FILES:
+            number += 1
+            logfile = base + "_" + str(number) + extension
+
+        LOG_FILES.add(logfile)
+
+    return logfile
+
+#==============================================================================
+def ReleaseLogFile(logfile):
+    """
+    Makes a log file name that was returned by UniqueLogFile available again.
+    """
+    with LOG_FILES_LOCK:
+        LOG_FILES.discard(logfile)
+
+#==============================================================================
+class LogFormatter(logging.Formatter):
+    """
+    Formats the records of the AVA log file, either as text or as JSON lines.
+    Messages longer than 'maxsize' characters are truncated.
+    """
+    def __init__(self, logformat="text", maxsize=None):
+        logging.Formatter.__init__(self)
+        self.json = (logformat == "json")
+        self.maxsize = maxsize
+
+    #==============================================================================
+    def format(self, record):
+        message = record.getMessage()
+        if self.maxsize is not None and len(message) > self.maxsize:
+            more = len(message) - self.maxsize + getattr(record, "truncated", 0)
+            message = message[:self.maxsize] + "... (" + str(more) + " more characters)"
+
+        if not self.json:
+            return self.formatTime(record) + " " + record.levelname + " " + message
+
+        entry = OrderedDict()
+        entry["time"] = datetime.datetime.fromtimestamp(record.created).isoformat()
+        entry["level"] = record.levelname
+        entry["logger"] = record.name
+        entry["thread"] = record.threadName
+        if getattr(record, "commandid", None) is not None:
+            entry["commandid"] = record.commandid
+        if getattr(record, "duration", None) is not None:
+            entry["duration"] = round(record.duration, 6)
+        entry["message"] = message
+
+        return json.dumps(entry)
+
+# The log arguments that are converted to strings before they are queued.
+MUTABLE_LOG_ARGUMENTS = (list, dict, set, bytearray)
+
+#==============================================================================
+if QueueHandler is not None:
+    class LogQueueHandler(QueueHandler):
+        """
+        Queues the records for the thread that writes the file, which formats 
+        them (and truncates the long messages).
+
+        The arguments that the caller could modify afterwards (eg: a list or a
+        dictionary) are converted to strings before the record is queued. The
+        others (including the CommandMessage of a LoggedCommand) are queued as 
+        they are, except that the strings that are longer than 'maxsize' 
+        characters are cut, so that a large Tcl result is neither formatted nor
+        kept in the queue in full. The number of characters that were cut is 
+        kept in the record, for the LogFormatter.
+        """
+        def __init__(self, logqueue, maxsize=None):
+            QueueHandler.__init__(self, logqueue)
+            self.maxsize = maxsize
+
+        #==============================================================================
+        def prepare(self, record):
+            record = copy.copy(record)
+            record.truncated = 0
+            if isinstance(record.args, tuple):
+                record.args = tuple(self.PrepareArgument(record, argument) for argument in record.args)
+            elif record.args:
+                record.msg = record.getMessage()
+                record.args = None
+            record.exc_info = None
+            return record
+
+        #==============================================================================
+        def PrepareArgument(self, record, argument):
+            if isinstance(argument, MUTABLE_LOG_ARGUMENTS):
+                argument = str(argument)
+            elif not isinstance(argument, (str, bytes)):
+                return argument
+
+            # The formatter truncates the whole message anyway. Keep one character
+            # more than it shows, so that it still sees that the message is too long.
+            if self.maxsize is not None and len(argument) > self.maxsize + 1:
+                record.truncated += len(argument) - self.maxsize - 1
+                argument = argument[:self.maxsize + 1]
+
+            return argument
+
+
+###############################################################################
+####
+####    Metrics
+####
+###############################################################################
+
+# The number of latency samples kept for each verb, for the percentiles.
+METRICS_SAMPLES = 1000
+
+#==============================================================================
+def CommandVerb(command):
+    """
+    Returns the name under which the latency of a Tcl command is recorded: the
+    first word of the command, or the first two words of an av::perform command.
+    """
+    words = command[:128].split(None, 2)
+    if not words:
+        return ""
+
+    if words[0] == "av::perform" and len(words) > 1:
+        return words[0] + " " + words[1]
+
+    return words[0]
+
+#==============================================================================
+def ReplaceFile(source, target):
+    """
+    Renames the source file to the target, replacing the target if it exists.
+    """
+    if hasattr(os, "replace"):
+        os.replace(source, target)
+        return
+
+    # Python 2 has no os.replace, and os.rename does not replace a file on Windows.
+    if os.name == "nt" and os.path.exists(target):
+        os.remove(target)
+    os.rename(source, target)
+
+#==============================================================================
+def Percentile(samples, fraction):
+    """
+    Returns the given percentile (a fraction between 0 and 1) of a sorted list.
+    """
+    if not samples:
+        return 0.0
+
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+#==============================================================================
+class CommandMetrics(object):
+    """
+    The latency and throughput counters of an AVA object. See AVA.stats().
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+
+        # verb -> [count, total, max, recent samples]
+        self.commands = {}
+
+        self.byteswritten = 0
+        self.bytesread = 0
+        self.parsetime = 0.0
+        self.parsecount = 0
+
+    #==============================================================================
+    def Command(self, verb, duration, size):
+        with self.lock:
+            counters = self.commands.get(verb)
+            if counters is None:
+                counters = self.commands[verb] = [0, 0.0, 0.0, collections.deque(maxlen=METRICS_SAMPLES)]
+
+            counters[0] += 1
+            counters[1] += duration
+            counters[2] = max(counters[2], duration)
+            counters[3].append(duration)
+
+            self.bytesread += size
+
+    #==============================================================================
+    def Written(self, size):
+        with self.lock:
+            self.byteswritten += size
+
+    #==============================================================================
+    def Parsed(self, duration):
+        with self.lock:
+            self.parsetime += duration
+            self.parsecount += 1
+
+    #==============================================================================
+    def stats(self):
+        with self.lock:
+            commands = {}
+            for verb, (count, total, maximum, samples) in self.commands.items():
+                samples = sorted(samples)
+                commands[verb] = {"count": count, "total": total, "mean": total / count, "max": maximum,
+                                  "p50": Percentile(samples, 0.50), "p95": Percentile(samples, 0.95), 
+                                  "p99": Percentile(samples, 0.99)}
+
+            return {"commands": commands, "bytes_written": self.byteswritten, "bytes_read": self.bytesread,
+                    "parse_time": self.parsetime, "parse_count": self.parsecount}
+
+    #==============================================================================
+    def Prometheus(self):
+        # Returns the counters in the Prometheus text exposition format.
+        stats = self.stats()
+
+        lines = ["# HELP avalanche_command_duration_seconds Latency of the Tcl commands, by verb.",
+                 "# TYPE avalanche_command_duration_seconds summary"]
+        for verb in sorted(stats["commands"]):
+            latency = stats["commands"][verb]
+            label = 'verb="' + verb.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                lines.append("avalanche_command_duration_seconds{" + label + ',quantile="' + quantile + '"} ' + repr(latency[key]))
+            lines.append("avalanche_command_duration_seconds_sum{" + label + "} " + repr(latency["total"]))
+            lines.append("avalanche_command_duration_seconds_count{" + label + "} " + str(latency["count"]))
+
+        lines += ["# HELP avalanche_bytes_written_total Bytes written to the Tcl interpreter.",
+                  "# TYPE avalanche_bytes_written_total counter",
+                  "avalanche_bytes_written_total " + str(stats["bytes_written"]),
+                  "# HELP avalanche_bytes_read_total Bytes of responses read from the Tcl interpreter.",
+                  "# TYPE avalanche_bytes_read_total counter",
+                  "avalanche_bytes_read_total " + str(stats["bytes_read"]),
+                  "# HELP avalanche_parse_seconds_total Time spent parsing the responses.",
+                  "# TYPE avalanche_parse_seconds_total counter",
+                  "avalanche_parse_seconds_total " + repr(stats["parse_time"]),
+                  "# HELP avalanche_parse_total Responses parsed.",
+                  "# TYPE avalanche_parse_total counter",
+                  "avalanche_parse_total " + str(stats["parse_count"])]
+
+        return "\n".join(lines) + "\n"
+
+#==============================================================================
+def ServeMetrics(metrics, port=0, host="127.0.0.1"):
+    """
+    Starts an HTTP server, in a background thread, that returns the counters of
+    a CommandMetrics object in the Prometheus text exposition format.
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = metrics.Prometheus().encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            return
+
+    server = HTTPServer((host, port), MetricsHandler)
+
+    thread = threading.Thread(target=server.serve_forever, name="AVA metrics")
+    thread.daemon = True
+    thread.start()
+
+    return server
+
+
+###############################################################################
+####
+####    Hooks
+####
+###############################################################################
+class ExecHooks(object):
+    """
+    The base class of the hooks that are called around each command. See
+    AVA.addHook(). Override the methods that are needed.
+    """
+    def before_exec(self, command):
+        return
+
+    def after_exec(self, command, result, duration):
+        return
+
+    def on_error(self, command, error, duration):
+        return
+
+    def on_response(self, command, status, result, duration):
+        return
+
+    def before_call(self, method, args, kwargs):
+        return
+
+    def after_call(self, method, duration):
+        return
+
+#==============================================================================
+class SpanRecorder(ExecHooks):
+    """
+    Records a span for each public AVA method call and each Tcl command, and
+    writes them as Chrome trace events (chrome://tracing, Perfetto, Speedscope).
+
+    Example
+        recorder = av.addHook(SpanRecorder())
+        av.login(workspace="Regression")
+        ...
+        av.reserveAll(test)
+        av.apply(test)
+        recorder.write("setup.trace.json")
+
+    'maxcommand' limits the length of the commands that are stored with the spans.
+    """
+    def __init__(self, maxcommand=200):
+        self.maxcommand = maxcommand
+        self.events = []
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    #==============================================================================
+    def Span(self, name, category, started, duration, args):
+        event = {"name": name, "cat": category, "ph": "X", "pid": self.pid,
+                 "tid": threading.current_thread().ident,
+                 "ts": int(started * 1000000), "dur": int(duration * 1000000), "args": args}
+
+        with self.lock:
+            self.events.append(event)
+
+    #==============================================================================
+    def Command(self, command, duration, args):
+        if command is None:
+            return
+
+        args["command"] = command[:self.maxcommand]
+        self.Span(CommandVerb(command), "tcl", time.time() - duration, duration, args)
+
+    #==============================================================================
+    def after_exec(self, command, result, duration):
+        self.Command(command, duration, {})
+
+    #==============================================================================
+    def on_error(self, command, error, duration):
+        self.Command(command, duration, {"error": str(error)})
+
+    #==============================================================================
+    def after_call(self, method, duration):
+        self.Span(method, "python", time.time() - duration, duration, {})
+
+    #==============================================================================
+    def clear(self):
+        with self.lock:
+            self.events = []
+
+    #==============================================================================
+    def write(self, path):
+        """
+        Writes the recorded spans to a file, in the Chrome trace event format.
+        """
+        with self.lock:
+            events = list(self.events)
+
+        with open(path, "w") as tracefile:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, tracefile)
+
+        return
+
+
+###############################################################################
+####
+####    Tcl Lists
+####
+###############################################################################
+
+# Tcl only treats these characters as list element separators.
+TCL_WHITESPACE = " \t\n\r\v\f"
+
+TCL_SPACE_RE     = re.compile("[" + TCL_WHITESPACE + "]*")
+TCL_BARE_RE      = re.compile(r"(?:[^" + TCL_WHITESPACE + r"\\]|\\\n[ \t]*|\\.|\\$)+", re.DOTALL)
+TCL_QUOTED_RE    = re.compile(r'"((?:[^"\\]|\\\n[ \t]*|\\.)*)"', re.DOTALL)
+TCL_BRACE_RE     = re.compile(r"[{}\\]")
+TCL_BACKSLASH_RE = re.compile(r"\\(x[0-9a-fA-F]{1,2}|u[0-9a-fA-F]{1,4}|[0-7]{1,3}|\n[ \t]*|.)", re.DOTALL)
+TCL_NUMBER_RE    = re.compile(r"[" + TCL_WHITESPACE + r"]*[-+]?(?:(0[xX][0-9a-fA-F]+)|(\d+)|(\d+\.\d*|\.\d+|\d+(?=[eE]))([eE][-+]?\d+)?)[" + TCL_WHITESPACE + r"]*$")
+
+# The characters that TclQuote escapes with a backslash.
+TCL_QUOTE_RE     = re.compile(r'[\\\[\]{}"$;#\s]')
+TCL_QUOTES  = {"\n": "\\n", "\t": "\\t", "\r": "\\r", "\v": "\\v", "\f": "\\f"}
+TCL_ESCAPES = {"a": "\a", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v"}
+
+#==============================================================================
+def TclBackslash(match):
+    # Performs a single Tcl backslash substitution.
+    sequence = match.group(1)
+    first = sequence[0]
+
+    if first in TCL_ESCAPES:
+        return TCL_ESCAPES[first]
+    elif first == "x" and len(sequence) > 1:
+        return chr(int(sequence[1:], 16))
+    elif first == "u" and len(sequence) > 1:
+        return chr(int(sequence[1:], 16))
+    elif first in "01234567":
+        return chr(int(sequence, 8) & 0xFF)
+    elif first == "\n":
+        # A backslash-newline, and the whitespace that follows it, is a single space.
+        return " "
+
+    return sequence
+
+#==============================================================================
+def SplitTclList(string):
+    """
+    Split a Tcl list (which is a string) into a Python list of strings, just
+    like Tcl's "split list" rules: elements may be enclosed in braces (no
+    substitution) or double quotes, and backslash sequences are substituted.
+    Nested lists are returned as strings, and may be split in turn.
+    """
+    if not ("{" in string or '"' in string or "\\" in string):
+        # The common case: a plain whitespace separated list.
+        return [element for element in re.split("[" + TCL_WHITESPACE + "]+", string) if element]
+
+    elements = []
+    position = 0
+    length = len(string)
+
+    while True:
+        position = TCL_SPACE_RE.match(string, position).end()
+        if position >= length:
+            break
+
+        first = string[position]
+
+        if first == "{":
+            # Find the matching close brace. Backslashes only protect the brace
+            # that follows them; the element itself is not substituted.
+            depth = 1
+            index = position + 1
+            while depth:
+                match = TCL_BRACE_RE.search(string, index)
+                if match is None:
+                    raise ValueError("unmatched open brace in list")
+
+                character = match.group()
+                if character == "{":
+                    depth += 1
+                elif character == "}":
+                    depth -= 1
+                index = match.end() + (character == "\\")
+
+            element = string[position + 1:index - 1]
+            end = index
+
+        elif first == '"':
+            match = TCL_QUOTED_RE.match(string, position)
+            if match is None:
+                raise ValueError("unmatched open quote in list")
+
+            element = TCL_BACKSLASH_RE.sub(TclBackslash, match.group(1))
+            end = match.end()
+
+        else:
+            match = TCL_BARE_RE.match(string, position)
+            element = match.group()
+            if "\\" in element:
+                element = TCL_BACKSLASH_RE.sub(TclBackslash, element)
+            end = match.end()
+
+        if end < length and string[end] not in TCL_WHITESPACE:
+            raise ValueError("list element in " + ("braces" if first == "{" else "quotes") + " followed by \"" + string[end:end + 10] + "\" instead of space")
+
+        elements.append(element)
+        position = end
+
+    return elements
+
+#==============================================================================
+def TclList(elements):
+    """
+    Convert a Python list of strings into a Tcl list (which is a string). This is 
+    the reverse of SplitTclList.
+    """
+    return " ".join(TclQuote(element) for element in elements)
+
+#==============================================================================
+def TclQuote(value):
+    """
+    Quote a string so that Tcl reads it as a single word (or list element), 
+    without any substitution.
+    """
+    value = str(value)
+    if value == "":
+        return "{}"
+
+    return TCL_QUOTE_RE.sub(lambda match: TCL_QUOTES.get(match.group(0), "\\" + match.group(0)), value)
+
+#==============================================================================
+def ConvertTclValue(value):
+    """
+    Convert a Tcl value to an int or a float, if it is numeric. Otherwise the
+    string is returned as it is.
+    """
+    match = TCL_NUMBER_RE.match(value)
+    if match is None:
+        return value
+
+    if match.group(1):
+        return int(value, 16)
+    elif match.group(2):
+        return int(value)
+
+    return float(value)
+
+
+###############################################################################
+####
+####    Attribute Cache
+####
+###############################################################################
+class AttributeCache(object):
+    """
+    A least-recently-used cache of av.get results, keyed on the handle (or DDN
+    path) and the attribute names (or DAN paths).
+
+    The AVA methods that modify the data model invalidate the cache:
+        -av.config and av.create drop the entries of the modified handle, and
+         every entry that was looked up through a DDN or DAN path (the path
+         may lead through the modified object). A config through a DDN or DAN
+         path drops the whole cache.
+        -av.delete, av.perform, av.apply, av.connect, av.reserve, av.release
+         (and the other session-level commands) drop the whole cache.
+    Commands sent directly with av.Exec do not invalidate the cache.
+    """
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        # key -> (expiry time, value), in least-recently-used order.
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Incremented by every invalidation. A value that was requested before an
+        # invalidation is not stored.
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    #==============================================================================
+    def Get(self, key):
+        # Returns (True, value) on a hit, and (False, None) on a miss.
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is not None and entry[0] is not None and entry[0] < time.time():
+                # Expired.
+                del self.entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            self.hits += 1
+            # Most recently used last (OrderedDict.move_to_end is not in Python 2).
+            del self.entries[key]
+            self.entries[key] = entry
+
+        value = entry[1]
+        if isinstance(value, dict):
+            # Don't let the caller modify the cached copy.
+            value = dict(value)
+
+        return True, value
+
+    #==============================================================================
+    def Put(self, key, value, generation):
+        # Stores the value, unless the cache was invalidated since it was requested.
+        # Returns the value.
+        with self.lock:
+            if generation != self.generation:
+                return value
+
+            expires = None
+            if self.ttl is not None:
+                expires = time.time() + self.ttl
+
+            self.entries.pop(key, None)
+            if isinstance(value, dict):
+                self.entries[key] = (expires, dict(value))
+            else:
+                self.entries[key] = (expires, value)
 
-        functionname = inspect.currentframe().f_back.f_code.co_name       
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
 
-        # Output the command in a format that looks like normal Python syntax.
-        logmsg = " - Python command - " + functionname
-        arguments = ""
-        for key in args:            
-            if key != "self":                
-                value = args[key]
-                if value == "":
-                    value = '""'
+        return value
 
-                arguments += key + "=\"" + str(value) + "\", "
+    #==============================================================================
+    def Invalidate(self, handle):
+        # Drops the entries of the handle, its DDN paths, and every entry that
+        # was looked up through a path.
+        with self.lock:
+            self.generation += 1
+
+            for key in list(self.entries):
+                keyhandle = key[0]
+                if keyhandle == handle or "." in keyhandle or "(" in keyhandle or [attribute for attribute in key[1:] if "." in attribute]:
+                    del self.entries[key]
+                    self.invalidations += 1
+
+    #==============================================================================
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.invalidations += len(self.entries)
+            self.entries.clear()
 
-        if arguments != "":
-            # Remove the final comma and space (", ").
-            arguments = arguments[:-2]
+    #==============================================================================
+    def stats(self):
+        """
+        Returns the cache counters as a dictionary.
+        """
+        with self.lock:
+            return {"size": len(self.entries), "maxsize": self.maxsize, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "invalidations": self.invalidations}
 
-        logmsg += "(" + arguments + ")"
 
-        logging.debug(logmsg)
-        return                
+###############################################################################
+####
+####    Bulk Commands
+####
+###############################################################################
+class ReportTimer(object):
+    """
+    Records the time taken by each step of a bulk operation in a dictionary.
+    """
+    def __init__(self, timings):
+        self.timings = timings
+        self.started = time.time()
+        self.last = self.started
 
     #==============================================================================
-    def CleanupTcl(self):
-        """Attempt to clean up the Tcl subprocess.        
-        """        
-        self.tcl.stdin.close()
-        self.tcl.terminate()
-        self.tcl.wait(timeout=0.5)                
+    def Lap(self, name):
+        now = time.time()
+        self.timings[name] = now - self.last
+        self.last = now
 
-        return        
+    #==============================================================================
+    def Total(self):
+        self.timings["total"] = time.time() - self.started
+
+
+class BulkResult(list):
+    """
+    The results of av.configMany and av.createMany, in the order of the items.
+    The exception is returned in place of the result of a failed item.
+    """
+    @property
+    def errors(self):
+        """
+        A list of (index, exception) for each item that failed.
+        """
+        return [(index, result) for index, result in enumerate(self) if isinstance(result, Exception)]
+
+
+###############################################################################
+####
+####    Statistics
+####
+###############################################################################
+class StatsRecord(collections.namedtuple("StatsRecord", "time dataset objects")):
+    """
+    One sample of av.stream: the time at which it was read (in seconds since the
+    epoch), the ResultDataSet handle, and an ordered dictionary of
+    {ResultDataObject: {attribute: value}}.
+    """
+    __slots__ = ()
+
+
+###############################################################################
+####
+####    Events
+####
+###############################################################################
+class EventPump(object):
+    """
+    Reads the Avalanche events in the background, and dispatches them to callbacks.
+    See av.startEvents.
+
+    Each event is the dictionary returned by av.getEvents, with the keys "name",
+    "message" and "additional".
+    """
+    def __init__(self, av, interval=0.5, maxsize=10000):
+        self.av = av
+        self.interval = interval
+
+        # The events that have not been dispatched yet, as (received, event).
+        self.queue = collections.deque()
+        self.maxsize = maxsize
+
+        # The latest dispatched events, as (received, event), for waitFor(since=...).
+        self.history = collections.deque(maxlen=maxsize)
+
+        # event name (or None, for all of the events) -> [callback].
+        self.callbacks = {}
+
+        self.condition = threading.Condition()
+        self.stopping = False
+
+        self.counters = {"polls": 0, "poll_time": 0.0, "poll_errors": 0,
+                         "received": 0, "dispatched": 0, "dropped": 0,
+                         "callback_errors": 0, "max_queue": 0,
+                         "delay_total": 0.0, "delay_max": 0.0}
+
+        self.poller = threading.Thread(target=self.PollLoop, name="AVA events")
+        self.poller.daemon = True
+
+        self.dispatcher = threading.Thread(target=self.DispatchLoop, name="AVA event callbacks")
+        self.dispatcher.daemon = True
+
+        self.poller.start()
+        self.dispatcher.start()
 
     #==============================================================================
-    def __init__(self, apipath=None, tclinterpreter=None, tcllibpath=None, logpath=None, loglevel="DEBUG"):
+    def on(self, name, callback):
         """
-        Load the Avalanche API and initialize the Python environment.
+        Calls the callback with each event of that name (or with every event, if the
+        name is None). The callbacks are called from the dispatch thread, in the 
+        order of the events. An exception in a callback is logged.
 
-        'apipath' optionally specifies the location of the Avalanche API installation.
-        'tclinterpreter' optionally specifies the Tclsh interpreter to use.
-        'tcllibpath' optionally specifies the path to additional Tcl libraries. The default Tcl libraries 
-                     and the __file__/lib directory are also used, but are overridden by the packages found 
-                     on this path.
-        'logpath' optionally specifies the location where the logs are to be stored.
+        Returns the callback, so that it can be removed with off().
+        """
+        with self.condition:
+            self.callbacks.setdefault(name, []).append(callback)
 
-        Returns None.
+        return callback
+
+    #==============================================================================
+    def off(self, name, callback):
         """
+        Removes a callback that was added with on().
+        """
+        with self.condition:
+            self.callbacks.get(name, []).remove(callback)
 
-        atexit.register(self.CleanupTcl)
+    #==============================================================================
+    def waitFor(self, name, timeout=None, match=None, since=None):
+        """
+        Waits for an event of that name (or any event, if the name is None), and
+        returns it.
 
-        # Construct the log path.            
-        if logpath:
-            self.logpath = logpath
-        else:
-            defaultlogpath = "~/Spirent/Avalanche/Logs/"
+        'match' optionally specifies a function of the event, which must return True
+        for the event to be returned (eg: to check its "additional" fields).
+        'since' optionally specifies a time (time.time()) after which the events are
+        considered. By default, only the events that are dispatched after the call are.
+        Use it to avoid missing an event that arrives before waitFor is called.
+        'timeout' is in seconds. An exception is raised if no event arrives in time.
 
-            now = datetime.datetime.now()
-            defaultlogpath += now.strftime("%Y-%m-%d-%H-%M-%S")
-            defaultlogpath += "_PID"
-            defaultlogpath += str(os.getpid())
-            defaultlogpath = os.path.expanduser(defaultlogpath)
-            
-            # The environment variable overwrites the default path.    
-            self.logpath = os.getenv("AVA_LOG_OUTPUT_DIRECTORY", defaultlogpath)        
+        wait_for is an alias of this function.
+        """
+        found = []
+        ready = threading.Event()
 
-        self.logpath = os.path.abspath(self.logpath)
-        self.logfile = os.path.join(self.logpath, "avalanche_python.log")        
+        def Matches(event):
+            return (name is None or event.get("name") == name) and (match is None or match(event))
 
-        if not os.path.exists(self.logpath):
-            os.makedirs(self.logpath)
+        def Waiter(event):
+            if not ready.is_set() and Matches(event):
+                found.append(event)
+                ready.set()
 
-        # NOTE: Consider limiting the number of log directories that are created.
-        #       It would mean deleting older directories.
+        with self.condition:
+            if since is not None:
+                for received, event in self.history:
+                    if received >= since and Matches(event):
+                        return event
 
-        #16/05/18 11:03:53.717 INFO  3078268608 - user.scripting       - stc::get automationoptions -suppressTclErrors
-        #16/05/18 11:03:53.717 INFO  3078268608 - user.scripting       - return  false
-        #2016-05-19 14:05:56,382 UserID   =mjefferson
-        #2016-05-19 14:05:56,382 Log Level=INFO
+            self.callbacks.setdefault(None, []).append(Waiter)
 
-        if loglevel == "CRITICAL":
-            loglevel = logging.CRITICAL
-        elif loglevel == "ERROR":
-            loglevel = logging.ERROR
-        elif loglevel == "WARNING":
-            loglevel = logging.WARNING
-        elif loglevel == "INFO":            
-            loglevel = logging.INFO
-        else:
-            # DEBUG is the default log level.
-            loglevel = logging.DEBUG        
-            
-        logging.basicConfig(filename=self.logfile, filemode="w", level=loglevel, format="%(asctime)s %(levelname)s %(message)s")
-        #logging.Formatter(fmt='%(asctime)s.%(msecs)03d',datefmt='%Y/%m/%d %H:%M:%S')
-        # Add timestamps to each log message.
-        #logging.basicConfig()
-        # The logger is now ready.        
+        try:
+            if not ready.wait(timeout):
+                raise Exception("Timed out waiting for the event " + str(name) + " after " + str(timeout) + " seconds.")
+        finally:
+            with self.condition:
+                self.callbacks[None].remove(Waiter)
 
-        logging.info("Spirent Avalanche Python API is starting up...")
-        logging.info("OS Type      = " + os.name)
-        logging.info("API Path     = " + apipath)
-        logging.info("UserID       = " + getpass.getuser())
-        logging.info("Log Level    = " + logging.getLevelName(loglevel))     
-        logging.info("Current Path = " + os.path.abspath(os.getcwd()))   
-        logging.info("Log Path     = " + self.logpath)
+        return found[0]
 
-        # # Instantiate the Tcl interpreter.
-        # #self.tcl = Tcl()
-        # shell_path = r"tclsh"
-        # self.tcl = Popen(shell_path, stdin=PIPE, stdout=PIPE, stderr=PIPE, universal_newlines = True, bufsize = 0)
+    wait_for = waitFor
 
-        # Instantiate the Tcl interpreter.
-        if tclinterpreter:
-            self.tcl_path = tclinterpreter.encode('unicode-escape').decode()            
+    #==============================================================================
+    def stats(self):
+        """
+        Returns the counters of the event pump, as a dictionary:
+            "polls", "poll_time", "poll_errors":  the av.getEvents calls, their total 
+                                                  time (in seconds) and failures.
+            "received", "dispatched", "dropped":  the number of events.
+            "queue", "max_queue":                 the number of events waiting to be 
+                                                  dispatched, now and at most.
+            "delay_mean", "delay_max":            the time (in seconds) between reading
+                                                  an event and dispatching it.
+            "callback_errors":                    the exceptions raised by the callbacks.
+        """
+        with self.condition:
+            result = dict(self.counters)
+            result["queue"] = len(self.queue)
+
+        delay_total = result.pop("delay_total")
+        result["delay_mean"] = delay_total / result["dispatched"] if result["dispatched"] else 0.0
+        return result
+
+    #==============================================================================
+    def stop(self, wait=True):
+        """
+        Stops reading the events. The queued events are still dispatched, unless
+        'wait' is False.
+        """
+        with self.condition:
+            self.stopping = True
+            if not wait:
+                self.queue.clear()
+            self.condition.notify_all()
+
+        if wait and threading.current_thread() not in (self.poller, self.dispatcher):
+            self.poller.join()
+            self.dispatcher.join()
+
+    #==============================================================================
+    def poll(self):
+        """
+        Reads the events now, instead of at the end of the current interval.
+        """
+        with self.condition:
+            self.condition.notify_all()
+
+    #==============================================================================
+    def PollLoop(self):
+        # The body of the poller thread.
+        while True:
+            with self.condition:
+                if self.stopping:
+                    return
+
+            started = time.time()
+            try:
+                events = self.av.getEvents()
+            except Exception as errmsg:
+                events = []
+                with self.condition:
+                    if self.stopping or self.av._closing:
+                        return
+                    self.counters["poll_errors"] += 1
+                self.av.log.error("Unable to read the events: " + str(errmsg))
+
+            received = time.time()
+
+            with self.condition:
+                self.counters["polls"] += 1
+                self.counters["poll_time"] += received - started
+
+                for event in events:
+                    if len(self.queue) >= self.maxsize:
+                        self.queue.popleft()
+                        self.counters["dropped"] += 1
+                    self.queue.append((received, event))
+
+                self.counters["received"] += len(events)
+                self.counters["max_queue"] = max(self.counters["max_queue"], len(self.queue))
+
+                # Read again immediately if there were events, as more may follow.
+                if events:
+                    self.condition.notify_all()
+                elif not self.stopping:
+                    self.condition.wait(self.interval)
+
+    #==============================================================================
+    def DispatchLoop(self):
+        # The body of the dispatch thread.
+        while True:
+            with self.condition:
+                while not self.queue and not self.stopping:
+                    self.condition.wait()
+
+                if not self.queue:
+                    return
+
+                received, event = self.queue.popleft()
+                self.history.append((received, event))
+
+                callbacks = self.callbacks.get(event.get("name"), []) + self.callbacks.get(None, [])
+
+            delay = time.time() - received
+
+            for callback in callbacks:
+                try:
+                    callback(event)
+                except Exception:
+                    with self.condition:
+                        self.counters["callback_errors"] += 1
+                    self.av.log.exception("Event callback failed: " + str(callback))
+
+            with self.condition:
+                self.counters["dispatched"] += 1
+                self.counters["delay_total"] += delay
+                self.counters["delay_max"] = max(self.counters["delay_max"], delay)
+
+
+class OperationFuture(Future):
+    """
+    The future result of an asynchronous command (see av.applyAsync), resolved by
+    its async_method_completed event.
+
+    Cancelling the future only stops waiting for the event. The command itself
+    still runs on Avalanche.
+    """
+    def __init__(self, requestid, description):
+        Future.__init__(self)
+        self.requestid = requestid
+        self.description = description
+
+    def __repr__(self):
+        return "<OperationFuture " + self.description + " (request " + self.requestid + ")>"
+
+
+class OperationTracker(object):
+    """
+    Matches the async_method_completed events to the OperationFutures, by request id.
+    """
+    # The number of unmatched events that are kept. An event may be dispatched
+    # before the future of its command is created.
+    MAX_UNMATCHED = 1000
+
+    def __init__(self, log):
+        self.log = log
+        self.lock = threading.Lock()
+        self.futures = {}
+        self.unmatched = OrderedDict()
+
+    #==============================================================================
+    def Track(self, requestid, description):
+        future = OperationFuture(requestid, description)
+
+        with self.lock:
+            event = self.unmatched.pop(requestid, None)
+            if event is None:
+                self.futures[requestid] = future
+
+        # A cancelled future no longer needs its event.
+        future.add_done_callback(lambda future: self.Forget(requestid, future))
+
+        if event is not None:
+            self.Resolve(future, event)
+
+        return future
+
+    #==============================================================================
+    def Forget(self, requestid, future):
+        with self.lock:
+            if self.futures.get(requestid) is future:
+                del self.futures[requestid]
+
+    #==============================================================================
+    def Completed(self, event):
+        # The EventPump callback of the async_method_completed events.
+        additional = event.get("additional")
+        if not isinstance(additional, dict):
+            return
+
+        requestid = str(additional.get("requestId", "")).strip()
+
+        with self.lock:
+            future = self.futures.pop(requestid, None)
+            if future is None:
+                self.unmatched[requestid] = event
+                while len(self.unmatched) > self.MAX_UNMATCHED:
+                    self.unmatched.popitem(last=False)
+                return
+
+        self.Resolve(future, event)
+
+    #==============================================================================
+    def Resolve(self, future, event):
+        # The event reports an error with a non-empty "error" or "errorMessage" 
+        # field, or a "status" of "failed" or "error".
+        additional = event.get("additional", {})
+        error = additional.get("error") or additional.get("errorMessage")
+        if not error and str(additional.get("status", "")).lower() in ("failed", "error"):
+            error = event.get("message") or additional.get("status")
+
+        if not future.set_running_or_notify_cancel():
+            return
+
+        if error:
+            self.log.error(future.description + " failed: " + str(error))
+            future.set_exception(Exception(str(error)))
         else:
-            self.tcl_path = "tclsh"
+            future.set_result(event)
 
-        logging.info("-------------------------------------------------------------")
-        logging.info("Tcl interpreter  = " + self.tcl_path)          
+    #==============================================================================
+    def Stop(self, reason):
+        # Fails the futures that are still waiting for their events.
+        with self.lock:
+            futures = list(self.futures.values())
+            self.futures = {}
+            self.unmatched.clear()
+
+        for future in futures:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(Exception(reason))
+
+#==============================================================================
+def WaitAll(futures, timeout=None):
+    """
+    Waits for all of the futures (eg: from av.applyAsync), and returns their results,
+    in the same order. The first failure is raised. An exception is raised if they
+    are not all done after 'timeout' seconds.
+
+    wait_all is an alias of this function.
+    """
+    futures = list(futures)
+
+    done, pending = concurrent.futures.wait(futures, timeout)
+    if pending:
+        raise Exception(str(len(pending)) + " of " + str(len(futures)) + " operations did not complete in " +
+                        str(timeout) + " seconds: " + ", ".join(repr(future) for future in pending))
+
+    return [future.result() for future in futures]
+
+#==============================================================================
+def AsCompleted(futures, timeout=None):
+    """
+    Yields the futures (eg: from av.applyAsync) as they complete. An exception is 
+    raised if they are not all done after 'timeout' seconds.
+
+    as_completed is an alias of this function.
+    """
+    futures = list(futures)
+
+    try:
+        for future in concurrent.futures.as_completed(futures, timeout):
+            yield future
+    except concurrent.futures.TimeoutError:
+        pending = [future for future in futures if not future.done()]
+        raise Exception(str(len(pending)) + " of " + str(len(futures)) + " operations did not complete in " +
+                        str(timeout) + " seconds: " + ", ".join(repr(future) for future in pending))
+
+wait_all = WaitAll
+as_completed = AsCompleted
 
-        self.tcl = Popen(self.tcl_path, stdin=PIPE, stdout=PIPE, stderr=PIPE, universal_newlines = True, bufsize = 0)                  
 
-        #if logpath != None:
-        #    self.tclinterp.tk.call('eval', 'set ::env(STC_LOG_OUTPUT_DIRECTORY) [pwd]')
+###############################################################################
+####
+####    Pipelining
+####
+###############################################################################
+class PipelineFuture(Future):
+    """
+    The future result of a command queued in an AVAPipeline.
 
-        # There are a number of Tcl packages required by Avalanche API.
-        #   TclX
-        #   Tcllib
-        #   Tbcload
-        #   msgcat
-        #   ...there may be others        
-        # Most are NOT included with the Avalanche API, so I have included them with
-        # this wrapper in the ./lib subdirectory.          
-  
-        if tcllibpath:
-            # Add the user-defined path to the front of the list. This will ensure that it is used over all other libraries.
-            tcllibpath = os.path.abspath(tcllibpath)
-            self.Exec('set ::auto_path "[file normalize ' + tcllibpath + '] $::auto_path"')
+    Requesting the result of a future that has not been resolved yet executes
+    the pipeline first.
+    """
+    def __init__(self, pipeline):
+        Future.__init__(self)
+        self.pipeline = pipeline
 
-        # Include the "lib" directory that may, or may not, exist in the same path as this file.
-        generallibpath = os.path.dirname(os.path.abspath(__file__))
-        generallibpath = os.path.join(generallibpath, "lib")
+    #==============================================================================
+    def result(self, timeout=None):
+        if not self.done():
+            self.pipeline.Flush()
+        return Future.result(self, timeout)
 
-        oslibpath = None
-        if os.name == "nt":
-            oslibpath = os.path.join(generallibpath, "windows")
-        elif os.name == "posix":
-            oslibpath = os.path.join(generallibpath, "linux")
+    #==============================================================================
+    def exception(self, timeout=None):
+        if not self.done():
+            self.pipeline.Flush()
+        return Future.exception(self, timeout)
 
-        apipath = apipath.encode('unicode-escape').decode()        
-        generallibpath = generallibpath.encode('unicode-escape').decode()
-        if oslibpath:
-            oslibpath = oslibpath.encode('unicode-escape').decode()                   
+    #==============================================================================
+    def Then(self, function):
+        # Returns a new future that is resolved with function(result) once this
+        # future is resolved. The function may itself queue more commands.
+        future = PipelineFuture(self.pipeline)
+
+        def Chain(source):
+            if source.cancelled():
+                future.cancel()
+            elif Future.exception(source) is not None:
+                future.set_exception(Future.exception(source))
+            else:
+                try:
+                    value = function(Future.result(source))
+                except Exception as errmsg:
+                    future.set_exception(errmsg)
+                    return
+
+                if isinstance(value, Future):
+                    value.add_done_callback(lambda inner: Resolve(future, inner))
+                else:
+                    future.set_result(value)
+
+        def Resolve(future, inner):
+            if inner.cancelled():
+                future.cancel()
+            elif Future.exception(inner) is not None:
+                future.set_exception(Future.exception(inner))
+            else:
+                future.set_result(Future.result(inner))
 
-        self.Exec('lappend ::auto_path [file normalize {' + generallibpath + '}]')
-        self.Exec('lappend ::auto_path [file normalize {' + oslibpath + '}]')
-        self.Exec('lappend ::auto_path [file normalize {' + apipath + '}]')
-
-        logging.info("Tcl Version  = " + self.Exec("info patchlevel"))
-        logging.info("Tbcload Version  = " + str(self.Exec("package require tbcload")))
-        logging.info("Tcl ::auto_path = " + self.Exec('set ::auto_path'))
-        logging.info("-------------------------------------------------------------")
-        logging.info("Loading the Avalanche API in the Tcl interpreter...")
-        self.Exec("package require av")
-
-        # I hate these status messages.
-        self.StopStatusMsg("on")
-
-        # Add some commonly used Tcl functions to the Tcl interpreter here.
-
-        # Use Tcl to convert the list into a Python-friendly dict string.
-        tclcode =  """proc isnumeric value {                         
-                          if {![catch {expr {abs($value)}}]} {         
-                              return 1                                 
-                          }                                            
-                          set value [string trimleft $value 0]         
-                          if {![catch {expr {abs($value)}}]} {         
-                              return 1                                 
-                          }                                            
-                          return 0                                     
-                      }"""
-        self.Exec(tclcode)        
-
-        tclcode = """proc tclList2Dict { args } {                     
-                         set result $args                             
-                         set output {}                                
-                         foreach {key value} $result {                
-                             regsub {^-} $key {} key                  
-                             if { [isnumeric $value] } {              
-                                 append output \"'$key': $value, \"   
-                             } else {                                 
-                                 regsub -all {'} $value {\\'} value   
-                                 regsub -all {\"} $value {\\\"} value 
-                                 append output \"'$key': '$value', \" 
-                             }                                        
-                         }                                            
-                                                                      
-                         regsub {, $} $output {} output               
-                         set output [list $output]                    
-                         return $output                               
-                     }"""
-        
-        self.Exec(tclcode)        
+        self.add_done_callback(Chain)
+        return future
+
+
+#==============================================================================
+class AVAPipeline(object):
+    """
+    Queues Tcl commands and sends them to the interpreter in a single write.
+
+    Public AVA methods called through the pipeline return PipelineFutures. Use
+    AVA.pipeline() or AVA.batch() to create one.
+    """
+    def __init__(self, av, raise_on_error=True):
+        self.av = av
+        self.raise_on_error = raise_on_error
+
+        # A list of (command, future) tuples that have not been sent yet.
+        self.queue = []
+
+    #==============================================================================
+    def __getattr__(self, name):
+        attribute = getattr(self.av, name)
+
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+
+        def Method(*args, **kwargs):
+            previous = self.av._pipeline
+            self.av._pipeline = self
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self.av._pipeline = previous
+
+        return Method
+
+    #==============================================================================
+    def __len__(self):
+        return len(self.queue)
+
+    #==============================================================================
+    def Queue(self, command):
+        self.av.log.debug(" - Tcl command (queued) - %s", command)
+        future = PipelineFuture(self)
+        self.queue.append((command, future))
+        return future
+
+    #==============================================================================
+    def Discard(self):
+        # Drop all of the queued commands without sending them.
+        for command, future in self.queue:
+            future.cancel()
+        self.queue = []
+
+    #==============================================================================
+    def execute(self):
+        """
+        Sends all of the queued commands and returns a list of their results,
+        in the order that they were queued.
+        """
+        results = self.Flush()
+
+        if self.raise_on_error:
+            for result in results:
+                if isinstance(result, Exception):
+                    raise result
+
+        return results
+
+    #==============================================================================
+    def Flush(self):
+        results = []
+
+        # The pipeline stays active while the responses are being read, so that any
+        # follow-up commands issued by PipelineFuture.Then() are queued as well.
+        previous = self.av._pipeline
+        self.av._pipeline = self
+        try:
+            while self.queue:
+                commands = self.queue
+                self.queue = []
+                results += self.Send(commands)
+        finally:
+            self.av._pipeline = previous
+
+        return results
+
+    #==============================================================================
+    def Send(self, commands):
+        results = []
+
+        responses = self.av.Submit([command for command, future in commands])
+
+        for (command, future), response in zip(commands, responses):
+            try:
+                result = self.av.DecodeResult(*response.result())
+            except Exception as errmsg:
+                results.append(errmsg)
+                future.set_exception(errmsg)
+            else:
+                results.append(result)
+                future.set_result(result)
+
+        return results
+
+
+###############################################################################
+####
+####    Interpreter Pool
+####
+###############################################################################
+class AVAPool(object):
+    """
+    A pool of AVA objects, each with its own Tcl interpreter, all logged into
+    the same Avalanche Automation session.
+
+    Read-only queries are sent to whichever interpreter is idle, so independent
+    queries run in parallel instead of one at a time on a single pipe.
+
+    Example
+        pool = AVAPool(4, apipath=apipath, workspace="Regression")
+        names = pool.map("get", [(handle, "name") for handle in handles])
+        pool.close()
+    """
+
+    # The methods that do not modify the configuration, and may therefore be sent
+    # to any of the interpreters.
+    READONLY_METHODS = ["get", "getMany", "get_many", "nodeExists", "handleOf", "getSessions"]
+
+    def __init__(self, size=4, apipath=None, tclinterpreter=None, tcllibpath=None, logpath=None, loglevel="DEBUG",
+                 userName="", password="", mode="", workspace=""):
+        """
+        Start 'size' AVA objects and log each of them in.
+
+        'apipath', 'tclinterpreter', 'tcllibpath', 'logpath' and 'loglevel' are passed to AVA.
+        'userName', 'password', 'mode' and 'workspace' are passed to AVA.login. They must
+              identify the session that the pool is to attach to.
+        """
+        self.size = size
+        self.workers = []
+
+        # The workers that are not currently executing a command.
+        self.idle = queue.Queue()
+
+        self.executor = ThreadPoolExecutor(max_workers=size)
+
+        # Starting tclsh and loading the API is slow, so all of the workers are started at once.
+        def StartWorker():
+            worker = AVA(apipath=apipath, tclinterpreter=tclinterpreter, tcllibpath=tcllibpath, logpath=logpath, loglevel=loglevel)
+            try:
+                worker.login(userName=userName, password=password, mode=mode, workspace=workspace)
+            except:
+                worker.CleanupTcl()
+                raise
+            return worker
+
+        futures = [self.executor.submit(StartWorker) for index in range(size)]
+
+        # Every worker must be collected before a failure is raised, or the
+        # interpreters that started after the failed one would be left running.
+        error = None
+        for future in futures:
+            try:
+                worker = future.result()
+            except Exception as errmsg:
+                if error is None:
+                    error = errmsg
+                continue
+
+            self.workers.append(worker)
+            self.idle.put(worker)
+
+        if error is not None:
+            self.close()
+            raise error
+
+        self.workers[0].log.info("AVAPool: " + str(size) + " interpreters attached to the sessions: " + str(self.workers[0].getSessions()))
+        return
+
+    #==============================================================================
+    def __getattr__(self, name):
+        if name not in self.READONLY_METHODS:
+            raise AttributeError("AVAPool only supports the read-only methods " + ", ".join(self.READONLY_METHODS) + ". Use an AVA object for '" + name + "'.")
+
+        def Method(*args, **kwargs):
+            return self.Call(name, *args, **kwargs)
+
+        return Method
+
+    #==============================================================================
+    def __enter__(self):
+        return self
+
+    #==============================================================================
+    def __exit__(self, *exc_info):
+        self.close()
+
+    #==============================================================================
+    def Call(self, methodname, *args, **kwargs):
+        # Runs the method on the next idle worker. Blocks until one is available.
+        worker = self.idle.get()
+        try:
+            return getattr(worker, methodname)(*args, **kwargs)
+        finally:
+            self.idle.put(worker)
+
+    #==============================================================================
+    def submit(self, methodname, *args, **kwargs):
+        """
+        Queue a read-only method call, and return a concurrent.futures.Future for its result.
+        """
+        if methodname not in self.READONLY_METHODS:
+            raise AttributeError("'" + methodname + "' is not a read-only method.")
+
+        return self.executor.submit(self.Call, methodname, *args, **kwargs)
+
+    #==============================================================================
+    def map(self, methodname, argslist):
+        """
+        Call the read-only method once for each tuple of arguments in argslist, using
+        all of the interpreters. Returns the results in the same order.
+        """
+        futures = [self.submit(methodname, *args) for args in argslist]
+        return [future.result() for future in futures]
+
+    #==============================================================================
+    def close(self):
+        """
+        Stop the interpreters. The session itself is left running (the workers do not log out).
+        """
+        self.executor.shutdown(wait=True)
+
+        for worker in self.workers:
+            worker.CleanupTcl()
 
+        self.workers = []
         return
 
 
+###############################################################################
+####
+####    Interpreter Daemon
+####
+###############################################################################
+class AttachedInterpreter(object):
+    """
+    A Tcl interpreter that is taken from an interpreter daemon (see avalanche_daemon.py),
+    in place of the Popen object of a local interpreter.
+
+    The daemon passes the stdin, stdout and stderr pipes of the interpreter over the
+    Unix socket, so the commands do not go through the daemon. The daemon kills the
+    interpreter once the socket is closed.
+    """
+    def __init__(self, address):
+        if not address.startswith("unix://"):
+            raise Exception("Unsupported interpreter daemon address: " + address)
+
+        if not hasattr(socket, "AF_UNIX") or not hasattr(socket.socket, "recvmsg"):
+            raise Exception("The interpreter daemon requires Python 3 on a Unix system.")
+
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.socket.connect(address[len("unix://"):])
+            message, descriptors = ReceiveDescriptors(self.socket)
+        except:
+            self.socket.close()
+            raise
+
+        self.info = json.loads(message)
+        if "error" in self.info:
+            self.socket.close()
+            raise Exception("The interpreter daemon failed: " + self.info["error"])
+
+        self.pid = self.info["pid"]
+        self.stdin = os.fdopen(descriptors[0], "wb")
+        self.stdout = os.fdopen(descriptors[1], "rb")
+        self.stderr = os.fdopen(descriptors[2], "rb")
+
+    #==============================================================================
+    def terminate(self):
+        # The daemon kills the interpreter once the socket is closed. The reader
+        # thread then sees the end of stdout, and closing the pipes does not block.
+        self.socket.close()
+        self.stdout.close()
+        self.stderr.close()
+
+    #==============================================================================
+    def wait(self, timeout=None):
+        return None
+
+#==============================================================================
+def ReceiveDescriptors(connection):
+    # Reads a message line and the file descriptors that were sent with it.
+    # See SendDescriptors in avalanche_daemon.py.
+    descriptors = array.array("i")
+    message = b""
+
+    while not message.endswith(b"\n"):
+        data, ancillary, flags, address = connection.recvmsg(65536, socket.CMSG_LEN(16 * descriptors.itemsize))
+        if not data:
+            raise Exception("The interpreter daemon closed the connection.")
+
+        message += data
+        for level, kind, payload in ancillary:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                descriptors.frombytes(payload[:len(payload) - len(payload) % descriptors.itemsize])
+
+    return message.decode("utf-8"), list(descriptors)
+
+
 ###############################################################################
 ####
 ####    Main
@@ -0,0 +1,571 @@
+###############################################################################
+#
+#                       Avalanche Python API - asyncio
+#                         by Spirent Communications
+#
+# Description: An asyncio version of the AVA class. Each public method of AVA
+#              is available as a coroutine. The Tcl interpreter is driven with
+#              asyncio subprocess pipes, so a single event loop can drive many
+#              interpreters at the same time.
+#
+#              This module requires Python 3.5 or later.
+#
+###############################################################################
+
+# Copyright (c) 2016 SPIRENT COMMUNICATIONS OF CALABASAS, INC.
+# All Rights Reserved
+#
+#                SPIRENT COMMUNICATIONS OF CALABASAS, INC.
+#                            LICENSE AGREEMENT
+#
+#  By accessing or executing this software, you agree to be bound by the terms
+#  of this agreement.
+#
+# Redistribution and use of this software in source and binary forms, with or
+# without modification, are permitted provided that the following conditions
+# are met:
+#  1. Redistribution of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  2. Redistribution's in binary form must reproduce the above copyright notice.
+#     This list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+#  3. Neither the name SPIRENT, SPIRENT COMMUNICATIONS, SMARTBITS, Spirent 
+#     TestCenter, Avalanche, nor the names of its contributors may be used to 
+#     endorse or promote products derived from this software without specific 
+#     prior written permission.
+#
+# This software is provided by the copyright holders and contributors [as is]
+# and any express or implied warranties, including, but not limited to, the
+# implied warranties of merchantability and fitness for a particular purpose
+# are disclaimed. In no event shall the Spirent Communications of Calabasas,
+# Inc. Or its contributors be liable for any direct, indirect, incidental,
+# special, exemplary, or consequential damages (including, but not limited to,
+# procurement of substitute goods or services; loss of use, data, or profits;
+# or business interruption) however caused and on any theory of liability,
+# whether in contract, strict liability, or tort (including negligence or
+# otherwise) arising in any way out of the use of this software, even if
+# advised of the possibility of such damage.
+#
+###############################################################################
+
+import asyncio
+import time
+
+from concurrent.futures import Future
+
+from avalanche import AVA, AVAPipeline, CommandVerb, ReportTimer, TclQuote, FRAME_MARKER, SERVER_TCL
+
+###############################################################################
+####
+####    Command Builder
+####
+###############################################################################
+class CommandBuilder(AVA):
+    """
+    An AVA object without a Tcl interpreter.
+
+    The AVA methods are called on this object with a pipeline active, so that
+    they only build and queue their Tcl commands. AsyncAVA then sends the
+    queued commands itself.
+    """
+    # AsyncAVA.Call times the method calls, including the wait for the responses.
+    TRACE_CALLS = False
+
+    def __init__(self, cachesize=0, cachettl=None, lazyload=False):
+        self.SetupState(cachesize, cachettl, lazyload)
+
+    #==============================================================================
+    def Exec(self, command):
+        if self._pipeline is None:
+            raise Exception("Commands can only be queued on a CommandBuilder.")
+
+        return AVA.Exec(self, command)
+
+    #==============================================================================
+    def CleanupTcl(self):
+        return
+
+
+###############################################################################
+####
+####    AsyncAVA
+####
+###############################################################################
+class AsyncAVA(object):
+    """
+    The asyncio version of AVA.
+
+    Use it as an asynchronous context manager, or call start() and close():
+
+        async with AsyncAVA(apipath="/opt/avalanche/api") as av:
+            await av.login(workspace="Regression")
+            project = await av.createProject(project="Project1")
+
+    Every public method of AVA is available as a coroutine with the same
+    arguments. The Tcl commands issued by a method are written in a single
+    write. Calls from different tasks may be in flight at the same time; each
+    response is matched to its command by request id.
+    """
+    def __init__(self, apipath=None, tclinterpreter=None, tcllibpath=None, logpath=None, loglevel="DEBUG",
+                 cachesize=0, cachettl=None, logformat="text", logresultsize=None, lazyload=False):
+        """
+        See AVA.__init__. The Tcl interpreter is not started until start() is called.
+        """
+        self.apipath = apipath
+        self.tcllibpath = tcllibpath
+
+        if tclinterpreter:
+            self.tcl_path = tclinterpreter.encode('unicode-escape').decode()
+        else:
+            self.tcl_path = "tclsh"
+
+        self._builder = CommandBuilder(cachesize, cachettl, lazyload)
+        self._builder.SetupLogging(apipath, logpath, loglevel, logformat, logresultsize)
+
+        self.cache = self._builder.cache
+
+        self.log = self._builder.log
+        self.logpath = self._builder.logpath
+        self.logfile = self._builder.logfile
+
+        self.tcl = None
+
+        # The commands that have been sent, but not answered yet, by request id.
+        self._pending = {}
+        self._requestid = 0
+        self._reader = None
+        self._drainlock = None
+        self._error = None
+
+    #==============================================================================
+    async def start(self):
+        """
+        Start the Tcl interpreter and load the Avalanche API.
+        """
+        self.log.info("-------------------------------------------------------------")
+        self.log.info("Tcl interpreter  = " + self.tcl_path)
+
+        # Stray output lines (anything that is not a response) must fit in the buffer.
+        self.tcl = await asyncio.create_subprocess_exec(self.tcl_path,
+                                                        stdin=asyncio.subprocess.PIPE,
+                                                        stdout=asyncio.subprocess.PIPE,
+                                                        stderr=asyncio.subprocess.PIPE,
+                                                        limit=1024 * 1024)
+
+        self.tcl.stdin.write(SERVER_TCL.encode("utf-8"))
+
+        self._drainlock = asyncio.Lock()
+        self._reader = asyncio.ensure_future(self.ReadLoop())
+
+        await self.Call("Initialize", self.apipath, self.tcllibpath)
+        return self
+
+    #==============================================================================
+    async def close(self):
+        """
+        Attempt to clean up the Tcl subprocess.
+        """
+        if self.tcl is None:
+            return
+
+        # The reader task must be finished before the pipes are closed.
+        self._reader.cancel()
+        await asyncio.gather(self._reader, return_exceptions=True)
+
+        self.tcl.stdin.close()
+        try:
+            self.tcl.terminate()
+        except ProcessLookupError:
+            pass
+
+        try:
+            await asyncio.wait_for(self.tcl.wait(), 0.5)
+        except asyncio.TimeoutError:
+            pass
+
+        self.tcl = None
+
+        self._builder.StopLogging()
+        return
+
+    #==============================================================================
+    async def __aenter__(self):
+        return await self.start()
+
+    #==============================================================================
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    #==============================================================================
+    async def Exec(self, command):
+        pipeline = AVAPipeline(self._builder)
+        future = pipeline.Queue(command)
+
+        await self.Flush(pipeline)
+        return future.result()
+
+    #==============================================================================
+    async def Call(self, methodname, *args, **kwargs):
+        # Runs the AVA method called "methodname" against the command builder, then sends
+        # the commands that it queued. Like the synchronous method, the first Tcl
+        # error is raised.
+        hooks = self._builder.hooks
+        for hook in hooks:
+            hook.before_call(methodname, args, kwargs)
+
+        started = time.time()
+        try:
+            pipeline = AVAPipeline(self._builder)
+            result = getattr(pipeline, methodname)(*args, **kwargs)
+
+            for value in await self.Flush(pipeline):
+                if isinstance(value, Exception):
+                    raise value
+        finally:
+            duration = time.time() - started
+            for hook in hooks:
+                hook.after_call(methodname, duration)
+
+        if isinstance(result, Future):
+            result = result.result()
+
+        return result
+
+    #==============================================================================
+    async def Flush(self, pipeline):
+        # Sends the queued commands of the pipeline and resolves their futures.
+        results = []
+
+        while pipeline.queue:
+            commands = pipeline.queue
+            pipeline.queue = []
+
+            responses = self.Submit([command for command, future in commands])
+
+            # Drain stdin while the responses are being read. Otherwise, the Tcl
+            # interpreter could block on a full stdout pipe while we wait for it to
+            # read its stdin.
+            writer = asyncio.ensure_future(self.Drain())
+
+            try:
+                for (command, future), response in zip(commands, responses):
+                    try:
+                        result = self._builder.DecodeResult(*await response)
+                    except Exception as errmsg:
+                        results.append(errmsg)
+                        self.Resolve(pipeline, future.set_exception, errmsg)
+                    else:
+                        results.append(result)
+                        self.Resolve(pipeline, future.set_result, result)
+            finally:
+                await writer
+
+        return results
+
+    #==============================================================================
+    def Resolve(self, pipeline, setter, value):
+        # The pipeline must be active while the future is resolved, so that the
+        # follow-up commands from PipelineFuture.Then() are queued in it.
+        previous = self._builder._pipeline
+        self._builder._pipeline = pipeline
+        try:
+            setter(value)
+        finally:
+            self._builder._pipeline = previous
+
+    #==============================================================================
+    def Submit(self, commands):
+        # See AVA.Submit. Returns asyncio futures, which are resolved by the reader task.
+        if self._error is not None:
+            raise Exception(self._error)
+
+        loop = asyncio.get_event_loop()
+
+        futures = []
+        tclcode = []
+        started = time.time()
+        for command in commands:
+            self._requestid += 1
+
+            future = loop.create_future()
+            self._pending[self._requestid] = (future, started, command)
+            futures.append(future)
+
+            for hook in self._builder.hooks:
+                hook.before_exec(command)
+
+            self.log.debug(" - Tcl command - %s", command, extra={"commandid": self._requestid})
+            tclcode.append(self._builder.EncodeCommand(self._requestid, command))
+
+        tclcode = b"".join(tclcode)
+        self._builder.metrics.Written(len(tclcode))
+
+        self.tcl.stdin.write(tclcode)
+        return futures
+
+    #==============================================================================
+    async def Drain(self):
+        # Older versions of asyncio do not allow concurrent drains.
+        async with self._drainlock:
+            await self.tcl.stdin.drain()
+
+    #==============================================================================
+    async def ReadLoop(self):
+        # The body of the reader task. See AVA.ReadLoop.
+        try:
+            while True:
+                requestid, status, result = await self.ReadResponse()
+
+                future, started, command = self._pending.pop(requestid)
+
+                duration = time.time() - started
+                self._builder.metrics.Command(CommandVerb(command), duration, len(result))
+
+                if not future.done():
+                    future.set_result((status, result, requestid, duration, command))
+
+        except asyncio.CancelledError:
+            self._error = "The Tcl interpreter has been closed."
+            raise
+
+        except Exception as errmsg:
+            self.log.error(errmsg)
+            self._error = str(errmsg)
+
+        finally:
+            # Fail everything that is still waiting for a response.
+            pending = self._pending
+            self._pending = {}
+
+            for future, started, command in pending.values():
+                if not future.done():
+                    future.set_exception(Exception(self._error))
+
+    #==============================================================================
+    async def ReadResponse(self):
+        # See AVA.ReadResponse.
+        while True:
+            line = await self.tcl.stdout.readline()
+
+            if not line:
+                raise Exception("The Tcl interpreter exited unexpectedly. " + await self.ReadStderr())
+
+            index = line.find(FRAME_MARKER)
+            if index != -1:
+                break
+
+            self.log.debug(" - Tcl output - %s", line.decode("utf-8", "replace").rstrip())
+
+        requestid, status, length = line[index + len(FRAME_MARKER):].split()
+
+        try:
+            result = await self.tcl.stdout.readexactly(int(length))
+        except asyncio.IncompleteReadError:
+            raise Exception("The Tcl interpreter exited unexpectedly. " + await self.ReadStderr())
+
+        return int(requestid), status, result
+
+    #==============================================================================
+    async def ReadStderr(self):
+        return (await self.tcl.stderr.read()).decode("utf-8", "replace")
+
+    #==============================================================================
+    def normalizePath(self, path):
+        return self._builder.normalizePath(path)
+
+    #==============================================================================
+    def addHook(self, hook):
+        """
+        See AVA.addHook. The method call hooks cover the wait for the responses.
+        """
+        return self._builder.addHook(hook)
+
+    #==============================================================================
+    def removeHook(self, hook):
+        """
+        See AVA.removeHook.
+        """
+        return self._builder.removeHook(hook)
+
+    #==============================================================================
+    def stats(self):
+        """
+        See AVA.stats.
+        """
+        return self._builder.stats()
+
+    #==============================================================================
+    def writeMetrics(self, path):
+        """
+        See AVA.writeMetrics.
+        """
+        return self._builder.writeMetrics(path)
+
+    #==============================================================================
+    def serveMetrics(self, port=0, host="127.0.0.1"):
+        """
+        See AVA.serveMetrics.
+        """
+        return self._builder.serveMetrics(port, host)
+
+    #==============================================================================
+    async def reserveAll(self, test, force=False, chassistype=""):
+        """
+        See AVA.reserveAll.
+        """
+        builder = self._builder
+        report = builder.ReservationReport()
+        timer = ReportTimer(report["timings"])
+
+        interfaces = builder.ReservationInterfaces(await self.Exec("::avapy::testInterfaces " + TclQuote(test)))
+        report["interfaces"] = interfaces
+        timer.Lap("discover")
+
+        chassislist = builder.ReservationChassis(interfaces)
+        requestids = await self.Call("ExecMany", [builder.ConnectCommand(chassisip, chassistype, "false") for chassisip in chassislist])
+        waits = [(chassisip, requestid) for chassisip, requestid in zip(chassislist, requestids) if not isinstance(requestid, Exception)]
+        results = await self.Call("ExecMany", ["av::waitUntilCommandIsDone " + str(requestid) for chassisip, requestid in waits])
+        builder.InvalidateCache()
+
+        builder.RecordConnections(report, chassislist, requestids, waits, results)
+        timer.Lap("connect")
+
+        index = builder.PortIndex(await self.Exec("::avapy::physicalPorts location physIf locationDisplayString locationString"))
+        timer.Lap("index")
+
+        commands, owners = builder.ReservationCommands(report, index, force)
+        results = await self.Call("ExecMany", commands)
+        builder.InvalidateCache()
+
+        builder.RecordReservations(report, owners, results)
+        timer.Lap("reserve")
+
+        timer.Total()
+        return report
+
+    #==============================================================================
+    async def releaseAll(self):
+        """
+        See AVA.releaseAll.
+        """
+        builder = self._builder
+
+        index = builder.PortIndex(await self.Exec("::avapy::physicalPorts location reservationState"))
+        locations = [location for location in index if index[location][1] == "Reserved by User"]
+
+        results = await self.Call("ExecMany", ["av::release " + location for location in locations])
+        builder.InvalidateCache()
+
+        return builder.ReleasedPorts(locations, results)
+
+    #==============================================================================
+    def stream(self, side, viewAttributesList, interval=1.0, count=None):
+        """
+        See AVA.stream. Returns an asynchronous iterator of StatsRecord:
+
+            async with av.stream("client", ["http,successfulConns"]) as records:
+                async for record in records:
+                    ...
+
+        av.unsubscribe is called when the iterator is exhausted or closed with aclose().
+        """
+        return StatsStream(self, side, viewAttributesList, interval, count)
+
+
+###############################################################################
+####
+####    Statistics
+####
+###############################################################################
+class StatsStream(object):
+    """
+    The asynchronous iterator of AsyncAVA.stream. See AVA.stream.
+    """
+    def __init__(self, av, side, viewAttributesList, interval, count):
+        self.av = av
+        self.side = side
+        self.viewAttributesList = viewAttributesList
+        self.interval = interval
+        self.count = count
+
+        self.dataset = None
+        self.samples = 0
+        self.deadline = None
+        self.closed = False
+
+    #==============================================================================
+    def __aiter__(self):
+        return self
+
+    #==============================================================================
+    async def __anext__(self):
+        if self.closed or (self.count is not None and self.samples >= self.count):
+            await self.aclose()
+            raise StopAsyncIteration
+
+        builder = self.av._builder
+
+        if self.dataset is None:
+            self.dataset = await self.av.subscribe(self.side, self.viewAttributesList)
+            self.deadline = time.time()
+
+        delay = self.deadline - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            self.deadline = time.time()
+
+        try:
+            record = builder.DataSetRecord(self.dataset, await self.av.Exec(builder.PollCommand(self.dataset)))
+        except BaseException:
+            await self.aclose()
+            raise
+
+        self.samples += 1
+        self.deadline += self.interval
+        return record
+
+    #==============================================================================
+    async def aclose(self):
+        """
+        Removes the subscription. Errors are only logged, as in AVA.stream.
+        """
+        if self.closed:
+            return
+
+        self.closed = True
+        if self.dataset is not None:
+            try:
+                await self.av.unsubscribe(self.dataset)
+            except Exception as errmsg:
+                self.av.log.error("Unable to unsubscribe " + self.dataset + ": " + str(errmsg))
+
+    #==============================================================================
+    async def __aenter__(self):
+        return self
+
+    #==============================================================================
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+#==============================================================================
+def Coroutine(name):
+    # Returns a coroutine method that runs the AVA method with the same name.
+    async def Method(self, *args, **kwargs):
+        return await self.Call(name, *args, **kwargs)
+
+    Method.__name__ = name
+    Method.__doc__ = getattr(AVA, name).__doc__
+    return Method
+
+
+# These AVA methods only issue Tcl commands whose results do not drive further
+# commands, so they can be run against the command builder as they are.
+for name in ["login", "logout", "config", "configMany", "config_many", "get", "getMany", "get_many", "perform",
+             "apply", "connect", "create", "createMany", "create_many",
+             "delete", "disconnect", "getEvents", "getSessions", "release", "reserve", "setABLLogAutoCleanup",
+             "downloadABLlogs", "subscribe", "unsubscribe", "waitUntilCommandIsDone", "handleOf",
+             "nodeExists", "createProject", "createTest", "getOrCreateNode", "waitEvent",
+             "DebugLogFile", "StopStatusMsg", "AnalyzeABLEvents"]:
+    setattr(AsyncAVA, name, Coroutine(name))
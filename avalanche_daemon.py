@@ -0,0 +1,322 @@
+###############################################################################
+#
+#                       Avalanche Python API - Interpreter Daemon
+#                         by Spirent Communications
+#
+# Description: Keeps Tcl interpreters that have already loaded the Avalanche
+#              API, and hands them to short-lived Python processes over a
+#              Unix socket, so that they do not pay for the startup.
+#
+# Usage:       python avalanche_daemon.py /tmp/avalanche.sock --apipath <path>
+#              av = AVA(connect="unix:///tmp/avalanche.sock")
+#
+###############################################################################
+
+# Copyright (c) 2016 SPIRENT COMMUNICATIONS OF CALABASAS, INC.
+# All Rights Reserved
+#
+#                SPIRENT COMMUNICATIONS OF CALABASAS, INC.
+#                            LICENSE AGREEMENT
+#
+#  By accessing or executing this software, you agree to be bound by the terms
+#  of this agreement.
+#
+# Redistribution and use of this software in source and binary forms, with or
+# without modification, are permitted provided that the following conditions
+# are met:
+#  1. Redistribution of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  2. Redistribution's in binary form must reproduce the above copyright notice.
+#     This list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+#  3. Neither the name SPIRENT, SPIRENT COMMUNICATIONS, SMARTBITS, Spirent
+#     TestCenter, Avalanche, nor the names of its contributors may be used to
+#     endorse or promote products derived from this software without specific
+#     prior written permission.
+#
+# This software is provided by the copyright holders and contributors [as is]
+# and any express or implied warranties, including, but not limited to, the
+# implied warranties of merchantability and fitness for a particular purpose
+# are disclaimed. In no event shall the Spirent Communications of Calabasas,
+# Inc. Or its contributors be liable for any direct, indirect, incidental,
+# special, exemplary, or consequential damages (including, but not limited to,
+# procurement of substitute goods or services; loss of use, data, or profits;
+# or business interruption) however caused and on any theory of liability,
+# whether in contract, strict liability, or tort (including negligence or
+# otherwise) arising in any way out of the use of this software, even if
+# advised of the possibility of such damage.
+#
+###############################################################################
+
+
+from __future__ import print_function
+
+import argparse
+import array
+import atexit
+import json
+import os
+import signal
+import socket
+import stat
+import sys
+import threading
+
+from avalanche import AVA
+
+###############################################################################
+####
+####    InterpreterDaemon
+####
+###############################################################################
+class InterpreterDaemon(object):
+    """
+    Keeps 'size' Tcl interpreters that have already loaded the Avalanche API, and
+    hands one to each client that connects to the Unix socket at 'path':
+
+        av = AVA(connect="unix://" + path)
+
+    The client uses the interpreter directly, through its own pipes, so the commands 
+    do not go through the daemon. Each interpreter is used by a single client. It
+    is killed when the client closes the connection (or exits), and the daemon 
+    starts a new one in the background.
+
+    The other arguments are passed to AVA (eg: apipath, tclinterpreter, tcllibpath,
+    logpath and loglevel), for the interpreters of the daemon.
+    """
+    def __init__(self, path, size=2, **options):
+        if not hasattr(socket, "AF_UNIX") or not hasattr(socket.socket, "sendmsg"):
+            raise Exception("The interpreter daemon requires Python 3 on a Unix system.")
+
+        self.path = path
+        self.size = size
+        self.options = options
+
+        # The interpreters that are ready to be handed out.
+        self.ready = []
+        self.condition = threading.Condition()
+        self.stopping = False
+
+        self.starter = threading.Thread(target=self.StartLoop, name="AVA daemon starter")
+        self.starter.daemon = True
+
+        self.server = None
+
+    #==============================================================================
+    def serve_forever(self):
+        """
+        Starts the interpreters and accepts the clients, until close() is called.
+        """
+        self.RemoveStaleSocket()
+
+        # The clients get the pipes of interpreters that may be logged in, so only
+        # this user may connect. The socket is created with these permissions, so
+        # that no other user can connect before the chmod.
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0o177)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(umask)
+        os.chmod(self.path, 0o600)
+        server.listen(64)
+        self.server = server
+
+        self.starter.start()
+
+        try:
+            while not self.stopping:
+                try:
+                    connection, address = server.accept()
+                except (OSError, socket.error):
+                    if self.stopping:
+                        break
+                    raise
+
+                client = threading.Thread(target=self.HandleClient, args=(connection,), name="AVA daemon client")
+                client.daemon = True
+                client.start()
+        finally:
+            self.close()
+
+    #==============================================================================
+    def RemoveStaleSocket(self):
+        # Removes a socket that is left over from a daemon that did not exit cleanly.
+        # Anything else at the path (a running daemon, or another file) is an error.
+        if not os.path.exists(self.path):
+            return
+
+        if not stat.S_ISSOCK(os.stat(self.path).st_mode):
+            raise Exception("Not a socket: " + self.path)
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except (OSError, socket.error):
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+
+        raise Exception("Another interpreter daemon is already listening on " + self.path)
+
+    #==============================================================================
+    def close(self):
+        """
+        Stops accepting clients, and kills the interpreters that are not handed out.
+        """
+        with self.condition:
+            self.stopping = True
+            ready = self.ready
+            self.ready = []
+            server = self.server
+            self.server = None
+            self.condition.notify_all()
+
+        if server is not None:
+            # Closing the socket does not wake up an accept() in another thread.
+            try:
+                server.shutdown(socket.SHUT_RDWR)
+            except (OSError, socket.error):
+                pass
+            server.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+        for av in ready:
+            self.Discard(av)
+
+    #==============================================================================
+    def StartLoop(self):
+        # The body of the starter thread. Keeps 'size' interpreters ready.
+        while True:
+            with self.condition:
+                while not self.stopping and len(self.ready) >= self.size:
+                    self.condition.wait()
+
+                if self.stopping:
+                    return
+
+            try:
+                av = AVA(**self.options)
+            except Exception as errmsg:
+                with self.condition:
+                    if self.stopping:
+                        return
+
+                    print("Unable to start a Tcl interpreter: " + str(errmsg), file=sys.stderr)
+                    self.condition.wait(5)
+                continue
+
+            with self.condition:
+                if self.stopping:
+                    stopped = True
+                else:
+                    stopped = False
+                    self.ready.append(av)
+                    self.condition.notify_all()
+
+            if stopped:
+                self.Discard(av)
+
+    #==============================================================================
+    def Take(self):
+        # Returns an interpreter that is ready, waiting for one if needed.
+        with self.condition:
+            while not self.stopping and not self.ready:
+                self.condition.wait()
+
+            if self.stopping:
+                raise Exception("The interpreter daemon is stopping.")
+
+            av = self.ready.pop(0)
+            self.condition.notify_all()
+
+        return av
+
+    #==============================================================================
+    def HandleClient(self, connection):
+        # Hands an interpreter to the client, then waits for the client to close the
+        # connection.
+        av = None
+        try:
+            try:
+                av = self.Take()
+                tcl = av.Detach()
+            except Exception as errmsg:
+                SendDescriptors(connection, json.dumps({"error": str(errmsg)}), [])
+                return
+
+            info = {"pid": tcl.pid, "tclinterpreter": av.tcl_path, "apipath": av.apipath, "logfile": av.logfile}
+            SendDescriptors(connection, json.dumps(info), [tcl.stdin.fileno(), tcl.stdout.fileno(), tcl.stderr.fileno()])
+
+            # The client has its own copies of the pipes. The interpreter only sees 
+            # the end of its input once all of the copies are closed.
+            tcl.stdin.close()
+            tcl.stdout.close()
+            tcl.stderr.close()
+
+            while connection.recv(4096):
+                pass
+
+        except (OSError, socket.error):
+            pass
+
+        finally:
+            connection.close()
+            if av is not None:
+                self.Discard(av)
+
+    #==============================================================================
+    def Discard(self, av):
+        # Kills the interpreter, and forgets the AVA object.
+        av.CleanupTcl()
+
+        if hasattr(atexit, "unregister"):
+            atexit.unregister(av.CleanupTcl)
+
+#==============================================================================
+def SendDescriptors(connection, message, descriptors):
+    # Sends a message line, with the file descriptors. See ReceiveDescriptors in
+    # avalanche.py.
+    ancillary = []
+    if descriptors:
+        ancillary = [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", descriptors))]
+
+    connection.sendmsg([(message + "\n").encode("utf-8")], ancillary)
+
+
+###############################################################################
+####
+####    Main
+####
+###############################################################################
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep Tcl interpreters with the Avalanche API loaded, for AVA(connect=\"unix://<socket>\").")
+    parser.add_argument("socket", help="the path of the Unix socket")
+    parser.add_argument("--size", type=int, default=2, help="the number of interpreters that are kept ready")
+    parser.add_argument("--apipath", required=True, help="the location of the Avalanche API")
+    parser.add_argument("--tclsh", default=None, help="the Tcl interpreter")
+    parser.add_argument("--tcllibpath", default=None, help="additional Tcl libraries")
+    parser.add_argument("--logpath", default=None, help="where to write the logs of the interpreters")
+    parser.add_argument("--loglevel", default="INFO", help="the log level of the interpreters")
+    options = parser.parse_args(argv)
+
+    daemon = InterpreterDaemon(options.socket, options.size, apipath=options.apipath, tclinterpreter=options.tclsh,
+                               tcllibpath=options.tcllibpath, logpath=options.logpath, loglevel=options.loglevel)
+
+    def Stop(signum, frame):
+        daemon.close()
+
+    signal.signal(signal.SIGTERM, Stop)
+
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        daemon.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
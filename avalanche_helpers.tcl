@@ -0,0 +1,162 @@
+###############################################################################
+#
+#                   Avalanche Python API - Tcl Helpers
+#                         by Spirent Communications
+#
+# Description: The Tcl procedures used by avalanche.py. AVA.Initialize sources
+#              this file in the Tcl interpreter, before or after loading the
+#              Avalanche API (the procedures only call av:: when they run).
+#
+###############################################################################
+
+namespace eval ::avapy {}
+
+#==============================================================================
+# Use Tcl to convert the list into a Python-friendly dict string.
+proc isnumeric value {
+    if {![catch {expr {abs($value)}}]} {
+        return 1
+    }
+    set value [string trimleft $value 0]
+    if {![catch {expr {abs($value)}}]} {
+        return 1
+    }
+    return 0
+}
+
+proc tclList2Dict { args } {
+    set result $args
+    set output {}
+    foreach {key value} $result {
+        regsub {^-} $key {} key
+        if { [isnumeric $value] } {
+            append output "'$key': $value, "
+        } else {
+            regsub -all {'} $value {\'} value
+            regsub -all {"} $value {\"} value
+            append output "'$key': '$value', "
+        }
+    }
+
+    regsub {, $} $output {} output
+    set output [list $output]
+    return $output
+}
+
+###############################################################################
+#   Bulk commands. Each result is a {status result} pair, where a status of 1
+#   is an error. See AVA.ConvertItem.
+###############################################################################
+proc ::avapy::getMany { handles attributes } {
+    set output {}
+    foreach handle $handles {
+        if { [llength $attributes] == 0 } {
+            set status [catch {av::get $handle} value]
+            lappend output [list $status $value]
+            continue
+        }
+        set values {}
+        foreach attribute $attributes {
+            set status [catch {av::get $handle -$attribute} value]
+            lappend values [list $status $value]
+        }
+        lappend output $values
+    }
+    return $output
+}
+
+#==============================================================================
+# Returns a list of {interface port adminIPAddress} for each interface of the test.
+proc ::avapy::testInterfaces { test } {
+    set output {}
+    foreach config [av::get $test -configuration] {
+        foreach topology [av::get $config -topology] {
+            foreach interface [av::get $topology -interface] {
+                lappend output [list $interface [av::get $interface -port] [av::get $interface -adminIPAddress]]
+            }
+        }
+    }
+    return $output
+}
+
+#==============================================================================
+# Returns a list of {port attribute ...} for each physical port of the connected chassis.
+proc ::avapy::physicalPorts { args } {
+    set output {}
+    foreach chassis [av::get system1.physicalchassismanager -physicalchassis] {
+        foreach module [av::get $chassis -physicaltestmodules] {
+            foreach port [av::get $module -ports] {
+                set values [list $port]
+                foreach attribute $args {
+                    lappend values [av::get $port -$attribute]
+                }
+                lappend output $values
+            }
+        }
+    }
+    return $output
+}
+
+#==============================================================================
+# Returns {clock {rdo attributes rdo attributes ...}} for a ResultDataSet. See av.stream.
+proc ::avapy::pollDataSet { dataset } {
+    set output {}
+    foreach object [av::get $dataset -resultdataobjects] {
+        lappend output $object [av::get $object]
+    }
+    # Tcl 8.4 does not have "clock milliseconds".
+    if {[catch {clock milliseconds} now]} {
+        set now [expr {[clock seconds] * 1000}]
+    }
+    return [list $now $output]
+}
+
+#==============================================================================
+proc ::avapy::evalMany { scripts } {
+    set output {}
+    foreach script $scripts {
+        set status [expr {[catch {uplevel #0 $script} value] == 1}]
+        lappend output [list $status $value]
+    }
+    return $output
+}
+
+###############################################################################
+#   Loading the API
+###############################################################################
+proc ::avapy::loadApi {} {
+    package require av
+
+    # I hate these status messages.
+    av::StopStatusMsg on
+}
+
+#==============================================================================
+# Loads the API when the first av:: command (eg: av::login) is called, then runs
+# that command. The other unknown commands go to the original ::unknown. If the
+# API can not be loaded, the error is raised and the next av:: command tries
+# again. See the lazyload argument of AVA.
+proc ::avapy::loadApiOnFirstUse {} {
+    set ::avapy::loading 0
+    rename ::unknown ::avapy::unknown
+
+    proc ::unknown { args } {
+        set name [string trimleft [lindex $args 0] :]
+        if { $::avapy::loading || ![string match av::* $name] } {
+            return [uplevel 1 [linsert $args 0 ::avapy::unknown]]
+        }
+
+        set ::avapy::loading 1
+        set status [catch {::avapy::loadApi} result]
+        set ::avapy::loading 0
+
+        if { $status } {
+            return -code error -errorinfo $::errorInfo -errorcode $::errorCode $result
+        }
+
+        rename ::unknown {}
+        rename ::avapy::unknown ::unknown
+
+        return [uplevel 1 $args]
+    }
+}
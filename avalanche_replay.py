@@ -0,0 +1,322 @@
+###############################################################################
+#
+#                       Avalanche Python API - Record/Replay
+#                         by Spirent Communications
+#
+# Description: Records the Tcl commands of an AVA object, with their results
+#              and durations, and replays them: either in place of a Tcl
+#              interpreter (ReplayAVA), or against a live interpreter to
+#              compare the latencies (Replay).
+#
+# Usage:       python avalanche_replay.py recording.jsonl --apipath <path>
+#
+###############################################################################
+
+# Copyright (c) 2016 SPIRENT COMMUNICATIONS OF CALABASAS, INC.
+# All Rights Reserved
+#
+#                SPIRENT COMMUNICATIONS OF CALABASAS, INC.
+#                            LICENSE AGREEMENT
+#
+#  By accessing or executing this software, you agree to be bound by the terms
+#  of this agreement.
+#
+# Redistribution and use of this software in source and binary forms, with or
+# without modification, are permitted provided that the following conditions
+# are met:
+#  1. Redistribution of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  2. Redistribution's in binary form must reproduce the above copyright notice.
+#     This list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+#  3. Neither the name SPIRENT, SPIRENT COMMUNICATIONS, SMARTBITS, Spirent
+#     TestCenter, Avalanche, nor the names of its contributors may be used to
+#     endorse or promote products derived from this software without specific
+#     prior written permission.
+#
+# This software is provided by the copyright holders and contributors [as is]
+# and any express or implied warranties, including, but not limited to, the
+# implied warranties of merchantability and fitness for a particular purpose
+# are disclaimed. In no event shall the Spirent Communications of Calabasas,
+# Inc. Or its contributors be liable for any direct, indirect, incidental,
+# special, exemplary, or consequential damages (including, but not limited to,
+# procurement of substitute goods or services; loss of use, data, or profits;
+# or business interruption) however caused and on any theory of liability,
+# whether in contract, strict liability, or tort (including negligence or
+# otherwise) arising in any way out of the use of this software, even if
+# advised of the possibility of such damage.
+#
+###############################################################################
+
+
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import sys
+import threading
+import time
+
+from concurrent.futures import Future
+
+from avalanche import AVA, CommandVerb, ExecHooks, Percentile
+
+# The version of the recording format.
+RECORDING_VERSION = 1
+
+###############################################################################
+####
+####    Recording
+####
+###############################################################################
+class CommandRecorder(ExecHooks):
+    """
+    Records each Tcl command, its response and its duration in a JSON lines file.
+
+    Example
+        recorder = av.addHook(CommandRecorder("setup.jsonl"))
+        ...
+        av.removeHook(recorder)
+        recorder.close()
+
+    The first line is a header. Each following line is one command:
+        {"id": 1, "time": 0.0123, "command": "av::get system1 -user",
+         "status": 0, "result": "admin", "duration": 0.0004}
+    where "time" is when the command was sent (in seconds, from the start of the
+    recording), "status" is 1 for a Tcl error and "duration" is the time (in
+    seconds) until the response was read.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.count = 0
+
+        self.file = open(path, "w")
+        self.Write({"type": "header", "version": RECORDING_VERSION, "started": self.started})
+
+    #==============================================================================
+    def Write(self, entry):
+        self.file.write(json.dumps(entry) + "\n")
+
+    #==============================================================================
+    def on_response(self, command, status, result, duration):
+        if command is None:
+            return
+
+        sent = time.time() - duration - self.started
+
+        with self.lock:
+            if self.file is None:
+                return
+
+            self.count += 1
+            self.Write({"id": self.count, "time": round(sent, 6), "command": command,
+                        "status": status, "result": result, "duration": round(duration, 6)})
+
+    #==============================================================================
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+#==============================================================================
+def ReadRecording(path):
+    """
+    Returns the commands of a recording (see CommandRecorder), as a list of
+    dictionaries, in the order that they were sent.
+    """
+    entries = []
+    with open(path) as recording:
+        for line in recording:
+            line = line.strip()
+            if not line:
+                continue
+
+            entry = json.loads(line)
+            if entry.get("type") == "header":
+                if entry.get("version") != RECORDING_VERSION:
+                    raise Exception("Unsupported recording version: " + str(entry.get("version")))
+                continue
+
+            entries.append(entry)
+
+    entries.sort(key=lambda entry: entry["time"])
+    return entries
+
+
+###############################################################################
+####
+####    Replay
+####
+###############################################################################
+class ReplayAVA(AVA):
+    """
+    An AVA object that answers the Tcl commands from a recording, instead of
+    running them in a Tcl interpreter.
+
+    Each command is answered with the next recorded response to the same command
+    (the last one is repeated once they are used up). A command that was not
+    recorded fails with a Tcl error.
+
+    'realtime' makes each command take as long as it did when it was recorded.
+    The other arguments are the same as for AVA.
+
+    Example
+        av = ReplayAVA("setup.jsonl", logpath="/tmp/replay")
+        project = av.createProject(name="Project1")
+    """
+    def __init__(self, recording, realtime=False, logpath=None, loglevel="DEBUG",
+                 cachesize=0, cachettl=None, logformat="text", logresultsize=None):
+        self.SetupState(cachesize, cachettl)
+
+        self.realtime = realtime
+
+        # command -> deque of the recorded responses.
+        self.responses = collections.defaultdict(collections.deque)
+        for entry in ReadRecording(recording):
+            self.responses[entry["command"]].append(entry)
+
+        self.SetupLogging(recording, logpath, loglevel, logformat, logresultsize)
+        self.log.info("Replaying " + recording)
+
+    #==============================================================================
+    def Submit(self, commands):
+        # See AVA.Submit. The futures are resolved from the recording.
+        futures = []
+
+        for command in commands:
+            with self._pendinglock:
+                self._requestid += 1
+                requestid = self._requestid
+
+                recorded = self.responses.get(command)
+                if recorded:
+                    entry = recorded[0]
+                    if len(recorded) > 1:
+                        recorded.popleft()
+                else:
+                    entry = {"status": 1, "result": "No recorded response for: " + command, "duration": 0.0}
+
+            for hook in self.hooks:
+                hook.before_exec(command)
+
+            self.log.debug(" - Tcl command - %s", command, extra={"commandid": requestid})
+
+            if self.realtime:
+                time.sleep(entry["duration"])
+
+            result = entry["result"].encode("utf-8")
+            self.metrics.Command(CommandVerb(command), entry["duration"], len(result))
+
+            future = Future()
+            future.set_result((str(entry["status"]).encode("ascii"), result, requestid, entry["duration"], command))
+            futures.append(future)
+
+        return futures
+
+    #==============================================================================
+    def CleanupTcl(self):
+        self._closing = True
+
+        self.StopEventPump(wait=False)
+
+        self.StopLogging()
+        return
+
+#==============================================================================
+def Replay(recording, av, speed="max"):
+    """
+    Re-issues the commands of a recording against a live AVA object, and compares
+    the latencies with the recorded ones.
+
+    'speed' is "max", to send each command as soon as the previous one is answered,
+            or "original", to send each command at the same time (from the start)
+            as it was recorded.
+
+    Returns a report dictionary:
+        "commands":    the number of commands replayed.
+        "mismatches":  a list of {"id", "command", "recorded", "replayed"} for the
+                       commands whose status (success or error) changed.
+        "verbs":       a dictionary of {verb: {"count", "recorded", "replayed",
+                       "recorded_p95", "replayed_p95", "difference"}}, with the total
+                       durations in seconds. "difference" is replayed - recorded.
+        "recorded":    the total recorded duration of the commands.
+        "replayed":    the total replayed duration of the commands.
+        "elapsed":     the time taken by the replay.
+    """
+    if speed not in ("max", "original"):
+        raise Exception("Unknown replay speed: " + str(speed))
+
+    entries = ReadRecording(recording)
+
+    # verb -> ([recorded durations], [replayed durations]), in order of appearance.
+    verbs = collections.OrderedDict()
+    mismatches = []
+
+    started = time.time()
+    for entry in entries:
+        if speed == "original":
+            delay = entry["time"] - (time.time() - started)
+            if delay > 0:
+                time.sleep(delay)
+
+        status, result, requestid, duration, command = av.Submit([entry["command"]])[0].result()
+        status = int(status)
+
+        if status != entry["status"]:
+            mismatches.append({"id": entry["id"], "command": entry["command"],
+                               "recorded": entry["status"], "replayed": status})
+
+        samples = verbs.setdefault(CommandVerb(entry["command"]), ([], []))
+        samples[0].append(entry["duration"])
+        samples[1].append(duration)
+
+    elapsed = time.time() - started
+
+    report = {"commands": len(entries), "mismatches": mismatches, "verbs": {},
+              "recorded": 0.0, "replayed": 0.0, "elapsed": elapsed}
+
+    for verb, (recorded, replayed) in verbs.items():
+        report["verbs"][verb] = {"count": len(recorded),
+                                 "recorded": sum(recorded), "replayed": sum(replayed),
+                                 "recorded_p95": Percentile(sorted(recorded), 0.95),
+                                 "replayed_p95": Percentile(sorted(replayed), 0.95),
+                                 "difference": sum(replayed) - sum(recorded)}
+        report["recorded"] += sum(recorded)
+        report["replayed"] += sum(replayed)
+
+    return report
+
+
+###############################################################################
+####
+####    Main
+####
+###############################################################################
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recording of Avalanche API commands against a Tcl interpreter.")
+    parser.add_argument("recording", help="the JSON lines file written by CommandRecorder")
+    parser.add_argument("--speed", choices=["max", "original"], default="max", help="send the commands back to back, or at their recorded times")
+    parser.add_argument("--apipath", required=True, help="the location of the Avalanche API")
+    parser.add_argument("--tclsh", default=None, help="the Tcl interpreter")
+    parser.add_argument("--tcllibpath", default=None, help="additional Tcl libraries")
+    parser.add_argument("--logpath", default=None, help="where to write the log")
+    parser.add_argument("--loglevel", default="INFO", help="the log level")
+    options = parser.parse_args(argv)
+
+    av = AVA(apipath=options.apipath, tclinterpreter=options.tclsh, tcllibpath=options.tcllibpath,
+             logpath=options.logpath, loglevel=options.loglevel)
+    try:
+        report = Replay(options.recording, av, options.speed)
+    finally:
+        av.CleanupTcl()
+
+    print(json.dumps(report, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
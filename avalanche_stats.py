@@ -0,0 +1,459 @@
+###############################################################################
+#
+#                       Avalanche Python API - Statistics Store
+#                         by Spirent Communications
+#
+# Description: A fixed-size, columnar store for the runtime statistics read
+#              by av.stream, with helpers for deltas, rates and window
+#              aggregates. Older samples can be spilled to a file. NumPy is
+#              used if it is installed.
+#
+###############################################################################
+
+# Copyright (c) 2016 SPIRENT COMMUNICATIONS OF CALABASAS, INC.
+# All Rights Reserved
+#
+#                SPIRENT COMMUNICATIONS OF CALABASAS, INC.
+#                            LICENSE AGREEMENT
+#
+#  By accessing or executing this software, you agree to be bound by the terms
+#  of this agreement.
+#
+# Redistribution and use of this software in source and binary forms, with or
+# without modification, are permitted provided that the following conditions
+# are met:
+#  1. Redistribution of source code must retain the above copyright notice,
+#     this list of conditions and the following disclaimer.
+#  2. Redistribution's in binary form must reproduce the above copyright notice.
+#     This list of conditions and the following disclaimer in the documentation
+#     and/or other materials provided with the distribution.
+#  3. Neither the name SPIRENT, SPIRENT COMMUNICATIONS, SMARTBITS, Spirent
+#     TestCenter, Avalanche, nor the names of its contributors may be used to
+#     endorse or promote products derived from this software without specific
+#     prior written permission.
+#
+# This software is provided by the copyright holders and contributors [as is]
+# and any express or implied warranties, including, but not limited to, the
+# implied warranties of merchantability and fitness for a particular purpose
+# are disclaimed. In no event shall the Spirent Communications of Calabasas,
+# Inc. Or its contributors be liable for any direct, indirect, incidental,
+# special, exemplary, or consequential damages (including, but not limited to,
+# procurement of substitute goods or services; loss of use, data, or profits;
+# or business interruption) however caused and on any theory of liability,
+# whether in contract, strict liability, or tort (including negligence or
+# otherwise) arising in any way out of the use of this software, even if
+# advised of the possibility of such damage.
+#
+###############################################################################
+
+
+from __future__ import print_function
+
+import array
+import csv
+import json
+import math
+import os
+import sys
+
+try:
+    import numpy
+except ImportError:
+    # The store works without NumPy. The columns are then returned as arrays,
+    # and the helpers are computed in Python.
+    numpy = None
+
+# The version of the spill file header.
+SPILL_VERSION = 1
+
+NAN = float("nan")
+
+# The number of values that ReadSpill reads at a time without NumPy.
+READ_SLICE = 65536
+
+###############################################################################
+####
+####    StatsStore
+####
+###############################################################################
+class StatsStore(object):
+    """
+    Keeps the samples of runtime statistics in a fixed amount of memory.
+
+    Each counter is a column of 'capacity' float64 values (an array.array, which
+    NumPy can use without a copy), and all of the columns share one column of 
+    timestamps. Once the store is full, each new sample overwrites the oldest one.
+
+    'capacity' is the number of samples that are kept in memory.
+    'spill'    optionally specifies a file where the samples are written before they
+               are overwritten, in chunks of 'chunk' samples. A ".csv" file is 
+               written as CSV. Any other file is written as raw float64 rows (the 
+               timestamp, then each column), which ReadSpill maps into memory. The 
+               column names are written to <spill>.json.
+               Call flush() (or close()) to also write the samples that are still 
+               in memory.
+
+    The records of av.stream are stored with one column per ResultDataObject and
+    counter, named "<ResultDataObject>/<counter>". The methods that take a column 
+    name also accept a bare counter name, as long as a single ResultDataObject 
+    has that counter.
+
+    Counters that first appear after the first sample are back-filled with NaN. 
+    Once samples have been spilled, the columns are fixed, and new counters are 
+    ignored (they are counted in 'ignored').
+
+    Example
+        store = StatsStore(capacity=86400, spill="soak.bin")
+        for record in av.stream("client", ["http,successfulConns"], interval=1):
+            store.add(record)
+            if store.window("http,successfulConns", seconds=60)["max"] > limit:
+                break
+        store.close()
+
+        print(store.rates("http,successfulConns"))
+    """
+    def __init__(self, capacity=3600, spill=None, chunk=None):
+        if capacity < 1:
+            raise Exception("The capacity of a StatsStore must be at least 1.")
+
+        self.capacity = capacity
+        self.chunk = min(capacity, chunk or max(1, capacity // 8))
+
+        self.timestamps = self.Column()
+        self.columns = {}
+        self.names = []
+
+        # The number of samples that have been added, and how many of them have
+        # been written to the spill file.
+        self.count = 0
+        self.spilled = 0
+        self.ignored = 0
+
+        self.spill = spill
+        self.spillfile = None
+        # Whether the spill file has been created (with its header). The columns are
+        # then fixed, and the file is only appended to, also after close().
+        self.spillstarted = False
+
+    #==============================================================================
+    def Column(self):
+        return array.array("d", [NAN]) * self.capacity
+
+    #==============================================================================
+    def add(self, record):
+        """
+        Adds a StatsRecord from av.stream as one sample, at the time of the record.
+        Each numeric attribute of each ResultDataObject is stored in the column
+        "<ResultDataObject>/<attribute>".
+        """
+        values = {}
+        for rdo, attributes in record.objects.items():
+            if isinstance(attributes, Exception):
+                continue
+
+            for key, value in attributes.items():
+                if key != "timestamp" and isinstance(value, (int, float)):
+                    values[rdo + "/" + key] = value
+
+        self.append(record.time, values)
+
+    #==============================================================================
+    def append(self, timestamp, values):
+        """
+        Adds one sample: a timestamp (in seconds) and a dictionary of {counter: value}.
+        The counters that are missing from the sample are stored as NaN.
+        """
+        index = self.count % self.capacity
+
+        # The row that is about to be overwritten must be spilled first.
+        if self.spill is not None and self.count - self.spilled >= self.capacity:
+            self.Spill(self.spilled + self.chunk)
+
+        self.timestamps[index] = timestamp
+        for name, column in self.columns.items():
+            column[index] = values.get(name, NAN)
+
+        for name in values:
+            if name in self.columns:
+                continue
+
+            if self.spillstarted:
+                self.ignored += 1
+                continue
+
+            column = self.Column()
+            column[index] = values[name]
+            self.columns[name] = column
+            self.names.append(name)
+
+        self.count += 1
+
+    #==============================================================================
+    def __len__(self):
+        # The number of samples in memory.
+        return min(self.count, self.capacity)
+
+    #==============================================================================
+    def Ordered(self, column, first=None):
+        # Returns the samples of the column that are still in memory, from the
+        # oldest to the newest (or from sample number 'first').
+        oldest = max(0, self.count - self.capacity)
+        if first is None or first < oldest:
+            first = oldest
+
+        start = first % self.capacity
+        end = self.count % self.capacity
+
+        if first >= self.count:
+            parts = []
+        elif start < end:
+            parts = [(start, end)]
+        else:
+            parts = [(start, self.capacity), (0, end)]
+
+        if numpy is not None:
+            values = numpy.frombuffer(column, dtype=numpy.float64)
+            return numpy.concatenate([values[begin:stop] for begin, stop in parts] or [values[:0]])
+
+        result = array.array("d")
+        for begin, stop in parts:
+            result.extend(column[begin:stop])
+        return result
+
+    #==============================================================================
+    def times(self):
+        """
+        Returns the timestamps of the samples in memory, from the oldest to the newest.
+        A NumPy array if NumPy is installed, an array.array otherwise.
+        """
+        return self.Ordered(self.timestamps)
+
+    #==============================================================================
+    def column(self, name):
+        """
+        Returns the values of a counter in memory, from the oldest to the newest.
+        A NumPy array if NumPy is installed, an array.array otherwise.
+        """
+        return self.Ordered(self.columns[self.ColumnName(name)])
+
+    #==============================================================================
+    def ColumnName(self, name):
+        # Returns the column of 'name', which is either a column name or a counter
+        # that a single ResultDataObject has.
+        if name in self.columns:
+            return name
+
+        matches = [column for column in self.names if column.endswith("/" + name)]
+        if len(matches) == 1:
+            return matches[0]
+
+        if matches:
+            raise Exception("Ambiguous counter: " + str(name) + " (" + ", ".join(matches) + ")")
+        raise Exception("Unknown counter: " + str(name))
+
+    #==============================================================================
+    def deltas(self, name):
+        """
+        Returns the difference between each sample of a counter and the previous one
+        (one value less than column(name)).
+        """
+        values = self.column(name)
+
+        if numpy is not None:
+            return numpy.diff(values)
+
+        return array.array("d", [values[index] - values[index - 1] for index in range(1, len(values))])
+
+    #==============================================================================
+    def rates(self, name):
+        """
+        Returns the rate of change (per second) of a counter between each sample and 
+        the previous one. The rate is NaN if two samples have the same timestamp.
+        """
+        values = self.column(name)
+        times = self.times()
+
+        if numpy is not None:
+            elapsed = numpy.diff(times)
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                return numpy.where(elapsed > 0, numpy.diff(values) / elapsed, NAN)
+
+        rates = array.array("d")
+        for index in range(1, len(values)):
+            elapsed = times[index] - times[index - 1]
+            if elapsed > 0:
+                rates.append((values[index] - values[index - 1]) / elapsed)
+            else:
+                rates.append(NAN)
+        return rates
+
+    #==============================================================================
+    def window(self, name, seconds=None, samples=None):
+        """
+        Returns the aggregates of a counter over the most recent samples: the last
+        'samples' samples, or those of the last 'seconds' seconds (from the newest 
+        timestamp), or all of the samples in memory. NaN values are skipped.
+
+        Returns a dictionary of {"count", "first", "last", "min", "max", "mean", "sum", 
+        "p50", "p95", "p99"}. The values are None if there are no samples.
+        """
+        values = self.column(name)
+
+        if samples is not None:
+            values = values[len(values) - min(samples, len(values)):]
+        elif seconds is not None and len(values):
+            times = self.times()
+            since = times[-1] - seconds
+            if numpy is not None:
+                first = int(numpy.searchsorted(times, since, side="left"))
+            else:
+                first = 0
+                while first < len(times) and times[first] < since:
+                    first += 1
+            values = values[first:]
+
+        if numpy is not None:
+            values = values[~numpy.isnan(values)]
+            count = len(values)
+            if not count:
+                return self.Aggregates(0)
+
+            ordered = numpy.sort(values)
+            return self.Aggregates(count, float(values[0]), float(values[-1]), float(ordered[0]), float(ordered[-1]),
+                                   float(values.sum()), ordered)
+
+        values = [value for value in values if not math.isnan(value)]
+        count = len(values)
+        if not count:
+            return self.Aggregates(0)
+
+        ordered = sorted(values)
+        return self.Aggregates(count, values[0], values[-1], ordered[0], ordered[-1], sum(values), ordered)
+
+    #==============================================================================
+    def Aggregates(self, count, first=None, last=None, minimum=None, maximum=None, total=None, ordered=None):
+        if not count:
+            return {"count": 0, "first": None, "last": None, "min": None, "max": None, "mean": None,
+                    "sum": None, "p50": None, "p95": None, "p99": None}
+
+        # See avalanche.Percentile, which does not accept NumPy arrays.
+        def Percentile(fraction):
+            return float(ordered[min(count - 1, int(fraction * count))])
+
+        return {"count": count, "first": first, "last": last, "min": minimum, "max": maximum,
+                "mean": total / count, "sum": total,
+                "p50": Percentile(0.50), "p95": Percentile(0.95), "p99": Percentile(0.99)}
+
+    #==============================================================================
+    def Spill(self, upto):
+        # Writes the samples from self.spilled up to (but not including) 'upto' to 
+        # the spill file.
+        upto = min(upto, self.count)
+        if upto <= self.spilled:
+            return
+
+        if self.spillfile is None:
+            self.OpenSpill()
+
+        times = self.Ordered(self.timestamps, self.spilled)[:upto - self.spilled]
+        columns = [self.Ordered(self.columns[name], self.spilled)[:upto - self.spilled] for name in self.names]
+
+        if self.spill.endswith(".csv"):
+            writer = csv.writer(self.spillfile)
+            for index in range(len(times)):
+                writer.writerow([repr(float(times[index]))] + [repr(float(column[index])) for column in columns])
+        else:
+            rows = array.array("d")
+            for index in range(len(times)):
+                rows.append(times[index])
+                rows.extend(column[index] for column in columns)
+            rows.tofile(self.spillfile)
+
+        self.spillfile.flush()
+        self.spilled = upto
+
+    #==============================================================================
+    def OpenSpill(self):
+        if self.spillstarted:
+            # The file was closed by close(). The new samples are added to it.
+            if self.spill.endswith(".csv") and sys.version_info[0] >= 3:
+                self.spillfile = open(self.spill, "a", newline="")
+            else:
+                self.spillfile = open(self.spill, "ab")
+            return
+
+        with open(self.spill + ".json", "w") as header:
+            json.dump({"version": SPILL_VERSION, "columns": ["timestamp"] + self.names,
+                       "format": "float64", "byteorder": sys.byteorder}, header)
+
+        if self.spill.endswith(".csv"):
+            # The csv module writes its own line endings.
+            if sys.version_info[0] >= 3:
+                self.spillfile = open(self.spill, "w", newline="")
+            else:
+                self.spillfile = open(self.spill, "wb")
+            csv.writer(self.spillfile).writerow(["timestamp"] + self.names)
+        else:
+            self.spillfile = open(self.spill, "wb")
+
+        self.spillstarted = True
+
+    #==============================================================================
+    def flush(self):
+        """
+        Writes the samples that are in memory (and not spilled yet) to the spill file.
+        """
+        if self.spill is not None:
+            self.Spill(self.count)
+
+    #==============================================================================
+    def close(self):
+        """
+        Flushes and closes the spill file. The samples in memory remain available.
+        Samples that are added afterwards are appended to the spill file.
+        """
+        self.flush()
+        if self.spillfile is not None:
+            self.spillfile.close()
+            self.spillfile = None
+
+#==============================================================================
+def ReadSpill(path):
+    """
+    Maps a binary spill file of a StatsStore into memory.
+
+    Returns (columns, rows), where 'columns' is the list of column names (starting
+    with "timestamp"). 'rows' is a read-only NumPy array of shape (samples, columns) 
+    if NumPy is installed. Otherwise, it is a flat array.array of the values, row by row,
+    which is read in slices.
+    """
+    with open(path + ".json") as header:
+        header = json.load(header)
+
+    if header.get("version") != SPILL_VERSION:
+        raise Exception("Unsupported spill file version: " + str(header.get("version")))
+
+    columns = header["columns"]
+
+    if os.path.getsize(path) == 0:
+        if numpy is not None:
+            return columns, numpy.zeros((0, len(columns)))
+        return columns, array.array("d")
+
+    if numpy is not None:
+        dtype = numpy.dtype("<f8" if header.get("byteorder", sys.byteorder) == "little" else ">f8")
+        rows = numpy.memmap(path, dtype=dtype, mode="r")
+        return columns, rows.reshape(-1, len(columns))
+
+    rows = array.array("d")
+    remaining = os.path.getsize(path) // rows.itemsize
+    with open(path, "rb") as spillfile:
+        while remaining:
+            count = min(remaining, READ_SLICE)
+            rows.fromfile(spillfile, count)
+            remaining -= count
+
+    if header.get("byteorder", sys.byteorder) != sys.byteorder:
+        rows.byteswap()
+
+    return columns, rows
@@ -0,0 +1,413 @@
+###############################################################################
+#
+#                  Stand-in for the Avalanche Automation API
+#
+# Description: An in-memory imitation of the av:: commands, used to benchmark
+#              the Python wrapper without a controller. It is NOT a model of
+#              the data model or of the validation rules; it only returns
+#              results that have the same shape as the real ones.
+#
+#              Load it through the tcllibpath of AVA:
+#                  av = AVA(apipath="benchmarks/fakeav", tcllibpath="benchmarks/fakeav")
+#
+#              The behaviour is set with av::fake::configure (see below).
+#
+###############################################################################
+
+namespace eval ::av {
+    # handle -> dict of {-attribute value}. Relations are attributes that hold
+    # the list of child handles.
+    variable objects [dict create]
+    variable counter 0
+    variable requestid 0
+
+    # The request ids of the asynchronous commands, which are completed by the
+    # next av::getEvents.
+    variable running {}
+
+    # port location -> port handle.
+    variable locations
+    array set locations {}
+
+    # av::fake::configure options.
+    variable fake
+    array set fake {
+        latency     0
+        blob        0
+        events      10
+        eventsize   64
+        modules     1
+        ports       8
+    }
+}
+
+namespace eval ::av::fake {}
+
+#==============================================================================
+# av::fake::configure ?-option value ...?
+#   -latency   Milliseconds that every av:: command takes.
+#   -blob      Size (in bytes) of the "blob" attribute of every object. The
+#              attribute is left out of av::get handle if the size is 0.
+#   -events    Number of events returned by each av::getEvents.
+#   -eventsize Size (in bytes) of the message of each event.
+#   -modules   Number of test modules of each chassis created by av::connect.
+#   -ports     Number of ports of each test module.
+# Returns the current settings.
+proc ::av::fake::configure {args} {
+    variable ::av::fake
+    foreach {option value} $args {
+        set fake([string range $option 1 end]) $value
+    }
+    return [array get fake]
+}
+
+#==============================================================================
+proc ::av::fake::delay {} {
+    if {$::av::fake(latency) > 0} {
+        after $::av::fake(latency)
+    }
+}
+
+#==============================================================================
+# Creates an object, and adds it to the relation of its parent.
+proc ::av::fake::new {type parent relation attributes} {
+    variable ::av::objects
+    variable ::av::counter
+
+    set handle [string tolower $type][incr counter]
+    set object [dict create -parent $parent]
+    foreach {key value} $attributes {
+        dict set object [string tolower $key] $value
+    }
+    dict set objects $handle $object
+
+    if {$parent ne ""} {
+        set relation -[string tolower $relation]
+        set children {}
+        if {[dict exists $objects $parent $relation]} {
+            set children [dict get $objects $parent $relation]
+        }
+        lappend children $handle
+        dict set objects $parent $relation $children
+    }
+    return $handle
+}
+
+#==============================================================================
+# Resolves a handle or a DDN path (handle.relation(index)...) to a handle.
+proc ::av::fake::resolve {path} {
+    variable ::av::objects
+
+    set parts [split $path .]
+    set handle [lindex $parts 0]
+    if {![dict exists $objects $handle]} {
+        error "invalid handle \"$handle\""
+    }
+
+    foreach part [lrange $parts 1 end] {
+        set index 1
+        regexp {^([^(]+)\((\d+)\)$} $part -> part index
+        set relation -[string tolower $part]
+        if {![dict exists $objects $handle $relation]} {
+            error "invalid relation \"$part\" of \"$handle\""
+        }
+        set child [lindex [dict get $objects $handle $relation] [expr {$index - 1}]]
+        if {$child eq ""} {
+            error "no child $part($index) of \"$handle\""
+        }
+        set handle $child
+    }
+    return $handle
+}
+
+#==============================================================================
+# Resolves a DAN path (relation.relation.attribute) from a handle. Returns the
+# handle and the attribute.
+proc ::av::fake::attribute {handle attribute} {
+    set parts [split [string trimleft $attribute -] .]
+    if {[llength $parts] > 1} {
+        set handle [resolve [join [concat [list $handle] [lrange $parts 0 end-1]] .]]
+    }
+    return [list $handle -[string tolower [lindex $parts end]]]
+}
+
+#==============================================================================
+proc ::av::fake::value {handle attribute} {
+    variable ::av::objects
+
+    if {$attribute eq "-blob"} {
+        return [string repeat x $::av::fake(blob)]
+    }
+    if {![dict exists $objects $handle $attribute]} {
+        error "invalid attribute \"[string range $attribute 1 end]\" of \"$handle\""
+    }
+    return [dict get $objects $handle $attribute]
+}
+
+#==============================================================================
+proc ::av::fake::port {location} {
+    variable ::av::locations
+    if {![info exists locations($location)]} {
+        error "no port at location $location"
+    }
+    return $locations($location)
+}
+
+###############################################################################
+#   av:: commands
+###############################################################################
+proc ::av::login {args} {
+    fake::delay
+    return ""
+}
+
+proc ::av::logout {} {
+    fake::delay
+    return ""
+}
+
+proc ::av::getSessions {} {
+    fake::delay
+    return [list "$::tcl_platform(user):Default"]
+}
+
+proc ::av::StopStatusMsg {status} {
+    return ""
+}
+
+proc ::av::DebugLogFile {status} {
+    return ""
+}
+
+proc ::av::create {type -under parent args} {
+    fake::delay
+    set parent [fake::resolve $parent]
+    return [fake::new $type $parent $type $args]
+}
+
+proc ::av::createProject {args} {
+    fake::delay
+    return [fake::new project system1 projects $args]
+}
+
+proc ::av::createTest {args} {
+    fake::delay
+    set project [dict get $args -project]
+    dict unset args -project
+    return [fake::new test [fake::resolve $project] tests $args]
+}
+
+proc ::av::delete {handle} {
+    variable objects
+    fake::delay
+    set handle [fake::resolve $handle]
+    dict unset objects $handle
+    return ""
+}
+
+proc ::av::config {handle args} {
+    variable objects
+    fake::delay
+    set handle [fake::resolve $handle]
+    foreach {key value} $args {
+        lassign [fake::attribute $handle $key] target attribute
+        dict set objects $target $attribute $value
+    }
+    return ""
+}
+
+proc ::av::get {handle args} {
+    variable objects
+    fake::delay
+    set handle [fake::resolve $handle]
+
+    if {[string match resultdataobject* $handle]} {
+        # The statistics grow with each av::get.
+        dict for {key value} [dict get $objects $handle] {
+            if {[string is integer -strict $value]} {
+                dict set objects $handle $key [expr {$value + int(rand() * 100)}]
+            }
+        }
+        dict set objects $handle -timestamp [clock milliseconds]
+    }
+
+    if {[llength $args] == 0} {
+        if {$::av::fake(blob) > 0} {
+            return [concat [dict get $objects $handle] [list -blob [fake::value $handle -blob]]]
+        }
+        return [dict get $objects $handle]
+    }
+    if {[llength $args] == 1} {
+        return [fake::value {*}[fake::attribute $handle [lindex $args 0]]]
+    }
+
+    set result {}
+    foreach attribute $args {
+        lappend result $attribute [fake::value {*}[fake::attribute $handle $attribute]]
+    }
+    return $result
+}
+
+proc ::av::nodeExists {handle} {
+    fake::delay
+    return [expr {![catch {fake::resolve $handle}]}]
+}
+
+proc ::av::handleOf {parent relation name} {
+    variable objects
+    fake::delay
+    set parent [fake::resolve $parent]
+    set relation -[string tolower $relation]
+    if {[dict exists $objects $parent $relation]} {
+        foreach child [dict get $objects $parent $relation] {
+            if {[dict exists $objects $child -name] && [dict get $objects $child -name] eq $name} {
+                return $child
+            }
+        }
+    }
+    return ""
+}
+
+proc ::av::perform {command handle args} {
+    variable objects
+    fake::delay
+
+    switch -- $command {
+        ReservePort {
+            set port [fake::port [dict get $args -portaddress]]
+            dict set objects $port -reservationstate "Reserved by User"
+        }
+        SetInterfaceAttributes {
+            fake::resolve $handle
+        }
+    }
+    return ""
+}
+
+proc ::av::apply {test args} {
+    variable requestid
+    variable running
+    fake::delay
+    fake::resolve $test
+    lappend running [incr requestid]
+    return $requestid
+}
+
+proc ::av::connect {address args} {
+    variable objects
+    variable requestid
+    fake::delay
+
+    set options [dict create -executesynchronous true]
+    foreach {key value} $args {
+        dict set options $key $value
+    }
+
+    set manager [fake::resolve system1.physicalchassismanager]
+    set chassis ""
+    if {[dict exists $objects $manager -physicalchassis]} {
+        foreach handle [dict get $objects $manager -physicalchassis] {
+            if {[dict get $objects $handle -address] eq $address} {
+                set chassis $handle
+            }
+        }
+    }
+
+    if {$chassis eq ""} {
+        set chassis [fake::new physicalchassis $manager physicalchassis [list -address $address]]
+        for {set module 1} {$module <= $::av::fake(modules)} {incr module} {
+            set modulehandle [fake::new physicaltestmodule $chassis physicaltestmodules [list -index $module]]
+            for {set port 1} {$port <= $::av::fake(ports)} {incr port} {
+                set ::av::locations($address/$module/$port) [fake::new port $modulehandle ports \
+                    [list -location $address/$module/$port -physIf [expr {$port - 1}] \
+                    -locationDisplayString $module,$port -locationString $module,$port \
+                    -reservationState Available]]
+            }
+        }
+    }
+
+    if {[dict get $options -executesynchronous] eq "false"} {
+        variable running
+        lappend running [incr requestid]
+        return $requestid
+    }
+    return $chassis
+}
+
+proc ::av::disconnect {address} {
+    fake::delay
+    return ""
+}
+
+proc ::av::waitUntilCommandIsDone {args} {
+    fake::delay
+    return ""
+}
+
+proc ::av::reserve {address} {
+    variable objects
+    fake::delay
+    set port [fake::port $address]
+    dict set objects $port -reservationstate "Reserved by User"
+    return $port
+}
+
+proc ::av::release {address} {
+    variable objects
+    fake::delay
+    dict set objects [fake::port $address] -reservationstate Available
+    return ""
+}
+
+proc ::av::getEvents {} {
+    variable running
+    fake::delay
+    set message [string repeat x $::av::fake(eventsize)]
+    set events {}
+    foreach id $running {
+        lappend events [list [list name async_method_completed] [list message "Request $id completed"] \
+            [list additional [list [list requestId $id]]]]
+    }
+    set running {}
+    for {set index 0} {$index < $::av::fake(events)} {incr index} {
+        lappend events [list [list name test_state_changed] [list message "$message $index"] \
+            [list additional [list [list requestId $index] [list path C:\\Tests\\test$index]]]]
+    }
+    return $events
+}
+
+proc ::av::subscribe {side attributes} {
+    fake::delay
+    set dataset [fake::new resultdataset system1 resultdatasets [list -side $side]]
+    set values {}
+    foreach attribute $attributes {
+        lappend values $attribute 0
+    }
+    fake::new resultdataobject $dataset resultdataobjects $values
+    return $dataset
+}
+
+proc ::av::unsubscribe {dataset} {
+    variable objects
+    fake::delay
+    fake::resolve $dataset
+    dict unset objects $dataset
+    return ""
+}
+
+###############################################################################
+#   The root objects
+###############################################################################
+# The attribute names are stored in lower case.
+dict set ::av::objects system1 [dict create -parent "" -name system1 -user $::tcl_platform(user) \
+    -workspace Default -ablloglocation [pwd]]
+::av::fake::new metainfo system1 metainfo [list -defaultDirectoryPath [pwd]]
+::av::fake::new physicalchassismanager system1 physicalchassismanager {}
+
+# Loading the real API takes a while. AVA_FAKE_LOADTIME (in milliseconds) imitates
+# it. See the --loadtime option of run_benchmarks.py.
+if {[info exists ::env(AVA_FAKE_LOADTIME)]} {
+    after $::env(AVA_FAKE_LOADTIME)
+}
+
+package provide av 0.0
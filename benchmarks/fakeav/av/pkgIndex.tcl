@@ -0,0 +1 @@
+package ifneeded av 0.0 [list source [file join $dir av.tcl]]
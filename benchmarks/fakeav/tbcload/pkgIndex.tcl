@@ -0,0 +1,4 @@
+# Stand-in for the TclPro byte code loader, which the Avalanche API requires.
+# The fake av package is plain Tcl, so nothing needs to be loaded. The version
+# is above that of the bundled tbcload (see lib.zip), so that this one is used.
+package ifneeded tbcload 1.7.1 [list package provide tbcload 1.7.1]
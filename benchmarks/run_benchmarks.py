@@ -0,0 +1,328 @@
+###############################################################################
+#
+#                   Avalanche Python API - Benchmarks
+#                       by Spirent Communications
+#
+# Description: Measures the overhead of the Python wrapper against the
+#              stand-in av Tcl package in benchmarks/fakeav, so that no
+#              controller or chassis is needed. The results are written as
+#              JSON, to compare runs (eg: in CI).
+#
+# Usage:       python benchmarks/run_benchmarks.py [--output results.json]
+#              python benchmarks/run_benchmarks.py --help
+#
+###############################################################################
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+BENCHMARKS_PATH = os.path.dirname(os.path.abspath(__file__))
+FAKEAV_PATH = os.path.join(BENCHMARKS_PATH, "fakeav")
+
+sys.path.insert(0, os.path.dirname(BENCHMARKS_PATH))
+from avalanche import AVA, HELPERS_TCL
+
+#==============================================================================
+class SequentialAVA(AVA):
+    """
+    An AVA object that is initialized as before version 2.1.0, with one round trip
+    for each step of the bootstrap, each helper procedure and each version probe.
+    Used by the startup_sequential benchmark, for comparison with startup.
+    """
+    def Bootstrap(self, tclcode):
+        for command in tclcode[:-1]:
+            if command.startswith("source "):
+                for helper in HelperCommands():
+                    self.Exec(helper)
+            else:
+                self.Exec(command)
+
+        # The versions were always retrieved, one at a time.
+        for probe in ("info patchlevel", "package present tbcload", "set ::auto_path"):
+            self.Exec(probe)
+
+        return self.Exec(tclcode[-1])
+
+#==============================================================================
+def HelperCommands():
+    """
+    Returns the top-level commands of avalanche_helpers.tcl (one for each procedure).
+    """
+    commands = []
+    with open(HELPERS_TCL) as helpers:
+        for line in helpers:
+            if line.startswith("#") or not line.strip():
+                continue
+            if not commands or (not line[0].isspace() and not line.startswith("}")):
+                commands.append(line)
+            else:
+                commands[-1] += line
+
+    return commands
+
+#==============================================================================
+def Summary(samples):
+    """
+    Returns the statistics of a list of durations (in seconds).
+    """
+    samples = sorted(samples)
+    count = len(samples)
+
+    def Percentile(fraction):
+        return samples[min(count - 1, int(fraction * count))]
+
+    return {"count": count, "total": sum(samples), "mean": sum(samples) / count,
+            "min": samples[0], "p50": Percentile(0.50), "p95": Percentile(0.95),
+            "p99": Percentile(0.99), "max": samples[-1]}
+
+#==============================================================================
+def Measure(function, iterations):
+    """
+    Calls the function 'iterations' times, and returns the statistics of the durations.
+    """
+    samples = []
+    for index in range(iterations):
+        started = time.time()
+        function()
+        samples.append(time.time() - started)
+
+    return Summary(samples)
+
+#==============================================================================
+def StartAVA(options):
+    av = AVA(apipath=FAKEAV_PATH, tclinterpreter=options.tclsh, tcllibpath=FAKEAV_PATH,
+             logpath=options.logpath, loglevel=options.loglevel)
+    av.Exec("av::fake::configure -latency " + str(options.latency))
+    return av
+
+#==============================================================================
+def BenchStartup(options, avclass=AVA):
+    # Starting tclsh, loading the API and defining the helpers.
+    avs = []
+
+    def Start():
+        avs.append(avclass(apipath=FAKEAV_PATH, tclinterpreter=options.tclsh, tcllibpath=FAKEAV_PATH,
+                       logpath=options.logpath, loglevel=options.loglevel))
+
+    result = Measure(Start, options.startups)
+
+    for av in avs:
+        av.CleanupTcl()
+
+    return result
+
+#==============================================================================
+def BenchLazyStartup(options):
+    # Starting tclsh with the loading of the API deferred (lazyload), and the first
+    # command, which loads it.
+    avs = []
+
+    def Start():
+        avs.append(AVA(apipath=FAKEAV_PATH, tclinterpreter=options.tclsh, tcllibpath=FAKEAV_PATH,
+                       logpath=options.logpath, loglevel=options.loglevel, lazyload=True))
+
+    startup = Measure(Start, options.startups)
+
+    pending = list(avs)
+    first = Measure(lambda: pending.pop().get("system1", "name"), len(avs))
+
+    for av in avs:
+        av.CleanupTcl()
+
+    return {"startup": startup, "first_command": first}
+
+#==============================================================================
+def BenchRoundTrip(av, options):
+    # The round trip of the smallest possible command, and of an av.get.
+    project = av.createProject(name="RoundTrip")
+
+    return {"exec": Measure(lambda: av.Exec("set x 1"), options.iterations),
+            "get": Measure(lambda: av.get(project, "name"), options.iterations),
+            "config": Measure(lambda: av.config(project, description="benchmark"), options.iterations)}
+
+#==============================================================================
+def BenchLargeGet(av, options):
+    # av.get of an object with many attributes, and of a large attribute value.
+    project = av.createProject(name="LargeGet")
+    av.configMany([(project, dict(("attribute" + str(index), "value " + str(index)) for index in range(options.attributes)))])
+
+    result = {"attributes": options.attributes,
+              "payload": options.payload,
+              "get_all": Measure(lambda: av.get(project), max(1, options.iterations // 10))}
+
+    av.Exec("av::fake::configure -blob " + str(options.payload))
+    try:
+        result["get_payload"] = Measure(lambda: av.get(project, "blob"), max(1, options.iterations // 10))
+    finally:
+        av.Exec("av::fake::configure -blob 0")
+
+    return result
+
+#==============================================================================
+def BenchGetEvents(av, options):
+    # av.getEvents with N events.
+    av.Exec("av::fake::configure -events " + str(options.events))
+    try:
+        return {"events": options.events,
+                "getEvents": Measure(av.getEvents, max(1, options.iterations // 10))}
+    finally:
+        av.Exec("av::fake::configure -events 0")
+
+#==============================================================================
+def BenchBulk(av, options):
+    # Creating objects one at a time, and with av.createMany.
+    project = av.createProject(name="Bulk")
+    count = options.objects
+
+    def CreateEach():
+        for index in range(count):
+            av.create("userprofiles", under=project, name="UP" + str(index))
+
+    def CreateMany():
+        av.createMany("userprofiles", project, [{"name": "UP" + str(index)} for index in range(count)])
+
+    return {"objects": count,
+            "create": Measure(CreateEach, 3),
+            "createMany": Measure(CreateMany, 3)}
+
+#==============================================================================
+def BenchReservation(av, options):
+    # av.reserveAll and av.releaseAll for K chassis x P ports, with one interface per port.
+    av.Exec("av::fake::configure -ports " + str(options.ports))
+
+    project = av.createProject(name="Reservation")
+    test = av.createTest(project=project, name="Reservation")
+    configuration = av.create("configuration", under=test)
+    topology = av.create("topology", under=configuration)
+
+    interfaces = []
+    for chassis in range(options.chassis):
+        address = "10.0." + str(chassis // 256) + "." + str(chassis % 256)
+        for port in range(1, options.ports + 1):
+            interfaces.append({"port": address + "/1/" + str(port), "adminIPAddress": address})
+
+    av.createMany("interface", topology, interfaces)
+
+    reserve = []
+    release = []
+    for index in range(3):
+        started = time.time()
+        report = av.reserveAll(test)
+        reserve.append(time.time() - started)
+
+        if report["errors"]:
+            raise Exception("reserveAll failed: " + str(report["errors"]) + " errors.")
+
+        started = time.time()
+        released = av.releaseAll()
+        release.append(time.time() - started)
+
+        if len(released["released"]) != len(interfaces):
+            raise Exception("releaseAll released " + str(len(released["released"])) + " of " + str(len(interfaces)) + " ports.")
+
+    return {"chassis": options.chassis, "ports": options.ports,
+            "reserveAll": Summary(reserve), "releaseAll": Summary(release),
+            "timings": report["timings"]}
+
+#==============================================================================
+BENCHMARKS = [("startup", None),
+              ("startup_sequential", None),
+              ("startup_lazy", None),
+              ("roundtrip", BenchRoundTrip),
+              ("large_get", BenchLargeGet),
+              ("getEvents", BenchGetEvents),
+              ("bulk", BenchBulk),
+              ("reservation", BenchReservation)]
+
+#==============================================================================
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Avalanche Python API against a stand-in av package.")
+    parser.add_argument("--tclsh", default=None, help="the Tcl interpreter (default: tclsh)")
+    parser.add_argument("--output", default=None, help="write the JSON results to this file (default: stdout)")
+    parser.add_argument("--only", default=None, help="comma-separated list of benchmarks to run: " + ", ".join(name for name, function in BENCHMARKS))
+    parser.add_argument("--iterations", type=int, default=500, help="iterations of the round trip benchmarks")
+    parser.add_argument("--latency", type=int, default=0, help="milliseconds that each av:: command takes")
+    parser.add_argument("--startups", type=int, default=5, help="number of interpreters started by the startup benchmarks")
+    parser.add_argument("--loadtime", type=int, default=0, help="milliseconds that loading the av package takes")
+    parser.add_argument("--attributes", type=int, default=2000, help="attributes of the object read by large_get")
+    parser.add_argument("--payload", type=int, default=1000000, help="size (in bytes) of the attribute read by large_get")
+    parser.add_argument("--events", type=int, default=1000, help="events returned by each av::getEvents")
+    parser.add_argument("--objects", type=int, default=1000, help="objects created by the bulk benchmark")
+    parser.add_argument("--chassis", type=int, default=4, help="chassis of the reservation benchmark")
+    parser.add_argument("--ports", type=int, default=32, help="ports of each chassis of the reservation benchmark")
+    parser.add_argument("--loglevel", default="WARNING", help="log level of the AVA objects")
+    options = parser.parse_args(argv)
+
+    selected = [name for name, function in BENCHMARKS]
+    if options.only:
+        selected = options.only.split(",")
+
+    options.logpath = tempfile.mkdtemp(prefix="avalanche-benchmarks-")
+
+    # Read by the stand-in av package when it is loaded.
+    os.environ["AVA_FAKE_LOADTIME"] = str(options.loadtime)
+
+    results = {}
+    try:
+        av = None
+        for name, function in BENCHMARKS:
+            if name not in selected:
+                continue
+
+            print("Running " + name + "...", file=sys.stderr)
+            if name == "startup":
+                results[name] = BenchStartup(options)
+                continue
+
+            if name == "startup_sequential":
+                results[name] = BenchStartup(options, SequentialAVA)
+                continue
+
+            if name == "startup_lazy":
+                results[name] = BenchLazyStartup(options)
+                continue
+
+            if av is None:
+                av = StartAVA(options)
+
+            results[name] = function(av, options)
+
+        if av is not None:
+            tclversion = av.Exec("info patchlevel")
+            stats = av.stats()
+            av.CleanupTcl()
+        else:
+            tclversion = None
+            stats = None
+
+    finally:
+        shutil.rmtree(options.logpath, ignore_errors=True)
+
+    output = {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "python": platform.python_version(),
+                       "tcl": tclversion,
+                       "platform": platform.platform(),
+                       "options": dict((key, value) for key, value in vars(options).items() if key != "logpath")},
+              "results": results,
+              "stats": stats}
+
+    text = json.dumps(output, indent=2, sort_keys=True)
+    if options.output:
+        with open(options.output, "w") as outputfile:
+            outputfile.write(text + "\n")
+    else:
+        print(text)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(Main())
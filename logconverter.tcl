@@ -14,10 +14,13 @@
 # Version  Modified
 # 1.0.0    11/17/2014 by Matthew Jefferson
 #           -Began work on package.
+# 1.1.0    10/16/2026
+#           -The log file and the output file are now taken from the command
+#            line, instead of being hardcoded.
 #
 ###############################################################################
 
-set __package_version__ 1.0.0
+set __package_version__ 1.1.0
 
 ###############################################################################
 # Copyright (c) 2014 SPIRENT COMMUNICATIONS OF CALABASAS, INC.
@@ -110,6 +113,14 @@ proc convertLog { inputfilename {outputfilename ""} } {
 ####
 ###############################################################################
 
-set inputfilename {../testing/issue/avalanche_python.log}
+# Only convert when run as a script (eg: tclsh logconverter.tcl avalanche_python.log),
+# so that the file can also be sourced for convertLog.
+if { [info exists ::argv0] && [file normalize [info script]] eq [file normalize $::argv0] } {
+    if { [llength $::argv] < 1 || [llength $::argv] > 2 } {
+        puts stderr "Usage: tclsh logconverter.tcl <avalanche_python.log> ?<output.tcl>?"
+        exit 1
+    }
 
-convertLog $inputfilename "../testing/issue/converted.tcl"
\ No newline at end of file
+    # {*} would need Tcl 8.5.
+    eval [linsert $::argv 0 convertLog]
+}
@@ -0,0 +1,72 @@
+###############################################################################
+#
+#                      Avalanche Python API - Tests
+#                       by Spirent Communications
+#
+# Description: The fixtures of the tests. The tests run the wrapper against
+#              the stand-in av Tcl package in benchmarks/fakeav, so that no
+#              controller or chassis is needed. A tclsh must be on the PATH.
+#
+# Usage:       python -m pytest -q tests
+#
+###############################################################################
+
+import os
+import shutil
+import sys
+
+import pytest
+
+TESTS_PATH = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_PATH = os.path.dirname(TESTS_PATH)
+FAKEAV_PATH = os.path.join(PACKAGE_PATH, "benchmarks", "fakeav")
+
+sys.path.insert(0, PACKAGE_PATH)
+
+#==============================================================================
+def pytest_collection_modifyitems(config, items):
+    if shutil.which("tclsh") is not None:
+        return
+
+    skip = pytest.mark.skip(reason="tclsh is not installed")
+    for item in items:
+        item.add_marker(skip)
+
+#==============================================================================
+@pytest.fixture
+def make_av(tmp_path):
+    """
+    Returns a function that starts an AVA object against the stand-in av package.
+    The objects are cleaned up after the test.
+    """
+    from avalanche import AVA
+
+    avs = []
+
+    def Start(**options):
+        options.setdefault("apipath", FAKEAV_PATH)
+        options.setdefault("tcllibpath", FAKEAV_PATH)
+        options.setdefault("logpath", str(tmp_path / "logs"))
+        options.setdefault("loglevel", "WARNING")
+        av = AVA(**options)
+        avs.append(av)
+        return av
+
+    yield Start
+
+    for av in avs:
+        if not av._closing:
+            av.CleanupTcl()
+
+#==============================================================================
+@pytest.fixture(scope="module")
+def av(tmp_path_factory):
+    """
+    An AVA object that is shared by the tests of a module.
+    """
+    from avalanche import AVA
+
+    av = AVA(apipath=FAKEAV_PATH, tcllibpath=FAKEAV_PATH, logpath=str(tmp_path_factory.mktemp("logs")),
+             loglevel="WARNING", cachesize=16)
+    yield av
+    av.CleanupTcl()
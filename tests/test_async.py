@@ -0,0 +1,91 @@
+###############################################################################
+#
+#                 Avalanche Python API - AsyncAVA Tests
+#
+###############################################################################
+
+import asyncio
+
+import pytest
+
+from conftest import FAKEAV_PATH
+from avalanche_async import AsyncAVA
+
+#==============================================================================
+def Run(tmp_path, body, **options):
+    # Runs body(av) with a started AsyncAVA, in a new event loop.
+    async def Main():
+        async with AsyncAVA(apipath=FAKEAV_PATH, tcllibpath=FAKEAV_PATH, logpath=str(tmp_path),
+                            loglevel="WARNING", **options) as av:
+            return await body(av)
+
+    return asyncio.run(Main())
+
+#==============================================================================
+def test_methods_are_coroutines(tmp_path):
+    async def Body(av):
+        project = await av.createProject(name="AsyncProject")
+        return project, await av.get(project, "name"), await av.Exec("expr {6 * 7}")
+
+    project, name, answer = Run(tmp_path, Body)
+    assert project.startswith("project")
+    assert name == "AsyncProject"
+    assert answer == 42
+
+#==============================================================================
+def test_concurrent_tasks(tmp_path):
+    # The responses are matched to the tasks by request id, whatever the order.
+    async def Body(av):
+        return await asyncio.gather(*[av.Exec("after " + str(10 - index) + "; set v" + str(index) + " " + str(index))
+                                      for index in range(10)])
+
+    assert Run(tmp_path, Body) == list(range(10))
+
+#==============================================================================
+def test_errors_are_raised(tmp_path):
+    async def Body(av):
+        with pytest.raises(Exception, match="invalid handle"):
+            await av.get("nosuchhandle", "name")
+        return await av.get("system1", "name")
+
+    assert Run(tmp_path, Body) == "system1"
+
+#==============================================================================
+def test_multi_command_methods(tmp_path):
+    # getMany and getEvents issue several commands (or convert the results) in Python.
+    async def Body(av):
+        await av.Exec("av::fake::configure -events 2")
+        events = await av.getEvents()
+        values = await av.getMany(["system1", "system1.metainfo"], ["name"])
+        return events, values
+
+    events, values = Run(tmp_path, Body)
+    assert [event["name"] for event in events] == ["test_state_changed"] * 2
+    assert list(values) == ["system1", "system1.metainfo"]
+    assert values["system1"]["name"] == "system1"
+
+#==============================================================================
+def test_close_fails_pending_calls(tmp_path):
+    async def Main():
+        av = AsyncAVA(apipath=FAKEAV_PATH, tcllibpath=FAKEAV_PATH, logpath=str(tmp_path), loglevel="WARNING")
+        await av.start()
+        pending = asyncio.ensure_future(av.Exec("after 2000"))
+        await asyncio.sleep(0.1)
+
+        # The reader task has finished when the pipes are closed.
+        reader = av._reader
+        closed = []
+        close = av.tcl.stdin.close
+
+        def Close():
+            closed.append(reader.done())
+            close()
+
+        av.tcl.stdin.close = Close
+        await av.close()
+        assert closed[0]
+
+        with pytest.raises(Exception, match="The Tcl interpreter has been closed."):
+            await pending
+
+    asyncio.run(Main())
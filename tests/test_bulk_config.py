@@ -0,0 +1,54 @@
+###############################################################################
+#
+#                 Avalanche Python API - Bulk Config and Create Tests
+#
+###############################################################################
+
+#==============================================================================
+def test_create_many(av):
+    project = av.createProject(name="BulkCreate")
+    handles = av.createMany("userprofile", project, [{"name": "UP" + str(index)} for index in range(5)])
+
+    assert handles.errors == []
+    assert len(handles) == 5
+    assert [av.get(handle, "name") for handle in handles] == ["UP" + str(index) for index in range(5)]
+    assert av.get(project, "userprofile").split() == handles
+
+#==============================================================================
+def test_create_many_errors(av):
+    project = av.createProject(name="BulkCreateErrors")
+    av.delete(project)
+
+    # Every item under a deleted parent fails, and is reported by its index.
+    handles = av.create_many("userprofile", project, [{"name": "a"}, {"name": "b"}])
+    assert [index for index, error in handles.errors] == [0, 1]
+    assert "invalid handle" in str(handles[0])
+
+#==============================================================================
+def test_config_many(av):
+    project = av.createProject(name="BulkConfig")
+    handles = av.createMany("userprofile", project, [{"name": "UP" + str(index)} for index in range(3)])
+    names = [av.get(handle, "name") for handle in handles]
+
+    result = av.configMany([(handle, {"name": "Renamed" + str(index), "note": "two words"}) for index, handle in enumerate(handles)])
+    assert result.errors == []
+
+    # The cached names are invalidated.
+    assert names == ["UP0", "UP1", "UP2"]
+    assert [av.get(handle, "name") for handle in handles] == ["Renamed0", "Renamed1", "Renamed2"]
+    assert av.get(handles[0], "note") == "two words"
+
+#==============================================================================
+def test_config_many_errors(av):
+    project = av.createProject(name="BulkConfigErrors")
+
+    # An error in one item does not stop the others.
+    result = av.config_many([("nosuchhandle", {"name": "x"}), (project, {"name": "Configured"}), ("nosuchhandle.test", {"name": "y"})])
+    assert len(result) == 3
+    assert [index for index, error in result.errors] == [0, 2]
+    assert av.get(project, "name") == "Configured"
+
+#==============================================================================
+def test_bulk_without_items(av):
+    assert av.configMany([]) == []
+    assert av.createMany("userprofile", "system1", []) == []
@@ -0,0 +1,48 @@
+###############################################################################
+#
+#                 Avalanche Python API - Bulk Get Tests
+#
+###############################################################################
+
+#==============================================================================
+def test_get_many(av):
+    projects = [av.createProject(name="Many" + str(index), count=index) for index in range(3)]
+
+    result = av.getMany(projects, ["name", "count"])
+    assert list(result) == projects
+    assert [result[project] for project in projects] == [{"name": "Many" + str(index), "count": index} for index in range(3)]
+
+    # Without attributes, each object maps to all of its attributes.
+    everything = av.get_many(projects[:1])
+    assert everything[projects[0]]["name"] == "Many0"
+    assert everything[projects[0]]["parent"] == "system1"
+
+#==============================================================================
+def test_get_many_item_errors(av):
+    project = av.createProject(name="Partial")
+
+    # An error is returned in place of the value, and does not stop the others.
+    result = av.getMany([project, "nosuchhandle"], ["name", "nosuchattribute"])
+    assert result[project]["name"] == "Partial"
+    assert isinstance(result[project]["nosuchattribute"], Exception)
+    assert "nosuchattribute" in str(result[project]["nosuchattribute"])
+    assert isinstance(result["nosuchhandle"]["name"], Exception)
+
+    result = av.getMany(["nosuchhandle", project])
+    assert isinstance(result["nosuchhandle"], Exception)
+    assert result[project]["name"] == "Partial"
+
+#==============================================================================
+def test_get_many_uses_the_cache(av):
+    project = av.createProject(name="CachedMany")
+    av.cache.clear()
+    av.getMany([project], ["name"])
+
+    # The second call is answered from the cache, without a command.
+    before = av.stats()["commands"]["::avapy::getMany"]["count"]
+    assert av.getMany([project], ["name"]) == {project: {"name": "CachedMany"}}
+    assert av.stats()["commands"]["::avapy::getMany"]["count"] == before
+
+#==============================================================================
+def test_get_many_without_handles(av):
+    assert av.getMany([], ["name"]) == {}
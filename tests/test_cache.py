@@ -0,0 +1,73 @@
+###############################################################################
+#
+#                 Avalanche Python API - Attribute Cache Tests
+#
+###############################################################################
+
+import time
+
+from avalanche import AttributeCache
+
+#==============================================================================
+def test_get_cache_hits_and_invalidation(av):
+    project = av.createProject(name="CacheProject")
+    av.cache.clear()
+    before = av.cache.stats()
+
+    assert av.get(project, "name") == "CacheProject"
+    assert av.get(project, "name") == "CacheProject"
+    assert av.cache.stats()["hits"] == before["hits"] + 1
+
+    # A config of the object drops its cached attributes.
+    av.config(project, name="Renamed")
+    assert av.get(project, "name") == "Renamed"
+
+
+#==============================================================================
+def test_cache_eviction_and_generation():
+    cache = AttributeCache(maxsize=2)
+    for key in ("a", "b", "c"):
+        cache.Put((key, "name"), key, cache.generation)
+
+    assert cache.Get(("a", "name")) == (False, None)
+    assert cache.Get(("c", "name")) == (True, "c")
+    assert cache.stats()["evictions"] == 1
+
+    # A value that was requested before an invalidation is not stored.
+    generation = cache.generation
+    cache.Invalidate("c")
+    cache.Put(("c", "name"), "stale", generation)
+    assert cache.Get(("c", "name")) == (False, None)
+
+#==============================================================================
+def test_cache_returns_copies_of_dictionaries(av):
+    project = av.createProject(name="CopyProject")
+    attributes = av.get(project)
+    attributes["name"] = "Modified"
+    assert av.get(project)["name"] == "CopyProject"
+
+#==============================================================================
+def test_cache_dropped_by_delete(av):
+    project = av.createProject(name="DeletedProject")
+    av.get(project, "name")
+    assert av.cache.stats()["size"] > 0
+
+    av.delete(project)
+    assert av.cache.stats()["size"] == 0
+
+#==============================================================================
+def test_cache_ttl():
+    cache = AttributeCache(maxsize=4, ttl=0.05)
+    cache.Put(("a", "name"), "a", cache.generation)
+    assert cache.Get(("a", "name")) == (True, "a")
+
+    time.sleep(0.1)
+    assert cache.Get(("a", "name")) == (False, None)
+
+#==============================================================================
+def test_cache_disabled(make_av):
+    av = make_av(cachesize=0)
+    assert av.cache is None
+
+    project = av.createProject(name="Uncached")
+    assert av.get(project, "name") == "Uncached"
@@ -0,0 +1,99 @@
+###############################################################################
+#
+#                 Avalanche Python API - Interpreter Daemon Tests
+#
+###############################################################################
+
+import os
+import socket
+import stat
+import threading
+import time
+
+import pytest
+
+from conftest import FAKEAV_PATH
+from avalanche_daemon import InterpreterDaemon, Main
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX") or not hasattr(socket.socket, "recvmsg"),
+                                reason="the interpreter daemon requires Unix sockets")
+
+#==============================================================================
+@pytest.fixture
+def daemon(tmp_path):
+    """
+    An interpreter daemon that serves the stand-in av package on a socket in tmp_path.
+    """
+    daemon = InterpreterDaemon(str(tmp_path / "d.sock"), size=1, apipath=FAKEAV_PATH, tcllibpath=FAKEAV_PATH,
+                               logpath=str(tmp_path / "daemon"), loglevel="WARNING")
+    server = threading.Thread(target=daemon.serve_forever)
+    server.daemon = True
+    server.start()
+
+    WaitFor(lambda: daemon.server is not None and os.path.exists(daemon.path))
+    yield daemon
+
+    daemon.close()
+    server.join(10)
+
+#==============================================================================
+def WaitFor(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+#==============================================================================
+def test_attach(daemon, make_av):
+    av = make_av(connect="unix://" + daemon.path)
+    assert av.apipath == FAKEAV_PATH
+
+    project = av.createProject(name="Attached")
+    assert av.get(project, "name") == "Attached"
+
+    # The interpreter belongs to this client. A second client gets another one.
+    other = make_av(connect="unix://" + daemon.path)
+    assert other.tcl.pid != av.tcl.pid
+    assert other.nodeExists(project) == 0
+
+    # The daemon kills the interpreter once the client is done, and starts a new one.
+    pid = av.tcl.pid
+    av.CleanupTcl()
+    WaitFor(lambda: len(daemon.ready) == 1)
+    assert daemon.ready[0].tcl.pid not in (pid, other.tcl.pid)
+
+#==============================================================================
+def test_socket_permissions(daemon):
+    assert stat.S_IMODE(os.stat(daemon.path).st_mode) == 0o600
+
+#==============================================================================
+def test_stale_socket(daemon, tmp_path):
+    # A running daemon is not replaced.
+    with pytest.raises(Exception, match="Another interpreter daemon is already listening"):
+        InterpreterDaemon(daemon.path).RemoveStaleSocket()
+
+    # A socket that nobody listens on is removed.
+    path = str(tmp_path / "s.sock")
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+
+    InterpreterDaemon(path).RemoveStaleSocket()
+    assert not os.path.exists(path)
+
+    # Anything else is left alone.
+    with open(path, "w"):
+        pass
+    with pytest.raises(Exception, match="Not a socket"):
+        InterpreterDaemon(path).RemoveStaleSocket()
+
+#==============================================================================
+def test_close_removes_the_socket(daemon):
+    daemon.close()
+    assert not os.path.exists(daemon.path)
+    assert daemon.ready == []
+
+#==============================================================================
+def test_main_requires_the_api_path(tmp_path):
+    with pytest.raises(SystemExit):
+        Main([str(tmp_path / "d.sock")])
@@ -0,0 +1,80 @@
+###############################################################################
+#
+#                 Avalanche Python API - Event Pump Tests
+#
+###############################################################################
+
+import time
+
+import pytest
+
+#==============================================================================
+def StartPump(make_av):
+    # Returns an AVA object whose event pump reads no events until they are enabled.
+    av = make_av()
+    av.Exec("av::fake::configure -events 0 -eventsize 4")
+    return av, av.startEvents(interval=0.02)
+
+#==============================================================================
+def test_event_pump_callbacks(make_av):
+    av, pump = StartPump(make_av)
+    assert av.startEvents() is pump
+
+    received = []
+    pump.on("test_state_changed", received.append)
+    ignored = pump.on("test_completed", received.append)
+    pump.off("test_completed", ignored)
+
+    started = time.time()
+    av.Exec("av::fake::configure -events 2")
+    event = pump.waitFor("test_state_changed", timeout=5, match=lambda event: event["additional"]["requestId"] == "1")
+    av.Exec("av::fake::configure -events 0")
+
+    assert event["message"] == "xxxx 1"
+    assert event in received
+    assert all(item["name"] == "test_state_changed" for item in received)
+
+    # An event that was dispatched before the call is found with 'since'.
+    assert pump.wait_for("test_state_changed", timeout=0, since=started)["name"] == "test_state_changed"
+
+    stats = pump.stats()
+    assert stats["polls"] > 0
+    assert stats["received"] >= 2
+    assert stats["delay_max"] >= stats["delay_mean"] >= 0
+
+#==============================================================================
+def test_wait_for_timeout(make_av):
+    av, pump = StartPump(make_av)
+
+    with pytest.raises(Exception, match="Timed out waiting for the event test_completed"):
+        pump.waitFor("test_completed", timeout=0.1)
+
+    # The waiter is removed.
+    assert pump.callbacks[None] == []
+
+#==============================================================================
+def test_callback_errors_are_counted(make_av):
+    av, pump = StartPump(make_av)
+
+    def Fail(event):
+        raise Exception("callback failed")
+
+    pump.on(None, Fail)
+    av.Exec("av::fake::configure -events 1")
+    pump.waitFor("test_state_changed", timeout=5)
+    av.Exec("av::fake::configure -events 0")
+
+    # The failing callback does not stop the dispatch.
+    assert pump.stats()["callback_errors"] >= 1
+
+#==============================================================================
+def test_stop_events(make_av):
+    av, pump = StartPump(make_av)
+    av.stopEvents()
+
+    assert av.eventpump is None
+    assert not pump.poller.is_alive()
+    assert not pump.dispatcher.is_alive()
+
+    # A new pump can be started.
+    assert av.startEvents() is not pump
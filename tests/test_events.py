@@ -0,0 +1,43 @@
+###############################################################################
+#
+#                 Avalanche Python API - Event Decoding Tests
+#
+###############################################################################
+
+#==============================================================================
+def test_get_events(av):
+    av.Exec("av::fake::configure -events 2 -eventsize 4")
+    try:
+        events = av.getEvents()
+    finally:
+        av.Exec("av::fake::configure -events 10 -eventsize 64")
+
+    # The backslashes of the Windows paths are converted to slashes.
+    assert events == [
+        {"name": "test_state_changed", "message": "xxxx 0", "additional": {"requestId": "0", "path": "C:/Tests/test0"}},
+        {"name": "test_state_changed", "message": "xxxx 1", "additional": {"requestId": "1", "path": "C:/Tests/test1"}},
+    ]
+
+#==============================================================================
+def test_get_events_with_completed_operations(av):
+    av.Exec("av::fake::configure -events 0")
+    try:
+        project = av.createProject(name="EventProject")
+        test = av.createTest(project=project, name="EventTest")
+        requestid = av.apply(test)
+
+        events = av.getEvents()
+        assert events == [{"name": "async_method_completed", "message": "Request " + str(requestid) + " completed",
+                           "additional": {"requestId": str(requestid)}}]
+        assert av.getEvents() == []
+    finally:
+        av.Exec("av::fake::configure -events 10")
+
+#==============================================================================
+def test_convert_event_string(av):
+    tclstring = "{{name a} {message {two words}} {additional {}}} {{name b} {message {}} {additional {{key {x y}} {quote \\\"}}}}"
+    assert av.convertEventString(tclstring) == [
+        {"name": "a", "message": "two words", "additional": ""},
+        {"name": "b", "message": "", "additional": {"key": "x y", "quote": '"'}},
+    ]
+    assert av.convertEventString("") == []
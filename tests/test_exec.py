@@ -0,0 +1,78 @@
+###############################################################################
+#
+#                 Avalanche Python API - Thread-Safe Exec Tests
+#
+###############################################################################
+
+import threading
+
+import pytest
+
+#==============================================================================
+def test_concurrent_exec(av):
+    # Each thread gets the responses to its own commands, whatever the interleaving.
+    errors = []
+
+    def Worker(index):
+        try:
+            for count in range(50):
+                value = "t" + str(index) + "_" + str(count)
+                result = av.Exec("set v" + str(index) + " " + value)
+                if result != value:
+                    errors.append((value, result))
+        except Exception as errmsg:
+            errors.append(errmsg)
+
+    threads = [threading.Thread(target=Worker, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert av._pending == {}
+
+#==============================================================================
+def test_concurrent_errors_are_isolated(av):
+    # An error is raised in the thread that sent the command, not in the others.
+    results = {}
+
+    def Worker(name, command):
+        try:
+            results[name] = av.Exec(command)
+        except Exception as errmsg:
+            results[name] = errmsg
+
+    threads = [threading.Thread(target=Worker, args=("error" + str(index), "error boom" + str(index))) for index in range(4)]
+    threads += [threading.Thread(target=Worker, args=("ok" + str(index), "expr {" + str(index) + " + 1}")) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for index in range(4):
+        assert results["ok" + str(index)] == index + 1
+        assert str(results["error" + str(index)]) == "boom" + str(index)
+
+#==============================================================================
+def test_submit_assigns_request_ids(av):
+    # The commands of one write get consecutive request ids, and are answered in order.
+    futures = av.Submit(["set a 1", "set b 2", "set c 3"])
+    responses = [future.result() for future in futures]
+
+    requestids = [response[2] for response in responses]
+    assert requestids == list(range(requestids[0], requestids[0] + 3))
+    assert [av.DecodeResult(*response) for response in responses] == [1, 2, 3]
+
+#==============================================================================
+def test_pending_commands_fail_when_the_interpreter_exits(make_av):
+    av = make_av()
+    futures = av.Submit(["after 200", "set a 1"])
+    av.tcl.kill()
+
+    for future in futures:
+        with pytest.raises(Exception):
+            future.result(timeout=10)
+
+    with pytest.raises(Exception):
+        av.Exec("set a 1")
@@ -0,0 +1,64 @@
+###############################################################################
+#
+#                 Avalanche Python API - Framing Tests
+#
+###############################################################################
+
+import pytest
+
+#==============================================================================
+def test_encode_command(av):
+    # The length is that of the UTF-8 encoded command, not of the string.
+    assert av.EncodeCommand(7, "set x é") == b"7 8\nset x \xc3\xa9"
+
+#==============================================================================
+def test_result_is_stripped(av):
+    # As before the framing, the whitespace around a result is removed.
+    assert av.Exec("format {  a b\n\n}") == "a b"
+    assert av.Exec("format { 42 }") == 42
+
+#==============================================================================
+def test_result_with_embedded_frame_marker(av):
+    # The results are read by length, so a frame marker in a result is only data.
+    assert av.Exec("format {%cAVA 99 0 3\nx} 1") == "\x01AVA 99 0 3\nx"
+    assert av.Exec("list a [format %cAVA 1] b") == "a \x01AVA b"
+    assert av.Exec("list ok") == "ok"
+
+#==============================================================================
+def test_command_with_newlines_and_markers(av):
+    assert av.Exec("set multi {line 1\nline 2}\nset multi") == "line 1\nline 2"
+    assert av.Exec("string length {\x01AVA 1 0 1\n}") == 11
+
+#==============================================================================
+def test_output_of_a_command_is_not_a_result(av):
+    assert av.Exec('puts "not a result"; set x one') == "one"
+    assert av.Exec('puts -nonewline "partial"; set y two') == "two"
+    assert av.Exec("set z three") == "three"
+
+#==============================================================================
+def test_unicode_and_large_results(av):
+    assert av.Exec("set z {héllo 世界}") == "héllo 世界"
+    assert len(av.Exec("string repeat x 200000")) == 200000
+    assert av.Exec("string repeat é 3000") == "é" * 3000
+
+#==============================================================================
+def test_empty_result(av):
+    assert av.Exec("list") == ""
+
+#==============================================================================
+def test_error_does_not_break_the_stream(av):
+    with pytest.raises(Exception, match="nosuchcommand"):
+        av.Exec("nosuchcommand")
+
+    assert av.Exec("expr {1 + 1}") == 2
+
+#==============================================================================
+def test_interpreter_exit(make_av):
+    av = make_av()
+
+    with pytest.raises(Exception, match="exited unexpectedly"):
+        av.Exec("exit 3")
+
+    # Every later command fails at once, instead of waiting for a response.
+    with pytest.raises(Exception, match="exited unexpectedly"):
+        av.Exec("set x 1")
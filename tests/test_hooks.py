@@ -0,0 +1,130 @@
+###############################################################################
+#
+#                 Avalanche Python API - Exec Hook Tests
+#
+###############################################################################
+
+import json
+
+import pytest
+
+from avalanche import ExecHooks, SpanRecorder
+
+#==============================================================================
+class CallLog(ExecHooks):
+    # Records the hook calls.
+    def __init__(self):
+        self.calls = []
+
+    def before_exec(self, command):
+        self.calls.append(("before_exec", command))
+
+    def after_exec(self, command, result, duration):
+        self.calls.append(("after_exec", command, result))
+
+    def on_error(self, command, error, duration):
+        self.calls.append(("on_error", command, str(error)))
+
+    def on_response(self, command, status, result, duration):
+        self.calls.append(("on_response", command, status, result))
+
+    def before_call(self, method, args, kwargs):
+        self.calls.append(("before_call", method, args, kwargs))
+
+    def after_call(self, method, duration):
+        self.calls.append(("after_call", method))
+
+#==============================================================================
+def test_exec_hooks(make_av):
+    av = make_av()
+    hook = av.addHook(CallLog())
+
+    av.get("system1", "name")
+    with pytest.raises(Exception):
+        av.Exec("error boom")
+
+    assert hook.calls == [
+        ("before_call", "get", ("system1", "name"), {}),
+        ("before_exec", "av::get system1 -name"),
+        ("on_response", "av::get system1 -name", 0, "system1"),
+        ("after_exec", "av::get system1 -name", "system1"),
+        ("after_call", "get"),
+        ("before_exec", "error boom"),
+        ("on_response", "error boom", 1, "boom"),
+        ("on_error", "error boom", "boom"),
+    ]
+
+    av.removeHook(hook)
+    av.Exec("set a 1")
+    assert len(hook.calls) == 8
+
+#==============================================================================
+def test_exec_hooks_when_the_commands_can_not_be_sent(make_av, monkeypatch):
+    class BrokenPipe(object):
+        def write(self, data):
+            raise IOError("Broken pipe")
+
+    av = make_av()
+    hook = av.addHook(CallLog())
+
+    # Each command that was announced is failed.
+    stdin = av.tcl.stdin
+    monkeypatch.setattr(av.tcl, "stdin", BrokenPipe())
+    with pytest.raises(IOError, match="Broken pipe"):
+        with av.batch():
+            av.Exec("set a 1")
+            av.Exec("set b 2")
+
+    assert hook.calls == [("before_exec", "set a 1"), ("before_exec", "set b 2"),
+                          ("on_error", "set a 1", "Broken pipe"), ("on_error", "set b 2", "Broken pipe")]
+    monkeypatch.setattr(av.tcl, "stdin", stdin)
+
+    # A command that is in flight when the interpreter exits is failed by the reader.
+    hook.calls = []
+    future = av.Submit(["after 5000"])[0]
+    av.tcl.kill()
+    with pytest.raises(Exception, match="exited unexpectedly"):
+        future.result(timeout=10)
+
+    assert [call[:2] for call in hook.calls] == [("before_exec", "after 5000"), ("on_error", "after 5000")]
+
+    # Once the interpreter is gone, the commands are not announced at all.
+    hook.calls = []
+    with pytest.raises(Exception, match="exited unexpectedly"):
+        av.Exec("set c 3")
+    assert hook.calls == []
+
+#==============================================================================
+def test_span_recorder(make_av, tmp_path):
+    av = make_av()
+    recorder = av.addHook(SpanRecorder(maxcommand=12))
+
+    project = av.createProject(name="Traced")
+    with pytest.raises(Exception):
+        av.get(project, "nosuchattribute")
+
+    path = str(tmp_path / "trace.json")
+    recorder.write(path)
+    with open(path) as tracefile:
+        trace = json.load(tracefile)
+
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    assert [(event["cat"], event["name"]) for event in events] == [
+        ("tcl", "av::createProject"), ("python", "createProject"), ("tcl", "av::get"), ("python", "get")]
+
+    for event in events:
+        assert event["ph"] == "X"
+        assert event["dur"] >= 0 and event["ts"] > 0
+        assert set(event) == {"name", "cat", "ph", "pid", "tid", "ts", "dur", "args"}
+
+    # The command is cut at maxcommand characters, and the error is recorded.
+    assert events[2]["args"]["command"] == ("av::get " + project)[:12]
+    assert "nosuchattribute" in events[2]["args"]["error"]
+
+    # The method span contains the span of its command.
+    assert events[1]["ts"] <= events[0]["ts"]
+    assert events[0]["ts"] + events[0]["dur"] <= events[1]["ts"] + events[1]["dur"] + 1
+
+    recorder.clear()
+    assert recorder.events == []
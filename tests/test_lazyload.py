@@ -0,0 +1,51 @@
+###############################################################################
+#
+#                 Avalanche Python API - Lazy Loading Tests
+#
+###############################################################################
+
+import pytest
+
+#==============================================================================
+def Loaded(av):
+    return av.Exec("expr {![catch {package present av}]}") == 1
+
+#==============================================================================
+def test_api_loaded_at_startup(make_av):
+    assert Loaded(make_av())
+
+#==============================================================================
+def test_api_loaded_by_the_first_av_command(make_av):
+    av = make_av(lazyload=True)
+    assert not Loaded(av)
+
+    # Other commands do not load the API, and unknown ones still fail.
+    assert av.Exec("set x 2") == 2
+    assert av.Exec("expr {$x + 1}") == 3
+    with pytest.raises(Exception, match="invalid command name \"nosuchcommand\""):
+        av.Exec("nosuchcommand")
+    assert not Loaded(av)
+
+    project = av.createProject(name="Lazy")
+    assert Loaded(av)
+    assert av.get(project, "name") == "Lazy"
+
+    # The original ::unknown is back in place.
+    assert av.Exec("info commands ::avapy::unknown") == ""
+    with pytest.raises(Exception, match="invalid command name \"av::nosuchcommand\""):
+        av.Exec("av::nosuchcommand")
+
+#==============================================================================
+def test_api_load_is_retried_after_a_failure(make_av):
+    av = make_av(lazyload=True)
+    av.Exec("rename ::avapy::loadApi ::avapy::realLoadApi")
+    av.Exec("proc ::avapy::loadApi {} { error {no license} }")
+
+    with pytest.raises(Exception, match="no license"):
+        av.createProject(name="Failed")
+    assert not Loaded(av)
+
+    av.Exec("rename ::avapy::loadApi {}")
+    av.Exec("rename ::avapy::realLoadApi ::avapy::loadApi")
+    assert av.createProject(name="Retried").startswith("project")
+    assert Loaded(av)
@@ -0,0 +1,128 @@
+###############################################################################
+#
+#                 Avalanche Python API - Tcl Library Extraction Tests
+#
+###############################################################################
+
+import json
+import os
+import stat
+import zipfile
+
+import pytest
+
+import avalanche
+from avalanche import ExtractLibraries, LibraryChecksum
+
+#==============================================================================
+@pytest.fixture(autouse=True)
+def checksums(monkeypatch):
+    # Each test starts without the checksums of this process.
+    monkeypatch.setattr(avalanche, "LIB_CHECKSUMS", {})
+
+#==============================================================================
+def MakeZip(path, version="1.0"):
+    osdirectory = "windows" if os.name == "nt" else "linux"
+    otherdirectory = "linux" if os.name == "nt" else "windows"
+
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("lib/common/pkgIndex.tcl", "# version " + version)
+        tool = zipfile.ZipInfo("lib/" + osdirectory + "/tool.so")
+        tool.external_attr = 0o755 << 16
+        archive.writestr(tool, "binary")
+        archive.writestr("lib/" + otherdirectory + "/tool.dll", "binary")
+        archive.writestr("lib/common/.DS_Store", "")
+        archive.writestr("__MACOSX/lib/common/._pkgIndex.tcl", "")
+        archive.writestr("README.txt", "")
+
+    return osdirectory
+
+#==============================================================================
+def Files(libpath):
+    files = []
+    for directory, directories, names in os.walk(libpath):
+        files.extend(os.path.relpath(os.path.join(directory, name), libpath).replace(os.sep, "/") for name in names)
+    return sorted(files)
+
+#==============================================================================
+def test_extract_libraries(tmp_path):
+    zippath = str(tmp_path / "lib.zip")
+    osdirectory = MakeZip(zippath)
+    cachedir = str(tmp_path / "cache")
+
+    libpath = ExtractLibraries(zippath, cachedir)
+    checksum = LibraryChecksum(zippath, cachedir)
+
+    assert libpath == os.path.join(cachedir, "lib-" + str(avalanche.LIB_CACHE_VERSION) + "-" + checksum[:16], "lib")
+    assert Files(libpath) == ["common/pkgIndex.tcl", osdirectory + "/tool.so"]
+    if os.name != "nt":
+        assert stat.S_IMODE(os.stat(os.path.join(libpath, osdirectory, "tool.so")).st_mode) == 0o755
+
+    # Only the extracted directory and the stamp file are left in the cache.
+    assert sorted(os.listdir(cachedir)) == sorted([os.path.basename(os.path.dirname(libpath)),
+                                                  "lib-" + str(avalanche.LIB_CACHE_VERSION) + ".stamp"])
+
+#==============================================================================
+def test_extracted_libraries_are_reused(tmp_path, monkeypatch):
+    zippath = str(tmp_path / "lib.zip")
+    MakeZip(zippath)
+    cachedir = str(tmp_path / "cache")
+
+    libpath = ExtractLibraries(zippath, cachedir)
+    marker = os.path.join(libpath, "common", "marker")
+    with open(marker, "w"):
+        pass
+
+    # Another process finds the checksum in the stamp file, and the directory that
+    # is already extracted.
+    monkeypatch.setattr(avalanche, "LIB_CHECKSUMS", {})
+    monkeypatch.setattr(avalanche.zipfile, "ZipFile", None)
+    monkeypatch.setattr(avalanche.hashlib, "sha256", None)
+
+    assert ExtractLibraries(zippath, cachedir) == libpath
+    assert os.path.exists(marker)
+
+#==============================================================================
+def test_updated_zip_is_extracted_again(tmp_path):
+    zippath = str(tmp_path / "lib.zip")
+    MakeZip(zippath)
+    cachedir = str(tmp_path / "cache")
+    first = ExtractLibraries(zippath, cachedir)
+
+    MakeZip(zippath, version="2.0.1")
+    avalanche.LIB_CHECKSUMS.clear()
+    second = ExtractLibraries(zippath, cachedir)
+
+    assert second != first
+    with open(os.path.join(second, "common", "pkgIndex.tcl")) as index:
+        assert index.read() == "# version 2.0.1"
+
+    # The stamp file has the new size and checksum.
+    with open(os.path.join(cachedir, "lib-" + str(avalanche.LIB_CACHE_VERSION) + ".stamp")) as stampfile:
+        stamp = json.load(stampfile)[os.path.abspath(zippath)]
+    assert stamp["key"][0] == os.path.getsize(zippath)
+    assert second.endswith("-" + stamp["checksum"][:16] + os.sep + "lib")
+
+#==============================================================================
+def test_invalid_stamp_file(tmp_path):
+    zippath = str(tmp_path / "lib.zip")
+    MakeZip(zippath)
+    cachedir = str(tmp_path / "cache")
+    os.makedirs(cachedir)
+
+    stamppath = os.path.join(cachedir, "lib-" + str(avalanche.LIB_CACHE_VERSION) + ".stamp")
+    with open(stamppath, "w") as stampfile:
+        stampfile.write("{not json")
+
+    checksum = LibraryChecksum(zippath, cachedir)
+    assert len(checksum) == 64
+    with open(stamppath) as stampfile:
+        assert json.load(stampfile)[zippath]["checksum"] == checksum
+
+#==============================================================================
+def test_cache_directory_from_the_environment(tmp_path, monkeypatch):
+    zippath = str(tmp_path / "lib.zip")
+    MakeZip(zippath)
+    monkeypatch.setenv("AVA_LIB_CACHE", str(tmp_path / "envcache"))
+
+    assert ExtractLibraries(zippath).startswith(str(tmp_path / "envcache") + os.sep)
@@ -0,0 +1,124 @@
+###############################################################################
+#
+#                 Avalanche Python API - Logging Tests
+#
+###############################################################################
+
+import json
+import threading
+
+from avalanche import CommandMessage
+
+#==============================================================================
+def ReadLog(av):
+    # Stops the AVA object, so that the queued records are written, and returns the log.
+    av.CleanupTcl()
+    with open(av.logfile) as logfile:
+        return logfile.read()
+
+#==============================================================================
+def test_command_message():
+    names = ["objecthandle", "mode", "count"]
+    defaults = {"mode": "", "count": 1}
+
+    # Named, default, extra positional and extra keyword arguments.
+    message = CommandMessage("config", names, defaults, "kwargs", ("project1",), {"count": 5, "name": "My Project"})
+    assert str(message) == 'config(objecthandle="project1", mode="", count="5", name="My Project")'
+
+    message = CommandMessage("get", ["objecthandle"], {}, None, ("project1", "name", "path"), {})
+    assert str(message) == 'get(objecthandle="project1", "name", "path")'
+
+#==============================================================================
+def test_logged_command_arguments(make_av):
+    av = make_av(loglevel="DEBUG")
+    project = av.createProject(name="Logged")
+    av.config(project, name="Renamed")
+    av.get(project, "name")
+    av.perform("ClearResults", project, force="true")
+
+    log = ReadLog(av)
+    assert ' - Python command - createProject(name="Logged")' in log
+    assert ' - Python command - config(objecthandle="' + project + '", name="Renamed")' in log
+    assert ' - Python command - get(objecthandle="' + project + '", "name")' in log
+    assert ' - Python command - perform(command="ClearResults", objecthandle="' + project + '", force="true")' in log
+
+#==============================================================================
+def test_logged_command_is_not_formatted_below_debug(make_av, monkeypatch):
+    def Fail(self):
+        raise AssertionError("CommandMessage was formatted")
+
+    monkeypatch.setattr(CommandMessage, "__str__", Fail)
+
+    av = make_av(loglevel="INFO")
+    project = av.createProject(name="Quiet")
+    assert av.get(project, "name") == "Quiet"
+    assert "Python command" not in ReadLog(av)
+
+#==============================================================================
+def test_logged_command_is_formatted_by_the_writer_thread(make_av, monkeypatch):
+    threads = []
+    format = CommandMessage.__str__
+
+    def Format(self):
+        threads.append(threading.current_thread())
+        return format(self)
+
+    monkeypatch.setattr(CommandMessage, "__str__", Format)
+
+    av = make_av(loglevel="DEBUG")
+    av.createProject(name="Deferred")
+
+    assert ' - Python command - createProject(name="Deferred")' in ReadLog(av)
+    assert threads and threading.current_thread() not in threads
+
+#==============================================================================
+def test_each_object_has_its_own_log(make_av, tmp_path):
+    logpath = str(tmp_path / "shared")
+    first = make_av(logpath=logpath, loglevel="DEBUG")
+    second = make_av(logpath=logpath, loglevel="DEBUG")
+
+    assert first.log is not second.log
+    assert first.logfile != second.logfile
+
+    first.Exec("set first 1")
+    second.Exec("set second 2")
+
+    firstlog = ReadLog(first)
+    secondlog = ReadLog(second)
+    assert "set first 1" in firstlog and "set second 2" not in firstlog
+    assert "set second 2" in secondlog and "set first 1" not in secondlog
+
+#==============================================================================
+def test_log_is_released_on_cleanup(make_av, tmp_path):
+    logpath = str(tmp_path / "reused")
+    av = make_av(logpath=logpath)
+    logfile = av.logfile
+    av.CleanupTcl()
+
+    assert av.log.handlers == []
+
+    # The name of the log file can be used again.
+    assert make_av(logpath=logpath).logfile == logfile
+
+#==============================================================================
+def test_json_log_format(make_av):
+    av = make_av(loglevel="DEBUG", logformat="json")
+    av.Exec("set value 42")
+
+    entries = [json.loads(line) for line in ReadLog(av).splitlines()]
+    assert all(set(entry) >= {"time", "level", "logger", "thread", "message"} for entry in entries)
+    assert entries[0]["logger"] == av.log.name
+
+    command = [entry for entry in entries if entry["message"] == " - Tcl command - set value 42"][0]
+    result = [entry for entry in entries if entry["message"] == " - Tcl result  - 42" and entry.get("commandid") == command["commandid"]][0]
+    assert result["duration"] >= 0
+
+#==============================================================================
+def test_log_result_size(make_av):
+    av = make_av(loglevel="DEBUG", logresultsize=20)
+    assert av.Exec("string repeat x 1000") == "x" * 1000
+
+    # The message (" - Tcl result  - " and the result) is cut at 20 characters.
+    log = ReadLog(av)
+    assert " - Tcl result  - xxx... (997 more characters)" in log
+    assert "x" * 30 not in log
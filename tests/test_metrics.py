@@ -0,0 +1,97 @@
+###############################################################################
+#
+#                 Avalanche Python API - Metrics Tests
+#
+###############################################################################
+
+import os
+import threading
+
+from urllib.request import urlopen
+
+from avalanche import CommandMetrics, Percentile
+
+#==============================================================================
+def test_percentiles():
+    metrics = CommandMetrics()
+    for value in range(100, 0, -1):
+        metrics.Command("av::get", value / 1000.0, 10)
+
+    latency = metrics.stats()["commands"]["av::get"]
+    assert latency["count"] == 100
+    assert latency["max"] == 0.1
+    assert abs(latency["mean"] - 0.0505) < 1e-9
+    assert (latency["p50"], latency["p95"], latency["p99"]) == (0.051, 0.096, 0.1)
+    assert metrics.stats()["bytes_read"] == 1000
+
+    assert Percentile([], 0.5) == 0.0
+    assert Percentile([3.0], 0.99) == 3.0
+
+#==============================================================================
+def test_stats(av):
+    av.Exec("set a 1")
+    av.get("system1", "name")
+    av.perform("ClearResults", "system1")
+
+    stats = av.stats()
+    assert {"set", "av::get", "av::perform ClearResults"} <= set(stats["commands"])
+    assert stats["bytes_written"] > 0 and stats["bytes_read"] > 0
+    assert stats["parse_count"] >= 3
+    assert stats["cache"]["maxsize"] == 16
+
+#==============================================================================
+def test_prometheus_format():
+    metrics = CommandMetrics()
+    metrics.Command('av::perform "Quoted"', 0.5, 3)
+    metrics.Written(12)
+    metrics.Parsed(0.25)
+
+    lines = metrics.Prometheus().splitlines()
+    assert 'avalanche_command_duration_seconds{verb="av::perform \\"Quoted\\"",quantile="0.95"} 0.5' in lines
+    assert 'avalanche_command_duration_seconds_count{verb="av::perform \\"Quoted\\""} 1' in lines
+    assert "avalanche_bytes_written_total 12" in lines
+    assert "avalanche_bytes_read_total 3" in lines
+    assert "avalanche_parse_seconds_total 0.25" in lines
+    assert "avalanche_parse_total 1" in lines
+
+    # Every sample has a HELP and a TYPE.
+    names = set(line.split()[2] for line in lines if line.startswith("# TYPE"))
+    for line in lines:
+        if not line.startswith("#"):
+            assert line.split("{")[0].split()[0].replace("_sum", "").replace("_count", "") in names
+
+#==============================================================================
+def test_write_metrics(av, tmp_path):
+    path = str(tmp_path / "avalanche.prom")
+    av.Exec("set a 1")
+
+    # Several writers to the same path don't get in each other's way.
+    errors = []
+
+    def Write():
+        try:
+            for count in range(20):
+                av.writeMetrics(path)
+        except Exception as errmsg:
+            errors.append(errmsg)
+
+    threads = [threading.Thread(target=Write) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert os.listdir(str(tmp_path)) == ["avalanche.prom"]
+    with open(path) as metricsfile:
+        assert 'avalanche_command_duration_seconds_count{verb="set"}' in metricsfile.read()
+
+#==============================================================================
+def test_serve_metrics(av):
+    server = av.serveMetrics()
+    try:
+        body = urlopen("http://127.0.0.1:" + str(server.server_address[1]) + "/metrics").read().decode("utf-8")
+    finally:
+        server.shutdown()
+
+    assert "avalanche_bytes_written_total" in body
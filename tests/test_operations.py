@@ -0,0 +1,102 @@
+###############################################################################
+#
+#                 Avalanche Python API - Asynchronous Operation Tests
+#
+###############################################################################
+
+import logging
+
+import pytest
+
+from avalanche import AsCompleted, OperationTracker, WaitAll
+
+#==============================================================================
+def StartAV(make_av):
+    av = make_av()
+    av.Exec("av::fake::configure -events 0")
+    project = av.createProject(name="Operations")
+    return av, [av.createTest(project=project, name="Test" + str(index)) for index in range(3)]
+
+#==============================================================================
+def test_apply_async(make_av):
+    av, tests = StartAV(make_av)
+
+    futures = [av.applyAsync(test) for test in tests]
+    events = WaitAll(futures, timeout=10)
+
+    assert [event["name"] for event in events] == ["async_method_completed"] * 3
+    assert [event["additional"]["requestId"] for event in events] == [future.requestid for future in futures]
+    assert "av::apply " + tests[0] in repr(futures[0])
+
+#==============================================================================
+def test_connect_async_and_as_completed(make_av):
+    av, tests = StartAV(make_av)
+
+    futures = [av.connectAsync("10.0.0." + str(index)) for index in range(1, 4)]
+    done = list(AsCompleted(futures, timeout=10))
+    assert sorted(done, key=id) == sorted(futures, key=id)
+    assert len(av.get("system1.physicalchassismanager", "physicalchassis").split()) == 3
+
+#==============================================================================
+def test_operation_tracker():
+    tracker = OperationTracker(logging.getLogger("test_operations"))
+
+    # An event that is dispatched before its future is created is kept.
+    tracker.Completed({"name": "async_method_completed", "additional": {"requestId": " 7 "}})
+    assert tracker.Track("7", "early").result(timeout=0)["additional"]["requestId"] == " 7 "
+
+    failed = tracker.Track("8", "failing")
+    tracker.Completed({"name": "async_method_completed", "additional": {"requestId": "8", "error": "no license"}})
+    with pytest.raises(Exception, match="no license"):
+        failed.result(timeout=0)
+
+    status = tracker.Track("9", "status")
+    tracker.Completed({"name": "async_method_completed", "message": "apply failed", "additional": {"requestId": "9", "status": "Failed"}})
+    with pytest.raises(Exception, match="apply failed"):
+        status.result(timeout=0)
+
+    # A cancelled future is forgotten.
+    cancelled = tracker.Track("10", "cancelled")
+    cancelled.cancel()
+    assert "10" not in tracker.futures
+
+#==============================================================================
+def test_wait_all_timeout():
+    tracker = OperationTracker(logging.getLogger("test_operations"))
+    futures = [tracker.Track(str(index), "never") for index in range(2)]
+
+    with pytest.raises(Exception, match="2 of 2 operations did not complete in 0.05 seconds"):
+        WaitAll(futures, timeout=0.05)
+
+    with pytest.raises(Exception, match="2 of 2 operations did not complete"):
+        list(AsCompleted(futures, timeout=0.05))
+
+#==============================================================================
+def test_stop_events_fails_pending_operations(make_av):
+    av, tests = StartAV(make_av)
+
+    # A request id whose completion event never comes.
+    future = av.TrackOperation(lambda: "12345", "never")
+    av.stopEvents()
+
+    with pytest.raises(Exception, match="The event pump was stopped"):
+        future.result(timeout=5)
+
+    # The next asynchronous command starts a new pump.
+    assert av.applyAsync(tests[0]).result(timeout=10)["name"] == "async_method_completed"
+
+#==============================================================================
+def test_cleanup_fails_pending_operations(make_av):
+    av, tests = StartAV(make_av)
+    future = av.TrackOperation(lambda: "12345", "never")
+    av.CleanupTcl()
+
+    with pytest.raises(Exception, match="The event pump was stopped"):
+        future.result(timeout=5)
+
+#==============================================================================
+def test_wait_until_command_is_done(av):
+    requestid = av.connect("10.0.1.1", executesynchronous="false")
+    assert isinstance(requestid, int)
+    assert av.waitUntilCommandIsDone(requestid) == ""
+    assert av.waitUntilCommandIsDone() == ""
@@ -0,0 +1,98 @@
+###############################################################################
+#
+#                 Avalanche Python API - Pipeline Tests
+#
+###############################################################################
+
+import pytest
+
+#==============================================================================
+def test_pipeline_results_in_order(av):
+    pipe = av.pipeline()
+    futures = [pipe.Exec("expr {" + str(index) + " * 2}") for index in range(5)]
+    assert len(pipe) == 5
+
+    # Numeric results are converted, as with Exec.
+    assert pipe.execute() == [0, 2, 4, 6, 8]
+    assert [future.result() for future in futures] == [0, 2, 4, 6, 8]
+    assert len(pipe) == 0
+
+#==============================================================================
+def test_pipeline_raise_on_error(av):
+    pipe = av.pipeline()
+    pipe.Exec("set a 1")
+    pipe.Exec("error first")
+    pipe.Exec("set b 2")
+    pipe.Exec("error second")
+
+    # Every command is still run, and the first error is raised.
+    with pytest.raises(Exception, match="first"):
+        pipe.execute()
+
+    assert av.Exec("set b") == 2
+
+#==============================================================================
+def test_pipeline_without_raise_on_error(av):
+    pipe = av.pipeline(raise_on_error=False)
+    ok = pipe.Exec("set a 1")
+    failed = pipe.Exec("error boom")
+    results = pipe.execute()
+
+    assert results[0] == 1
+    assert isinstance(results[1], Exception) and "boom" in str(results[1])
+    assert ok.result() == 1
+    with pytest.raises(Exception, match="boom"):
+        failed.result()
+
+#==============================================================================
+def test_pipeline_future_result_flushes(av):
+    pipe = av.pipeline()
+    future = pipe.Exec("set flushed yes")
+
+    # Asking for a result sends the queued commands.
+    assert future.result() == "yes"
+    assert len(pipe) == 0
+
+#==============================================================================
+def test_public_methods_in_a_batch(av):
+    with av.batch() as pipe:
+        project = av.createProject(name="BatchProject")
+        name = av.get("system1", "name")
+        exists = av.nodeExists("system1")
+        assert len(pipe) == 3
+
+    assert project.result().startswith("project")
+    assert name.result() == "system1"
+    assert exists.result() == 1
+    assert av.get(project.result(), "name") == "BatchProject"
+
+#==============================================================================
+def test_batch_discards_on_exception(av):
+    with pytest.raises(ZeroDivisionError):
+        with av.batch():
+            future = av.Exec("set discarded 1")
+            1 / 0
+
+    assert future.cancelled()
+    assert av.Exec("info exists discarded") == 0
+
+#==============================================================================
+def test_batch_raise_on_error(av):
+    with pytest.raises(Exception, match="invalid handle"):
+        with av.batch():
+            av.get("nosuchhandle", "name")
+
+    with av.batch(raise_on_error=False):
+        failed = av.get("nosuchhandle", "name")
+
+    with pytest.raises(Exception, match="invalid handle"):
+        failed.result()
+
+#==============================================================================
+def test_composite_methods_refuse_pipelines(av):
+    pipe = av.pipeline()
+    with pytest.raises(Exception, match="AVAPipeline"):
+        pipe.reserveAll("test1")
+    with pytest.raises(Exception, match="AVAPipeline"):
+        pipe.releaseAll()
+    assert len(pipe) == 0
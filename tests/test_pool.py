@@ -0,0 +1,63 @@
+###############################################################################
+#
+#                 Avalanche Python API - Interpreter Pool Tests
+#
+###############################################################################
+
+import pytest
+
+import avalanche
+from conftest import FAKEAV_PATH
+from avalanche import AVA, AVAPool
+
+#==============================================================================
+def StartPool(tmp_path, size=2):
+    return AVAPool(size, apipath=FAKEAV_PATH, tcllibpath=FAKEAV_PATH, logpath=str(tmp_path), loglevel="WARNING")
+
+#==============================================================================
+def test_pool_map(tmp_path):
+    with StartPool(tmp_path, 3) as pool:
+        assert len(pool.workers) == 3
+
+        # Results come back in the order of the arguments.
+        assert pool.map("get", [("system1", "name")] * 6 + [("system1", "workspace")]) == ["system1"] * 6 + ["Default"]
+        assert pool.submit("nodeExists", "system1").result() == 1
+        assert pool.handleOf("system1", "projects", "none") == ""
+
+    assert pool.workers == []
+
+#==============================================================================
+def test_pool_readonly_guard(tmp_path):
+    with StartPool(tmp_path, 1) as pool:
+        with pytest.raises(AttributeError, match="read-only"):
+            pool.config("system1", name="x")
+
+        with pytest.raises(AttributeError, match="read-only"):
+            pool.submit("createProject", name="x")
+
+#==============================================================================
+def test_pool_cleans_up_when_a_worker_fails(tmp_path, monkeypatch):
+    started = []
+    logins = []
+
+    class FailingAVA(AVA):
+        def __init__(self, *args, **kwargs):
+            AVA.__init__(self, *args, **kwargs)
+            started.append(self)
+
+        def login(self, *args, **kwargs):
+            logins.append(self)
+            if len(logins) == 2:
+                raise Exception("login failed")
+            return AVA.login(self, *args, **kwargs)
+
+    monkeypatch.setattr(avalanche, "AVA", FailingAVA)
+
+    with pytest.raises(Exception, match="login failed"):
+        StartPool(tmp_path, 3)
+
+    # The interpreters that started, before or after the failure, are all stopped.
+    assert len(started) == 3
+    for worker in started:
+        assert worker._closing
+        assert worker.tcl.poll() is not None
@@ -0,0 +1,144 @@
+###############################################################################
+#
+#                 Avalanche Python API - Record/Replay Tests
+#
+###############################################################################
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from conftest import PACKAGE_PATH
+from avalanche_replay import CommandRecorder, Main, ReadRecording, Replay, ReplayAVA
+
+#==============================================================================
+def Session(av):
+    # The commands that are recorded and replayed. Returns their results.
+    project = av.createProject(name="Recorded")
+    test = av.createTest(project=project, name="RecordedTest")
+    av.config(project, description="two words")
+
+    results = [project, test, av.get(project), av.get(test, "name"), av.nodeExists(project)]
+    try:
+        av.get(project, "nosuchattribute")
+    except Exception as errmsg:
+        results.append(str(errmsg))
+
+    return results
+
+#==============================================================================
+def Record(av, path):
+    recorder = av.addHook(CommandRecorder(path))
+    try:
+        return Session(av)
+    finally:
+        av.removeHook(recorder)
+        recorder.close()
+
+#==============================================================================
+def test_command_recorder(make_av, tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    Record(make_av(), path)
+
+    entries = ReadRecording(path)
+    assert [entry["id"] for entry in entries] == list(range(1, len(entries) + 1))
+    assert entries[0]["command"] == "av::createProject -name Recorded"
+    assert entries[0]["status"] == 0 and entries[0]["result"].startswith("project")
+    assert entries[-1]["status"] == 1
+    assert "nosuchattribute" in entries[-1]["result"]
+    assert all(entry["duration"] >= 0 for entry in entries)
+    assert [entry["time"] for entry in entries] == sorted(entry["time"] for entry in entries)
+
+#==============================================================================
+def test_read_recording_checks_the_version(tmp_path):
+    path = str(tmp_path / "future.jsonl")
+    with open(path, "w") as recording:
+        recording.write('{"type": "header", "version": 99}\n')
+
+    with pytest.raises(Exception, match="Unsupported recording version"):
+        ReadRecording(path)
+
+#==============================================================================
+def test_replay_ava(make_av, tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    recorded = Record(make_av(), path)
+
+    # The same calls get the same results, without a Tcl interpreter.
+    av = ReplayAVA(path, logpath=str(tmp_path / "replay"), cachesize=16)
+    try:
+        assert Session(av) == recorded
+        assert av.stats()["commands"]["av::get"]["count"] >= 3
+
+        with pytest.raises(Exception, match="No recorded response for: av::logout"):
+            av.logout()
+    finally:
+        av.CleanupTcl()
+
+    assert av._closing
+
+#==============================================================================
+def test_replay_ava_async_operations(make_av, tmp_path):
+    path = str(tmp_path / "async.jsonl")
+
+    def AsyncSession(av):
+        project = av.createProject(name="AsyncRecorded")
+        test = av.createTest(project=project, name="AsyncTest")
+        event = av.applyAsync(test).result(timeout=10)
+        av.stopEvents()
+        return event["name"]
+
+    live = make_av()
+    live.Exec("av::fake::configure -events 0")
+    recorder = live.addHook(CommandRecorder(path))
+    assert AsyncSession(live) == "async_method_completed"
+    live.removeHook(recorder)
+    recorder.close()
+
+    # The event pump and the operation tracker run on a ReplayAVA too.
+    av = ReplayAVA(path, logpath=str(tmp_path / "replay"))
+    try:
+        assert AsyncSession(av) == "async_method_completed"
+    finally:
+        av.CleanupTcl()
+
+#==============================================================================
+def test_replay_against_an_interpreter(make_av, tmp_path):
+    path = str(tmp_path / "session.jsonl")
+    Record(make_av(), path)
+    count = len(ReadRecording(path))
+
+    report = Replay(path, make_av(), speed="max")
+    assert report["commands"] == count
+    assert report["mismatches"] == []
+    assert sum(verb["count"] for verb in report["verbs"].values()) == count
+    assert report["verbs"]["av::get"]["difference"] == report["verbs"]["av::get"]["replayed"] - report["verbs"]["av::get"]["recorded"]
+    assert report["elapsed"] >= 0
+
+    # A command whose status changes is reported.
+    av = make_av()
+    av.Exec("rename ::av::createTest {}")
+    report = Replay(path, av, speed="original")
+    assert [mismatch["command"].split()[0] for mismatch in report["mismatches"]][:1] == ["av::createTest"]
+
+    with pytest.raises(Exception, match="Unknown replay speed"):
+        Replay(path, av, speed="fast")
+
+#==============================================================================
+def test_main_requires_the_api_path(tmp_path):
+    with pytest.raises(SystemExit):
+        Main([str(tmp_path / "session.jsonl")])
+
+#==============================================================================
+def test_log_converter(make_av, tmp_path):
+    av = make_av(loglevel="DEBUG")
+    av.createProject(name="Converted")
+    av.CleanupTcl()
+
+    output = str(tmp_path / "converted.tcl")
+    script = os.path.join(PACKAGE_PATH, "logconverter.tcl")
+    subprocess.check_call([shutil.which("tclsh"), script, av.logfile, output], stdout=subprocess.DEVNULL)
+
+    with open(output) as converted:
+        assert "av::createProject -name Converted" in converted.read()
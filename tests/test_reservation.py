@@ -0,0 +1,128 @@
+###############################################################################
+#
+#                 Avalanche Python API - Reservation Tests
+#
+###############################################################################
+
+#==============================================================================
+def CreateTest(av, locations):
+    # Returns a test with one interface for each port location.
+    project = av.createProject(name="Reservation")
+    test = av.createTest(project=project, name="Reservation")
+    configuration = av.create("configuration", under=test)
+    topology = av.create("topology", under=configuration)
+    av.createMany("interface", topology, [{"port": location, "adminIPAddress": location.split("/")[0]} for location in locations])
+    return test
+
+#==============================================================================
+def test_reserve_all(make_av):
+    av = make_av(cachesize=64)
+    locations = ["10.0.0.1/1/1", "10.0.0.1/1/2", "10.0.0.2/1/1"]
+    test = CreateTest(av, locations)
+
+    report = av.reserveAll(test)
+    assert report["errors"] == 0
+    assert list(report["chassis"]) == ["10.0.0.1", "10.0.0.2"]
+    assert [interface["location"] for interface in report["interfaces"]] == locations
+    assert all(interface["port"] and interface["error"] is None for interface in report["interfaces"])
+    assert list(report["timings"]) == ["discover", "connect", "index", "reserve", "total"]
+
+    port = report["interfaces"][0]["port"]
+    assert av.get(port, "reservationState") == "Reserved by User"
+
+#==============================================================================
+def test_reserve_all_reports_a_missing_port(make_av):
+    av = make_av()
+    av.Exec("av::fake::configure -ports 2")
+    test = CreateTest(av, ["10.0.0.1/1/1", "10.0.0.1/1/9", "10.0.0.1/1/2"])
+
+    # The missing port does not stop the others.
+    report = av.reserveAll(test)
+    assert report["errors"] == 1
+    assert report["chassis"] == {"10.0.0.1": None}
+
+    missing = report["interfaces"][1]
+    assert missing["port"] is None
+    assert "No physical port found at location 10.0.0.1/1/9" in str(missing["error"])
+    assert [interface["error"] for interface in report["interfaces"][::2]] == [None, None]
+
+#==============================================================================
+def test_reserve_all_skips_an_interface_that_can_not_be_mapped(make_av):
+    av = make_av()
+    test = CreateTest(av, ["10.0.0.1/1/1", "10.0.0.1/1/2"])
+    failing = av.Exec("lindex [::avapy::testInterfaces " + test + "] 0 0")
+
+    av.Exec("rename ::av::perform ::av::fakePerform")
+    av.Exec("proc ::av::perform {command handle args} { if {$command eq {SetInterfaceAttributes} && $handle eq {" + failing + "}} "
+            "{ error {invalid physIf} }; eval [linsert $args 0 ::av::fakePerform $command $handle] }")
+
+    # The port of the interface that was not mapped is not reserved.
+    report = av.reserveAll(test)
+    assert report["errors"] == 1
+    assert [str(interface["error"]) for interface in report["interfaces"]] == ["invalid physIf", "None"]
+
+    ports = [interface["port"] for interface in report["interfaces"]]
+    assert [av.get(port, "reservationState") for port in ports] == ["Available", "Reserved by User"]
+
+#==============================================================================
+def test_reserve_all_invalidates_the_cache(make_av):
+    av = make_av(cachesize=64)
+    av.Exec("av::fake::configure -ports 1")
+    test = CreateTest(av, ["10.0.0.1/1/1"])
+
+    port = av.reserveAll(test)["interfaces"][0]["port"]
+    av.release("10.0.0.1/1/1")
+    assert av.get(port, "reservationState") == "Available"
+
+    # The cached state is dropped once the ports are reserved again.
+    av.reserveAll(test)
+    assert av.get(port, "reservationState") == "Reserved by User"
+
+#==============================================================================
+def test_reservation_commands_only_build_commands(av):
+    av.get("system1", "name")
+    report = av.ReservationReport()
+    report["interfaces"] = av.ReservationInterfaces("{interface1 10.0.0.1/1/1 10.0.0.1}")
+    report["chassis"]["10.0.0.1"] = None
+
+    commands, owners = av.ReservationCommands(report, {"10.0.0.1/1/1": ["port1", "0", "1,1", "1,1"]}, force=True)
+    assert len(commands) == 1
+    mapping, reservation = commands[0].split("\n")
+    assert "SetInterfaceAttributes" in mapping
+    assert "ReservePort" in reservation and "force" in reservation
+    assert owners == report["interfaces"]
+
+    # Nothing was sent, so the cache is kept.
+    assert av.cache.Get(("system1", "name")) == (True, "system1")
+
+#==============================================================================
+def test_release_all(make_av):
+    av = make_av(cachesize=64)
+    locations = ["10.0.0.1/1/1", "10.0.0.1/1/2", "10.0.0.2/1/1"]
+    report = av.reserveAll(CreateTest(av, locations))
+    port = report["interfaces"][0]["port"]
+    assert av.get(port, "reservationState") == "Reserved by User"
+
+    released = av.releaseAll()
+    assert sorted(released["released"]) == locations
+    assert released["failed"] == {}
+    assert released["errors"] == 0
+    assert av.get(port, "reservationState") == "Available"
+
+    # Nothing is left to release.
+    assert av.releaseAll() == {"released": [], "failed": {}, "errors": 0}
+
+#==============================================================================
+def test_release_all_reports_a_failed_port(make_av):
+    av = make_av()
+    av.reserveAll(CreateTest(av, ["10.0.0.1/1/1", "10.0.0.1/1/2"]))
+
+    av.Exec("rename ::av::release ::av::fakeRelease")
+    av.Exec("proc ::av::release {address} { if {$address eq {10.0.0.1/1/1}} { error {port is busy} }; ::av::fakeRelease $address }")
+
+    # The failed port does not stop the others.
+    report = av.releaseAll()
+    assert report["released"] == ["10.0.0.1/1/2"]
+    assert list(report["failed"]) == ["10.0.0.1/1/1"]
+    assert str(report["failed"]["10.0.0.1/1/1"]) == "port is busy"
+    assert report["errors"] == 1
@@ -0,0 +1,154 @@
+###############################################################################
+#
+#                 Avalanche Python API - StatsStore Tests
+#
+###############################################################################
+
+import csv
+import math
+
+import pytest
+
+import avalanche_stats
+from avalanche import StatsRecord
+from avalanche_stats import ReadSpill, StatsStore
+
+#==============================================================================
+def Rows(columns, rows):
+    # Returns the rows of ReadSpill as lists, with or without NumPy.
+    if getattr(rows, "ndim", 1) == 2:
+        return rows.tolist()
+
+    values = list(rows)
+    return [values[index:index + len(columns)] for index in range(0, len(values), len(columns))]
+
+#==============================================================================
+def Fill(store, count):
+    for index in range(count):
+        store.append(float(index), {"rdo1/conns": index * 10.0})
+
+#==============================================================================
+def test_ring_buffer():
+    store = StatsStore(capacity=4)
+    Fill(store, 6)
+
+    # The oldest samples are overwritten.
+    assert len(store) == 4
+    assert list(store.times()) == [2.0, 3.0, 4.0, 5.0]
+    assert list(store.column("rdo1/conns")) == [20.0, 30.0, 40.0, 50.0]
+    assert list(store.deltas("conns")) == [10.0, 10.0, 10.0]
+    assert list(store.rates("conns")) == [10.0, 10.0, 10.0]
+
+    window = store.window("conns", samples=2)
+    assert (window["count"], window["first"], window["last"], window["mean"]) == (2, 40.0, 50.0, 45.0)
+    assert store.window("conns", seconds=1)["count"] == 2
+    assert store.window("conns")["max"] == 50.0
+
+    with pytest.raises(Exception, match="at least 1"):
+        StatsStore(capacity=0)
+
+#==============================================================================
+def test_add_stream_records():
+    store = StatsStore(capacity=8)
+    store.add(StatsRecord(1.0, "resultdataset1", {"rdo1": {"conns": 1, "name": "x", "timestamp": 5}, "rdo2": {"bytes": 2.5}}))
+    store.add(StatsRecord(2.0, "resultdataset1", {"rdo1": {"conns": 3}, "rdo2": Exception("gone"), "rdo3": {"conns": 7}}))
+
+    # Only the numeric counters are stored. A counter that appears later is back-filled.
+    assert sorted(store.names) == ["rdo1/conns", "rdo2/bytes", "rdo3/conns"]
+    assert math.isnan(store.column("rdo2/bytes")[1])
+    assert math.isnan(store.column("rdo3/conns")[0])
+    assert store.column("bytes")[0] == 2.5
+
+    with pytest.raises(Exception, match="Ambiguous counter"):
+        store.column("conns")
+    with pytest.raises(Exception, match="Unknown counter"):
+        store.column("nosuchcounter")
+
+#==============================================================================
+def test_binary_spill(tmp_path):
+    path = str(tmp_path / "soak.bin")
+    store = StatsStore(capacity=4, spill=path, chunk=2)
+    Fill(store, 10)
+    assert store.spilled > 0
+
+    # Counters that appear once the spill file is open are ignored.
+    store.append(10.0, {"rdo1/conns": 100.0, "rdo1/late": 1.0})
+    assert store.ignored == 1
+    store.close()
+
+    columns, rows = ReadSpill(path)
+    assert columns == ["timestamp", "rdo1/conns"]
+    assert Rows(columns, rows) == [[float(index), index * 10.0] for index in range(10)] + [[10.0, 100.0]]
+
+    # The samples in memory remain available after close.
+    assert list(store.times()) == [7.0, 8.0, 9.0, 10.0]
+
+#==============================================================================
+def test_read_spill_in_slices(tmp_path, monkeypatch):
+    path = str(tmp_path / "slices.bin")
+    store = StatsStore(capacity=3, spill=path, chunk=1)
+    Fill(store, 20)
+    store.close()
+
+    monkeypatch.setattr(avalanche_stats, "numpy", None)
+    monkeypatch.setattr(avalanche_stats, "READ_SLICE", 7)
+
+    columns, rows = ReadSpill(path)
+    assert Rows(columns, rows) == [[float(index), index * 10.0] for index in range(20)]
+
+#==============================================================================
+@pytest.mark.parametrize("name", ["soak.bin", "soak.csv"])
+def test_append_after_close(tmp_path, name):
+    path = str(tmp_path / name)
+    store = StatsStore(capacity=4, spill=path, chunk=2)
+    Fill(store, 6)
+    store.close()
+
+    # The samples are added to the spill file, which keeps its columns.
+    store.append(10.0, {"rdo1/conns": 10.0, "rdo1/late": 1.0})
+    store.close()
+    assert store.ignored == 1
+
+    expected = [[float(index), index * 10.0] for index in range(6)] + [[10.0, 10.0]]
+    if name.endswith(".csv"):
+        with open(path) as spillfile:
+            rows = list(csv.reader(spillfile))
+        assert rows[0] == ["timestamp", "rdo1/conns"]
+        assert [[float(value) for value in row] for row in rows[1:]] == expected
+    else:
+        columns, rows = ReadSpill(path)
+        assert columns == ["timestamp", "rdo1/conns"]
+        assert Rows(columns, rows) == expected
+
+#==============================================================================
+def test_empty_spill(tmp_path):
+    path = str(tmp_path / "empty.bin")
+    store = StatsStore(capacity=2, spill=path)
+    store.OpenSpill()
+    store.close()
+
+    columns, rows = ReadSpill(path)
+    assert columns == ["timestamp"]
+    assert len(rows) == 0
+
+#==============================================================================
+def test_csv_spill(tmp_path):
+    path = str(tmp_path / "soak.csv")
+    store = StatsStore(capacity=2, spill=path)
+    Fill(store, 5)
+    store.close()
+
+    with open(path) as spillfile:
+        rows = list(csv.reader(spillfile))
+
+    assert rows[0] == ["timestamp", "rdo1/conns"]
+    assert [[float(value) for value in row] for row in rows[1:]] == [[float(index), index * 10.0] for index in range(5)]
+
+#==============================================================================
+def test_store_stream(av):
+    store = StatsStore(capacity=2)
+    for record in av.stream("client", ["conns"], interval=0, count=3):
+        store.add(record)
+
+    assert len(store) == 2
+    assert store.window("conns")["count"] == 2
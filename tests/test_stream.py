@@ -0,0 +1,74 @@
+###############################################################################
+#
+#                 Avalanche Python API - Stats Stream Tests
+#
+###############################################################################
+
+import pytest
+
+from avalanche import ExecHooks
+
+#==============================================================================
+def test_stream(av):
+    records = list(av.stream("client", ["http,successfulconns", "http,attemptedconns"], interval=0.01, count=3))
+    assert len(records) == 3
+
+    dataset = records[0].dataset
+    assert all(record.dataset == dataset for record in records)
+    assert [record.time for record in records] == sorted(record.time for record in records)
+
+    # One ResultDataObject, whose counters grow with each sample.
+    rdo = list(records[0].objects)[0]
+    successful = [record.objects[rdo]["http,successfulconns"] for record in records]
+    assert all(isinstance(value, int) for value in successful)
+    assert successful == sorted(successful)
+
+    # The subscription is removed once the generator is exhausted.
+    assert av.nodeExists(dataset) == 0
+
+#==============================================================================
+def test_stream_unsubscribes_when_closed(av):
+    stream = av.stream("server", ["http,successfulconns"], interval=0.01)
+    record = next(stream)
+    assert av.nodeExists(record.dataset) == 1
+
+    stream.close()
+    assert av.nodeExists(record.dataset) == 0
+
+#==============================================================================
+def test_stream_uses_one_command_per_sample(av):
+    before = av.stats()["commands"].get("::avapy::pollDataSet", {}).get("count", 0)
+    for record in av.stream("client", ["a", "b", "c", "d"], interval=0, count=4):
+        pass
+
+    assert av.stats()["commands"]["::avapy::pollDataSet"]["count"] == before + 4
+
+#==============================================================================
+def test_stream_hooks_time_the_whole_generator(make_av):
+    class Calls(ExecHooks):
+        def __init__(self):
+            self.calls = []
+
+        def before_call(self, method, args, kwargs):
+            self.calls.append(("before_call", method))
+
+        def after_call(self, method, duration):
+            self.calls.append(("after_call", method))
+
+    av = make_av()
+    hook = av.addHook(Calls())
+
+    stream = av.stream("client", ["a"], interval=0, count=2)
+    next(stream)
+    assert ("after_call", "stream") not in hook.calls
+
+    for record in stream:
+        pass
+    assert hook.calls.count(("after_call", "stream")) == 1
+    assert hook.calls[-1] == ("after_call", "stream")
+
+#==============================================================================
+def test_stream_not_in_pipeline(av):
+    with pytest.raises(Exception, match="av.stream can not be used in an AVAPipeline"):
+        with av.batch():
+            next(av.stream("client", ["a"]))
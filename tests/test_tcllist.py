@@ -0,0 +1,58 @@
+###############################################################################
+#
+#                 Avalanche Python API - Tcl List Tests
+#
+###############################################################################
+
+import pytest
+
+from avalanche import ConvertTclValue, SplitTclList, TclQuote
+
+#==============================================================================
+@pytest.mark.parametrize("tcllist, expected", [
+    ("", []),
+    ("   ", []),
+    ("a b\tc\nd", ["a", "b", "c", "d"]),
+    ("{} a {}", ["", "a", ""]),
+    ("{a b} {c {d e}}", ["a b", "c {d e}"]),
+    ('"a b" "c\\"d"', ["a b", 'c"d']),
+    ("{a\\ b} a\\ b", ["a\\ b", "a b"]),
+    ("a\\{b \\}", ["a{b", "}"]),
+    ("x\\ny \\t", ["x\ny", "\t"]),
+    ("{{}} {{a}}", ["{}", "{a}"]),
+])
+def test_split_tcl_list(tcllist, expected):
+    assert SplitTclList(tcllist) == expected
+
+#==============================================================================
+@pytest.mark.parametrize("value", ["", "a b", "{", "}", "a{b", '"', "\\", "$x", "[cmd]", "#c", "a;b", "\n", "{a b} c"])
+def test_tcl_quote_round_trip(value):
+    assert SplitTclList(TclQuote(value)) == [value]
+
+#==============================================================================
+@pytest.mark.parametrize("value, expected", [
+    ("42", 42),
+    ("-7", -7),
+    (" 12 ", 12),
+    ("0x1F", 31),
+    ("1.5", 1.5),
+    (".5", 0.5),
+    ("1e3", 1000.0),
+    ("-2.5E-1", -0.25),
+    ("", ""),
+    ("abc", "abc"),
+    ("12abc", "12abc"),
+    ("1.2.3", "1.2.3"),
+    ("0x", "0x"),
+    ("Inf", "Inf"),
+])
+def test_convert_tcl_value(value, expected):
+    result = ConvertTclValue(value)
+    assert result == expected
+    assert type(result) is type(expected)
+
+#==============================================================================
+def test_list_to_dict(av):
+    # The leading dash of the attribute names is dropped, and the values are converted.
+    assert av.List2Dict("-name {My Test} -count 3 -rate 1.5 -empty {}") == {"name": "My Test", "count": 3, "rate": 1.5, "empty": ""}
+    assert av.List2Dict("") == {}